@@ -0,0 +1,158 @@
+'''
+    File: anytime.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file contains a solver with a time budget. The other solvers stop
+    when they find a path with the length of the best solution of the
+    level, so a level with a wrong best solution makes them search every
+    goal order. This solver first walks to the nearest goal that is left
+    till every goal is collected, which gives a path after one leg per
+    goal, and then improves it with branch and bound till the budget runs
+    out. A leg that is being searched isn't stopped, so the solver can go
+    over the budget by the time of one leg.
+
+    The best solution of the level isn't trusted, the search stops when
+    the path is as short as the lower bound of branch and bound or when
+    every goal order has been tried. In both cases no goal order gives a
+    shorter path and the path is proven, which the proven attribute tells
+    after solve. A level where no path collects every goal is never
+    proven.
+
+'''
+
+import time
+import branch_bound
+
+INFINITY = branch_bound.INFINITY
+
+# Seconds the solver may search when no budget is given
+DEFAULT_BUDGET = 1.0
+
+class Anytime(branch_bound.BranchBound):
+    def __init__(self, grid, goal_list, best_solution, start, has_hammer, \
+        direction, cache=None, destroyed=frozenset(), \
+        budget=None):
+
+        # The budget starts before the distances are calculated
+        if budget is None:
+            budget = DEFAULT_BUDGET
+        self.budget = budget
+        self.deadline = time.monotonic() + budget
+        branch_bound.BranchBound.__init__(self, grid, goal_list, \
+            best_solution, start, has_hammer, direction, cache, destroyed)
+
+        # Length of the greedy path and the lower bound from the start, and
+        # whether the budget ran out and the path is the shortest
+        self.greedy_length = INFINITY
+        self.lower_bound = 0
+        self.timed_out = False
+        self.proven = False
+
+    def collect_visited(self, visited, destroyed, remaining, order):
+        '''Removes the goals on the path or destroyed from the remaining
+        goals and adds them to the order. Returns the remaining goals.
+        '''
+        for i in range(len(self.goals)):
+            if remaining & (1 << i) and (self.goals[i] in visited or \
+                self.goals[i] in destroyed):
+                remaining &= ~(1 << i)
+                order.append(i)
+        return remaining
+
+    def greedy(self):
+        '''Walks to the nearest remaining goal till every goal is collected,
+        and keeps the path as the best path. The nearest goal is taken from
+        the distances of branch and bound, so only one leg per goal is
+        searched. The best path stays empty when a goal can't be reached.
+        '''
+        current_step = self.start
+        direction = self.direction
+        destroyed = self.destroyed
+        visited = set([self.get_index(self.start)])
+        remaining = (1 << len(self.goals)) - 1
+        order = []
+        path_list = []
+        rotations = []
+        while True:
+            remaining = self.collect_visited(visited, destroyed, remaining, \
+                order)
+            if not remaining:
+                break
+            index = self.get_index(current_step)
+            i = min((i for i in range(len(self.goals)) if \
+                remaining & (1 << i)), key=lambda i: \
+                (self.distances[i][index], i))
+            self.nodes += 1
+            leg = self.solve_leg(current_step, direction, \
+                self.goal_list[i][0], destroyed)
+            if leg is None:
+                return
+            (steps, direction, rot, smashed) = leg
+            remaining &= ~(1 << i)
+            order.append(i)
+            path_list.extend(steps)
+            rotations.extend(rot)
+            destroyed = destroyed | smashed
+            visited.update(self.get_index(tile) for tile in steps)
+            if path_list:
+                current_step = path_list[-1]
+
+        self.greedy_length = len(path_list)
+        self.best_length = len(path_list)
+        self.best_path = path_list
+        self.best_rotations = rotations
+        self.best_perm = tuple(order)
+
+    def is_done(self):
+        '''Checks if the search can stop, which is when the best path is as
+        short as the lower bound.
+        '''
+        return self.best_length <= self.lower_bound
+
+    def search(self, current_step, direction, destroyed, visited, remaining, \
+        order, path_list, rotations):
+        '''Searches like BranchBound.search till the budget runs out.'''
+        if time.monotonic() >= self.deadline:
+            self.timed_out = True
+            return True
+        return branch_bound.BranchBound.search(self, current_step, \
+            direction, destroyed, visited, remaining, order, path_list, \
+            rotations)
+
+    def get_stats(self):
+        '''Returns the statistics of the solver, with the greedy length and
+        whether the path is proven.
+        '''
+        stats = branch_bound.BranchBound.get_stats(self)
+        stats["greedy_length"] = self.greedy_length
+        stats["timed_out"] = self.timed_out
+        stats["proven"] = self.proven
+        return stats
+
+    def solve(self):
+        '''Finds a greedy path and improves it with branch and bound till
+        the budget runs out. Returns the path, the rotations and the goal
+        order like Brute_force.solve.
+        '''
+        self.best_length = INFINITY
+        self.best_path = []
+        self.best_rotations = []
+        self.best_perm = ()
+        self.nodes = 0
+        self.pruned = 0
+        self.timed_out = False
+        start = self.get_index(self.start)
+        remaining = (1 << len(self.goals)) - 1
+        self.lower_bound = self.get_lower_bound(start, remaining)
+        self.greedy()
+        if not self.is_done():
+            self.search(self.start, self.direction, self.destroyed, \
+                set([start]), remaining, [], [], [])
+        self.proven = self.best_length != INFINITY and \
+            (not self.timed_out or self.is_done())
+        return self.best_path, list(self.best_rotations), self.best_perm
@@ -8,21 +8,25 @@
 ---------------------------------------------
     File description:
     This file contains the implementation of the A* algorithm. The A* algorithm
-    is a search algorithm to find the shortest path towards the goal. This 
-    implementation is based on the Bomberbot puzzles.  
+    is a search algorithm to find the shortest path towards the goal. This
+    implementation is based on the Bomberbot puzzles.
+
+    All search values (parents, scores and smashed objects) are stored in
+    lists indexed by tile index (y * grid_width + x), so the tiles of a level
+    are never changed and one level can be searched by many threads at once.
 
 '''
 
+import heapq
 import math
+import tile_grid
 
 class AStar(object):
-    def __init__(self, grid_height, grid_width, tiles, start, end, has_hammer, \
-        direction):
-        self.opened = []
-        self.closed = set()
-        self.tiles = tiles
-        self.grid_height = grid_height
-        self.grid_width = grid_width
+    def __init__(self, grid, start, end, has_hammer, direction, \
+        destroyed=frozenset()):
+        self.grid = grid
+        self.grid_height = grid.height
+        self.grid_width = grid.width
         self.start = start
         self.end = end
         self.path_length = 0
@@ -30,172 +34,225 @@ class AStar(object):
         self.has_hammer = has_hammer
         self.direction = direction
 
-    def get_heuristic(self, tile):
-        """Calculates the heuristic for the tiles. The heuristic is 
-        a combination of euclidean distance and the reversed breaking
-        ties method. The reversed breaking ties method prioritizes vertices 
-        closer to the goal instead of close to the starting point.
-        """ 
-
-        # Euclidean distance
-        dx = abs(tile.x_coord - self.end.x_coord)
-        dy = abs(tile.y_coord - self.end.y_coord)
-        heuristic = 10* math.sqrt(dx*dx + dy*dy) 
-
-        # Reversed breaking ties method 
-        dx1 = tile.x_coord - self.end.x_coord
-        dy1 = tile.y_coord - self.end.y_coord
-        dx2 = self.start.x_coord - self.end.x_coord
-        dy2 = self.start.y_coord - self.end.y_coord
-        cross = abs(dx1*dx2 - dx2*dy1)
-        heuristic -= cross*2.5
-        return heuristic
-
-    def get_tile(self, x, y):
-        '''When given coordinates, this function calculates which tile matches 
-        from the tile list.
+        # Indices of the tiles destroyed before this search started, and the
+        # tiles destroyed on the path found by this search.
+        self.destroyed = destroyed
+        self.smashed = set()
+
+        # Values used by the A* algorithm to calculate the costs. The
+        # direction the bot entered a tile with is kept as a direction
+        # number (see tile_grid.DIRECTIONS).
+        size = grid.size
+        self.parent = [-1] * size
+        self.parent_dir = [0] * size
+        self.g = [0] * size
+        self.f = [0] * size
+        self.smash_cost = [0] * size
+        self.closed = bytearray(size)
+
+        # The opened list is a binary heap of (f, g, tie break, counter,
+        # index) entries, see push_opened. A tile is pushed again when its
+        # score improves, outdated entries are skipped when they are popped.
+        self.opened = []
+        self.counter = 0
+
+        # Search statistics: tiles taken from the opened list and searched,
+        # entries popped (including outdated ones) and the largest size of
+        # the opened list. The counter is the number of pushes.
+        self.expanded = 0
+        self.pops = 0
+        self.peak = 0
+        self.end_x = end.x_coord
+        self.end_y = end.y_coord
+
+    def get_heuristic(self, index):
+        """Calculates the heuristic for the tiles, the euclidean
+        distance. It is never more than the cost of the rest of the path,
+        also not from a neighbouring tile, so the first path found to the
+        end is the shortest one.
+        """
+        (x, y) = self.get_coords(index)
+        dx = abs(x - self.end_x)
+        dy = abs(y - self.end_y)
+        return 10* math.sqrt(dx*dx + dy*dy)
+
+    def get_tie_break(self, index):
+        """Returns the value of the reversed breaking ties method for a
+        tile: the cross product of the vectors from the end to the tile and
+        from the end to the start. Of the tiles with the same f score the
+        one closest to the line between the start and the end is searched
+        first.
+        """
+        (x, y) = self.get_coords(index)
+        dx1 = x - self.end_x
+        dy1 = y - self.end_y
+        dx2 = self.start.x_coord - self.end_x
+        dy2 = self.start.y_coord - self.end_y
+        return abs(dx1*dy2 - dx2*dy1)
+
+    def get_distance(self, index, other):
+        '''Returns the cost of walking from one tile to another over an open
+        floor: ten times the manhattan distance. It is never more than the
+        cost of a real path, since every move costs at least 10.
         '''
-        return self.tiles[y * self.grid_width + x]
-
-
-    def get_adjacent_tiles(self, tile):
-        '''Given a tile, return all adjacent tiles.'''
-        tiles = []
-        if tile.x_coord < self.grid_width-1:
-            tiles.append(self.get_tile(tile.x_coord+1, tile.y_coord))
-        if tile.y_coord > 0:
-            tiles.append(self.get_tile(tile.x_coord, tile.y_coord-1))
-        if tile.x_coord > 0:
-            tiles.append(self.get_tile(tile.x_coord-1, tile.y_coord))
-        if tile.y_coord < self.grid_height-1:
-            tiles.append(self.get_tile(tile.x_coord, tile.y_coord+1))
-        return tiles
-
-    def get_path(self):
+        (x, y) = self.get_coords(index)
+        (other_x, other_y) = self.get_coords(other)
+        return 10 * (abs(x - other_x) + abs(y - other_y))
+
+    def get_index(self, tile):
+        '''Returns the index of a tile in the grid.'''
+        return self.grid.get_index(tile.x_coord, tile.y_coord)
+
+    def get_coords(self, index):
+        '''Returns the (x, y) coordinates of a tile index.'''
+        return (index % self.grid_width, index // self.grid_width)
+
+    def get_path(self, start, end):
         '''Starting from the end tile, find parents till the start tile is
         reached. Returns the best path.
         '''
-        path_list = []
-        tile = self.end
-        path_length = 0
-        path_list.append(tile)
-        while tile.parent is not None:
-
-            # Add copies of a move when a destroyable object is found
-            if tile.has_object() and tile.obj.destroyable:
-                if tile.obj.destroyed:
-                    cost = tile.obj.destroy_cost
-                    if tile.parent.obj is not None:
-                        if tile.parent.get_object_name() == "Ruby":
-                            tile.parent.obj.destroy_cost = 0
-                    if cost != 0:
-                        dr = self.get_direction(tile.parent.x_coord, \
-                            tile.parent.y_coord, tile.x_coord, tile.y_coord)
-                        self.rotations.append(dr)
-                        for i in range(cost):
-                            path_list.append(tile.parent)
-                        path_length += cost
-               
-            tile = tile.parent
-            path_list.append(tile)
-
-        # Delete the first element in the list if it's a ruby, since the bot 
-        # doesn't have to end on the ruby itself
-        if path_list[0].get_object_name() == "Ruby":
-            del path_list[0]
+        path = []
+        index = end
+        path.append(index)
+        while self.parent[index] != -1:
+            parent = self.parent[index]
+
+            # Add copies of a move when a destroyable object is smashed
+            cost = self.smash_cost[index]
+            if cost != 0:
+                self.smashed.add(index)
+                self.rotations.append( \
+                    tile_grid.DIRECTIONS[self.parent_dir[index]])
+                path.extend([parent] * cost)
+
+            index = parent
+            path.append(index)
+
+        # Delete the first element in the list if it's a smashed ruby, since
+        # the bot doesn't have to end on the ruby itself. The bot ends facing
+        # the ruby.
+        if self.smash_cost[end] != 0 and \
+            self.grid.codes[end] == tile_grid.RUBY:
+            del path[0]
 
         # Find end direction
-        if path_list != [] and path_list[0].parent is not None:
-            self.direction = self.get_direction(path_list[0].parent.x_coord, \
-                path_list[0].parent.y_coord, path_list[0].x_coord, \
-                path_list[0].y_coord)
+        if self.parent[end] != -1:
+            self.direction = tile_grid.DIRECTIONS[self.parent_dir[end]]
 
-        self.path_length = str(len(path_list)-1)
+        self.path_length = str(len(path)-1)
 
+        path_list = [self.grid.tile(i) for i in path]
         return path_list, self.direction, self.rotations
 
-    def set_parent_tile(self, adj, tile, increment):
-        '''Given a tile and its adjacent tile, adjust the f score and 
-        add the current tile as parent to the adjacent tile 
+    def set_parent_tile(self, adj, index, increment, destroy_cost, \
+        direction):
+        '''Given a tile and its adjacent tile, adjust the f score and
+        add the current tile as parent to the adjacent tile
         '''
-        adj.g = tile.g + increment
-        adj.h = self.get_heuristic(adj)
-        adj.parent = tile
-        adj.f = adj.h + adj.g
+        self.g[adj] = self.g[index] + increment
+        self.f[adj] = self.g[adj] + self.get_heuristic(adj)
+        self.parent[adj] = index
+        self.parent_dir[adj] = direction
+        self.smash_cost[adj] = destroy_cost
 
     def process(self):
-        '''This is the main function of A* and is called to calculate and 
-        return the best path.
+        '''This is the main function of A* and is called to calculate and
+        return the best path. Returns None when the end can't be reached.
         '''
-        self.opened.append((self.start.f, self.start))
+        start = self.get_index(self.start)
+        end = self.get_index(self.end)
+        start_dir = tile_grid.DIRECTIONS.index(self.direction)
+        self.f[start] = self.get_heuristic(start)
+        self.push_opened(start)
         while len(self.opened):
+            index = self.pop_opened()
+            self.pops += 1
+            if self.closed[index]:
+                continue
+
+            self.closed[index] = 1
+            self.expanded += 1
+            if index == end:
+                return self.get_path(start, end)
 
-            # Opened list functions as a queue.
-            self.opened = sorted(self.opened, key=lambda tup: tup[0])
-            (f, tile) = self.opened[0]
-            del self.opened[0]
-
-            self.closed.add(tile)
-            if tile is self.end:
-                return self.get_path()
-                
-            adj_tiles = self.get_adjacent_tiles(tile)
-
-            # Go through every adjacent tile and calculate the score
-            for adj_tile in adj_tiles:
-                obj = adj_tile.obj
-                if adj_tile.is_walkable() and adj_tile not in self.closed:
-                    self.check_in_opened(tile, adj_tile, 10, 0, False)            
-
-                # Destroyable object found
-                elif adj_tile.has_object() and not adj_tile.is_walkable() and \
-                    obj.destroyable and adj_tile not in self.closed and \
-                    self.has_hammer:
-
-                    parent = tile.parent
-                    # Find the direction of the bomberbot in relation to the
-                    # next tile
-                    if parent is not None:
-                        bot_dir = self.get_direction(parent.x_coord, \
-                            parent.y_coord, tile.x_coord, tile.y_coord)
-                    else:
-                        bot_dir = self.direction
-
-                    next_dir = self.get_direction(tile.x_coord, tile.y_coord, \
-                        adj_tile.x_coord, adj_tile.y_coord)
-
-                    # Check if direction is the same, and apply correct cost
-                    if bot_dir == next_dir:
-                        self.check_in_opened(tile, adj_tile, 20, 1, True)
-                    else:
-                        self.check_in_opened(tile, adj_tile, 30, 2, True)
-            
-    def check_in_opened(self, tile, adj_tile, g_cost, destroy_cost, destroy):
-        '''Check if tile is in opened list. Set parent tile and destroy brick
-        or ruby if apllicable.
+            # Find the direction of the bomberbot
+            if self.parent[index] != -1:
+                bot_dir = self.parent_dir[index]
+            else:
+                bot_dir = start_dir
+            self.expand(index, bot_dir)
+        return None
+
+    def expand(self, index, bot_dir):
+        '''Goes through every adjacent tile of a tile and calculates the
+        score, with the bot facing bot_dir on the tile.
         '''
-        if (adj_tile.f, adj_tile) in self.opened:
-            if adj_tile.g > tile.g + g_cost:
-                self.set_parent_tile(adj_tile, tile, g_cost)
-        else:
-            self.set_parent_tile(adj_tile, tile, g_cost)
-            self.opened.append((adj_tile.f, adj_tile))
-            if destroy:
-                adj_tile.obj.destroy()
-                adj_tile.obj.destroy_cost = destroy_cost
-
-    def get_direction(self, x_prev, y_prev, x_curr, y_curr):
-        ''' Given the coordinates of two tiles, return the relative 
-        direction.
+        grid = self.grid
+        for edge in range(grid.offsets[index], grid.offsets[index+1]):
+            adj = grid.neighbors[edge]
+            if self.closed[adj]:
+                continue
+            next_dir = grid.edge_dirs[edge]
+            if grid.edge_costs[edge] == tile_grid.WALK_COST or \
+                adj in self.destroyed:
+                self.check_in_opened(index, adj, 10, 0, next_dir)
+
+            # Destroyable object found, check if direction is the same,
+            # and apply correct cost
+            elif self.has_hammer:
+                if bot_dir == next_dir:
+                    self.check_in_opened(index, adj, 20, 1, next_dir)
+                else:
+                    self.check_in_opened(index, adj, 30, 2, next_dir)
+
+    def faces_object(self, index, direction):
+        '''Checks if the bot on a tile faces an object that hasn't been
+        destroyed.
+        '''
+        (dx, dy) = tile_grid.DELTAS[direction]
+        (x, y) = self.get_coords(index)
+        if not (0 <= x + dx < self.grid_width and \
+            0 <= y + dy < self.grid_height):
+            return False
+        adj = index + dy * self.grid_width + dx
+        return self.grid.codes[adj] in tile_grid.DESTROYABLE and \
+            adj not in self.destroyed
+
+    def check_in_opened(self, index, adj, g_cost, destroy_cost, direction):
+        '''Check if tile is in opened list with a lower score. If not, set
+        the parent tile and (re)add the tile to the opened list. When a tile
+        that hasn't been searched is reached again with the same score, the
+        direction that faces an object wins, so the object can be smashed
+        without a turn.
+        '''
+        if self.parent[adj] != -1 and not self.closed[adj] and \
+            self.g[adj] == self.g[index] + g_cost and \
+            self.faces_object(adj, direction) and \
+            not self.faces_object(adj, self.parent_dir[adj]):
+            self.set_parent_tile(adj, index, g_cost, destroy_cost, direction)
+            return
+        if self.parent[adj] != -1 and self.g[adj] <= self.g[index] + g_cost:
+            return
+        self.set_parent_tile(adj, index, g_cost, destroy_cost, direction)
+        self.push_opened(adj)
+
+    def push_opened(self, index):
+        '''Add a tile with its current f score to the opened list. Of the
+        tiles with the same f score the one with the lowest g score is
+        searched first: the tiles a tile can be reached from with the same
+        score have a lower g score and no higher f score, so they are all
+        searched before it and check_in_opened sees every direction the
+        tile can be entered with. After that the tie break and the order of
+        insertion count.
+        '''
+        heapq.heappush(self.opened, (self.f[index], self.g[index], \
+            self.get_tie_break(index), self.counter, index))
+        self.counter += 1
+        if len(self.opened) > self.peak:
+            self.peak = len(self.opened)
+
+    def pop_opened(self):
+        '''Remove and return the tile with the lowest f score from the
+        opened list.
         '''
-        direction = ""
-        if x_curr > x_prev:
-            direction = "right"
-        if x_curr < x_prev:
-            direction = "left"
-        if y_curr > y_prev:
-            direction = "down"
-        if y_curr < y_prev:
-            direction = "up"
-
-        return direction
\ No newline at end of file
+        return heapq.heappop(self.opened)[-1]
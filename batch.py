@@ -0,0 +1,141 @@
+'''
+    File: batch.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file solves every level of a level directory. Every file named
+    missionX-levelY.json is solved by a pool of worker processes, and one
+    JSON record per level is written (JSON lines) as soon as it is solved.
+    A level that fails gets a record with the error, the other levels are
+    still solved.
+
+    Run it by typing batch.py [directory] in the console, see batch.py -h
+    for the options.
+'''
+
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+import traceback
+import main
+import parse_json
+
+def solve_level(filename, solver, budget=None):
+    '''Solves one level file and returns its record.'''
+    return solve_record(parse_json.load_level(filename), solver, budget)
+
+def solve_record(level, solver, budget=None):
+    '''Solves a loaded level and returns its record. The budget is the
+    number of seconds the anytime solver may search.
+    '''
+    start_time = time.time()
+    has_hammer = level.hammer
+    start_location = level.pos_player
+    direction = level.dir_player
+    best_solution = level.best_solution
+
+    grid = parse_json.get_grid(level)
+    goal_list = main.create_goal_list(grid)
+    start_tile = main.get_tile(grid, start_location[0], start_location[1])
+
+    # The parallel solver can't start processes from a worker process
+    options = {}
+    if solver == "parallel":
+        options["workers"] = 1
+    elif solver == "anytime":
+        options["budget"] = budget
+    b = main.SOLVERS[solver](grid, goal_list, best_solution, start_tile, \
+        has_hammer, direction, **options)
+    best_path, rotations, permutation = b.solve()
+    solve_time = time.time() - start_time
+    commands = b.get_commands(best_path, rotations)
+
+    record = {
+        "path": [[tile.x_coord, tile.y_coord] for tile in best_path],
+        "commands": commands,
+        "rotations": list(rotations),
+        "permutation": list(permutation),
+        "length": len(best_path),
+        "best": best_solution,
+        "seconds": round(solve_time, 6),
+        "nodes": b.nodes,
+        "legs": b.cache.misses,
+        "cache_hits": b.cache.hits,
+    }
+
+    # Only the anytime solver knows if its path is the shortest
+    if solver == "anytime":
+        record["proven"] = b.proven
+    return record
+
+def solve_task(task):
+    '''Solves a level in a worker process. Errors are returned in the record
+    instead of being raised, so one bad level doesn't stop the batch.
+    '''
+    (mission, level, filename, solver) = task
+    record = {"file": filename, "mission": mission, "level": level, \
+        "solver": solver}
+    try:
+        record.update(solve_level(filename, solver))
+    except Exception:
+        record["error"] = traceback.format_exc().strip().split("\n")[-1]
+    return record
+
+def get_arguments(argv):
+    '''Parses the command line arguments.'''
+    parser = argparse.ArgumentParser(description="Solves every level of " + \
+        "a directory and writes one JSON record per level.")
+    parser.add_argument("directory", nargs="?", default="Json", \
+        help="directory with the missionX-levelY.json files")
+    parser.add_argument("--solver", choices=sorted(main.SOLVERS), \
+        default="branch_bound", help="goal ordering solver to use")
+    parser.add_argument("--workers", type=int, default=None, \
+        help="number of worker processes (default: number of cpus)")
+    parser.add_argument("--output", default=None, \
+        help="file to write the records to (default: standard output)")
+    return parser.parse_args(argv)
+
+def run(directory, solver, workers, output):
+    '''Solves the levels of a directory and writes the records to an
+    opened file. Returns the number of levels that failed.
+    '''
+    tasks = [(mission, level, filename, solver) for (mission, level, \
+        filename) in parse_json.find_levels(directory)]
+    failed = 0
+    if workers == 1:
+        records = map(solve_task, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers)
+        records = pool.imap(solve_task, tasks, chunksize=1)
+    try:
+        for record in records:
+            if "error" in record:
+                failed += 1
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return failed
+
+def main_batch():
+    args = get_arguments(sys.argv[1:])
+    if args.output is None:
+        failed = run(args.directory, args.solver, args.workers, sys.stdout)
+    else:
+        with open(args.output, "w") as output:
+            failed = run(args.directory, args.solver, args.workers, output)
+    if failed:
+        sys.stderr.write("%d level(s) failed\n" % failed)
+
+
+if __name__ == "__main__":
+    main_batch()
@@ -0,0 +1,195 @@
+'''
+    File: benchmark.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file measures the solvers. Every level of a level directory and a
+    number of generated larger levels are solved, and per level the time,
+    the tiles expanded by A*, the search nodes, the permutations tried, the
+    peak memory and the path length are recorded.
+
+    The results can be saved as a baseline. When they are compared with a
+    baseline, a level fails when its time or A* expansions grew by more
+    than the threshold, or when its path length no longer matches the best
+    solution, and the benchmark exits with an error.
+
+    Run it by typing benchmark.py [directory] in the console, see
+    benchmark.py -h for the options.
+'''
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+import generator
+import main
+import parse_json
+
+# Times below this are not compared, they are mostly noise
+MIN_SECONDS = 0.05
+
+def get_synthetic_levels(count):
+    '''Returns (name, level) for the first levels of the generated series
+    (see generator.SCALES). The levels are the same every run.
+    '''
+    levels = []
+    for number in range(min(count, len(generator.SCALES))):
+        (width, height, goals) = generator.SCALES[number]
+        data = generator.generate_level(number, width, height, goals)
+        levels.append(("synthetic-%dx%d-%d" % (width, height, goals), \
+            generator.get_level(data)))
+    return levels
+
+def get_levels(directory, synthetic):
+    '''Returns (name, level) for every level of a directory and the
+    generated levels.
+    '''
+    levels = []
+    for (mission, level, filename) in parse_json.find_levels(directory):
+        levels.append(("mission%d-level%d" % (mission, level), \
+            parse_json.load_level(filename)))
+    return levels + get_synthetic_levels(synthetic)
+
+def solve(level, solver, search="astar"):
+    '''Solves a level once with a search for the legs and returns the
+    solver and the path length.
+    '''
+    grid = parse_json.get_grid(level)
+    goal_list = main.create_goal_list(grid)
+    start_tile = main.get_tile(grid, level.pos_player[0], \
+        level.pos_player[1])
+    options = {}
+    if solver == "parallel":
+        options["workers"] = 1
+    b = main.SOLVERS[solver](grid, goal_list, level.best_solution, \
+        start_tile, level.hammer, level.dir_player, **options)
+    b.leg_search = main.SEARCHES[search]
+    best_path, rotations, permutation = b.solve()
+    return b, len(best_path)
+
+def measure(level, solver, repeat, search="astar"):
+    '''Returns the measurements of a level. The time is the fastest of a
+    number of runs, the peak memory is measured in an extra run since
+    tracing the memory slows the solver down.
+    '''
+    seconds = None
+    for i in range(repeat):
+        start_time = time.perf_counter()
+        (b, length) = solve(level, solver, search)
+        run_time = time.perf_counter() - start_time
+        if seconds is None or run_time < seconds:
+            seconds = run_time
+
+    tracemalloc.start()
+    try:
+        solve(level, solver, search)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds": round(seconds, 6),
+        "expanded": b.expanded,
+        "nodes": b.nodes,
+        "permutations": b.permutations,
+        "peak_kb": peak // 1024,
+        "length": length,
+        "best": level.best_solution,
+    }
+
+def compare(results, baseline, threshold):
+    '''Compares the results with a baseline. Returns the messages of the
+    levels that got worse.
+    '''
+    failures = []
+    for (name, result) in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if result["seconds"] > max(old["seconds"], MIN_SECONDS) * \
+            (1 + threshold):
+            failures.append("%s: %.3f seconds, was %.3f" % (name, \
+                result["seconds"], old["seconds"]))
+        if result["expanded"] > old["expanded"] * (1 + threshold):
+            failures.append("%s: %d expanded tiles, was %d" % (name, \
+                result["expanded"], old["expanded"]))
+
+        # A level that reached the best solution has to keep reaching it,
+        # a generated level has to keep its length
+        if old["best"] and old["length"] == old["best"] and \
+            result["length"] != result["best"]:
+            failures.append("%s: path of %d moves, best is %d" % (name, \
+                result["length"], result["best"]))
+        elif not old["best"] and result["length"] != old["length"]:
+            failures.append("%s: path of %d moves, was %d" % (name, \
+                result["length"], old["length"]))
+    return failures
+
+def get_arguments(argv):
+    '''Parses the command line arguments.'''
+    parser = argparse.ArgumentParser(description="Measures a solver on " + \
+        "every level of a directory and on generated levels.")
+    parser.add_argument("directory", nargs="?", default="Json", \
+        help="directory with the missionX-levelY.json files")
+    parser.add_argument("--solver", choices=sorted(main.SOLVERS), \
+        default="branch_bound", help="goal ordering solver to use")
+    parser.add_argument("--search", choices=sorted(main.SEARCHES), \
+        default="astar", help="search used for the legs between goals")
+    parser.add_argument("--synthetic", type=int, default=3, \
+        help="number of levels of the generated series (5x5 up to " + \
+        "100x100)")
+    parser.add_argument("--repeat", type=int, default=3, \
+        help="number of timed runs per level, the fastest counts")
+    parser.add_argument("--save", default=None, \
+        help="file to save the results to as a baseline")
+    parser.add_argument("--baseline", default=None, \
+        help="baseline file to compare the results with")
+    parser.add_argument("--threshold", type=float, default=0.25, \
+        help="allowed growth of the time and expansions (0.25 is 25%%)")
+    return parser.parse_args(argv)
+
+def main_benchmark():
+    args = get_arguments(sys.argv[1:])
+    results = {}
+    print("%-24s %9s %9s %8s %8s %8s %7s" % ("level", "seconds", \
+        "expanded", "nodes", "perms", "peak kb", "length"))
+    for (name, level) in get_levels(args.directory, args.synthetic):
+        result = measure(level, args.solver, args.repeat, args.search)
+        results[name] = result
+        print("%-24s %9.4f %9d %8d %8d %8d %3d/%-3d" % (name, \
+            result["seconds"], result["expanded"], result["nodes"], \
+            result["permutations"], result["peak_kb"], result["length"], \
+            result["best"]))
+        sys.stdout.flush()
+
+    if args.save is not None:
+        with open(args.save, "w") as output:
+            json.dump({"solver": args.solver, "search": args.search, \
+                "levels": results}, output, indent=1, sort_keys=True)
+
+    if args.baseline is not None:
+        with open(args.baseline) as data_file:
+            baseline = json.load(data_file)
+        if baseline["solver"] != args.solver:
+            sys.stderr.write("baseline is of the %s solver\n" % \
+                baseline["solver"])
+            sys.exit(2)
+        if baseline.get("search", "astar") != args.search:
+            sys.stderr.write("baseline is of the %s search\n" % \
+                baseline.get("search", "astar"))
+            sys.exit(2)
+        failures = compare(results, baseline["levels"], args.threshold)
+        for failure in failures:
+            sys.stderr.write("REGRESSION " + failure + "\n")
+        if failures:
+            sys.exit(1)
+        print("No regressions against", args.baseline)
+
+
+if __name__ == "__main__":
+    main_benchmark()
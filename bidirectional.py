@@ -0,0 +1,149 @@
+'''
+    File: bidirectional.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file contains bidirectional A*. One search goes from the start to
+    the end and one from the end back to the start, and the path is found
+    where they meet. Each search only has to cover about half of the
+    distance, so on an open floor far fewer tiles are expanded than by one
+    search over the whole distance.
+
+    The search from the end can't know the direction the bot has when it
+    reaches a tile, so it only works when every move costs the same. When
+    the bot has a hammer and the level has a brick or ruby that hasn't been
+    destroyed, the cost of a smash depends on the direction and the normal
+    A* search is done instead.
+
+    BidirectionalAStar.process returns the same path, end direction and
+    rotations as AStar.process. Both opened lists are binary heaps.
+'''
+
+import heapq
+import astar
+import tile_grid
+
+class BidirectionalAStar(astar.AStar):
+    def is_uniform(self):
+        '''Checks if every move of the search costs the same, so no object
+        can be smashed.
+        '''
+        if not self.has_hammer:
+            return True
+        for index in self.grid.destroyables:
+            if index not in self.destroyed:
+                return False
+        return True
+
+    def get_top(self, opened, closed):
+        '''Removes the outdated entries from the top of an opened list and
+        returns the lowest f score, or None when the list is empty.
+        '''
+        while opened and closed[opened[0][2]]:
+            heapq.heappop(opened)
+            self.pops += 1
+        if not opened:
+            return None
+        return opened[0][0]
+
+    def process(self):
+        '''Searches from both ends till the best path is found. Returns the
+        path, the end direction and the rotations like AStar.process, or
+        None when the end can't be reached.
+        '''
+        start = self.get_index(self.start)
+        end = self.get_index(self.end)
+
+        # The search from the end starts on the end tile, so it has to be
+        # walked on. An object at the end is left to A*, which can't reach
+        # it without a hammer.
+        if start == end or not self.is_uniform() or \
+            not (self.grid.is_walkable(end) or end in self.destroyed):
+            return astar.AStar.process(self)
+
+        grid = self.grid
+        size = grid.size
+
+        # The search from the end keeps for every tile the tile after it on
+        # the way to the end and the direction towards that tile
+        g_back = [0] * size
+        child = [-1] * size
+        child_dir = [0] * size
+        closed_back = bytearray(size)
+        opened = [(self.get_distance(start, end), 0, start)]
+        opened_back = [(self.get_distance(end, start), 1, end)]
+        self.counter = 2
+
+        # Cost of the best path found so far and the tile it meets on
+        best = None
+        meet = -1
+        while True:
+            top = self.get_top(opened, self.closed)
+            top_back = self.get_top(opened_back, closed_back)
+            if top is None or top_back is None:
+                break
+
+            # No path through the tiles that are left is shorter
+            if best is not None and max(top, top_back) >= best:
+                break
+            self.peak = max(self.peak, len(opened) + len(opened_back))
+
+            # Expand the search with the fewest opened tiles
+            forward = len(opened) <= len(opened_back)
+            if forward:
+                (f, count, index) = heapq.heappop(opened)
+                self.closed[index] = 1
+            else:
+                (f, count, index) = heapq.heappop(opened_back)
+                closed_back[index] = 1
+            self.pops += 1
+            self.expanded += 1
+
+            for edge in range(grid.offsets[index], grid.offsets[index+1]):
+                adj = grid.neighbors[edge]
+                if grid.edge_costs[edge] != tile_grid.WALK_COST and \
+                    adj not in self.destroyed:
+                    continue
+                if forward:
+                    cost = self.g[index] + 10
+                    if self.closed[adj] or ((self.parent[adj] != -1 or \
+                        adj == start) and self.g[adj] <= cost):
+                        continue
+                    self.g[adj] = cost
+                    self.parent[adj] = index
+                    self.parent_dir[adj] = grid.edge_dirs[edge]
+                    heapq.heappush(opened, (cost + \
+                        self.get_distance(adj, end), self.counter, adj))
+                    reached = child[adj] != -1 or adj == end
+                    total = cost + g_back[adj]
+                else:
+                    cost = g_back[index] + 10
+                    if closed_back[adj] or ((child[adj] != -1 or \
+                        adj == end) and g_back[adj] <= cost):
+                        continue
+                    g_back[adj] = cost
+                    child[adj] = index
+                    child_dir[adj] = (grid.edge_dirs[edge] + 2) % 4
+                    heapq.heappush(opened_back, (cost + \
+                        self.get_distance(adj, start), self.counter, adj))
+                    reached = self.parent[adj] != -1 or adj == start
+                    total = cost + self.g[adj]
+                self.counter += 1
+                if reached and (best is None or total < best):
+                    best = total
+                    meet = adj
+
+        if meet == -1:
+            return None
+
+        # Join the path from the end to the meeting tile
+        index = meet
+        while index != end:
+            self.parent[child[index]] = index
+            self.parent_dir[child[index]] = child_dir[index]
+            index = child[index]
+        return self.get_path(start, end)
@@ -0,0 +1,214 @@
+'''
+    File: branch_bound.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file contains a depth-first branch and bound solver for the goal
+    order. Every node of the search tree is a prefix of a permutation, so
+    the legs of a shared prefix are calculated only once. A prefix is cut
+    off when its length plus a lower bound for the remaining goals can't
+    beat the best path found so far.
+
+    The lower bound is the distance to the nearest remaining goal plus the
+    minimum spanning tree over the remaining goals. Distances are counted
+    in moves on the grid without turns, with destroyable objects counted
+    as a single move. A ruby is collected from a neighbouring tile, so an
+    edge to or from a ruby is one move shorter.
+
+'''
+
+import math
+from collections import deque
+import brute_force
+
+# The distances are calculated per goal when NumPy isn't installed
+try:
+    import distance_fields
+except ImportError:
+    distance_fields = None
+
+INFINITY = float("inf")
+
+class BranchBound(brute_force.Brute_force):
+    def __init__(self, grid, goal_list, best_solution, start, has_hammer, \
+        direction, cache=None, destroyed=frozenset()):
+        brute_force.Brute_force.__init__(self, grid, goal_list, \
+            best_solution, start, has_hammer, direction, cache, destroyed)
+        self.goals = [self.get_index(goal[0]) for goal in goal_list]
+        self.rubies = [goal[0].get_object_name() == "Ruby" \
+            for goal in goal_list]
+        self.distances = self.get_all_distances()
+        self.spanning_trees = {}
+
+        # Search statistics
+        self.nodes = 0
+        self.pruned = 0
+
+    def get_all_distances(self):
+        '''Returns the distances from every goal to every tile. With NumPy
+        they are calculated for all goals at once, otherwise with a breadth
+        first search per goal.
+        '''
+        if distance_fields is None:
+            return [self.get_distances(goal) for goal in self.goals]
+        return distance_fields.get_distance_fields(self.grid, self.goals, \
+            self.has_hammer, self.destroyed, smash_moves=1).tolist()
+
+    def get_distances(self, goal):
+        '''Breadth first search from a goal over every tile that can be
+        walked on or smashed. Returns the distance to every tile, INFINITY
+        for tiles that can't be reached.
+        '''
+        grid = self.grid
+        distances = [INFINITY] * grid.size
+        distances[goal] = 0
+        queue = deque([goal])
+        while queue:
+            index = queue.popleft()
+            for edge in range(grid.offsets[index], grid.offsets[index+1]):
+                adj = grid.neighbors[edge]
+                if distances[adj] != INFINITY:
+                    continue
+                if grid.is_destroyable(adj) and not self.has_hammer and \
+                    adj not in self.destroyed:
+                    continue
+                distances[adj] = distances[index] + 1
+                queue.append(adj)
+        return distances
+
+    def get_weight(self, i, j):
+        '''Returns the lower bound on the moves between two goals.'''
+        distance = self.distances[i][self.goals[j]]
+        return max(0, distance - self.rubies[i] - self.rubies[j])
+
+    def get_spanning_tree(self, remaining):
+        '''Returns the weight of the minimum spanning tree over a set of
+        goals (given as a bit mask), calculated with Prim's algorithm.
+        '''
+        if remaining in self.spanning_trees:
+            return self.spanning_trees[remaining]
+        goals = [i for i in range(len(self.goals)) if remaining & (1 << i)]
+        weight = 0
+        if goals:
+            costs = dict((j, self.get_weight(goals[0], j)) for j in goals[1:])
+            while costs:
+                j = min(costs, key=lambda k: (costs[k], k))
+                weight += costs.pop(j)
+                for k in costs:
+                    costs[k] = min(costs[k], self.get_weight(j, k))
+        self.spanning_trees[remaining] = weight
+        return weight
+
+    def get_lower_bound(self, index, remaining):
+        '''Returns a lower bound on the moves needed to collect the remaining
+        goals starting from a tile.
+        '''
+        if not remaining:
+            return 0
+        nearest = INFINITY
+        for i in range(len(self.goals)):
+            if remaining & (1 << i):
+                distance = self.distances[i][index]
+                if distance < nearest:
+                    nearest = distance
+        return nearest + self.get_spanning_tree(remaining)
+
+    def search(self, current_step, direction, destroyed, visited, remaining, \
+        order, path_list, rotations):
+        '''Depth first search over the remaining goals. Returns True when a
+        path with the length of the best solution has been found.
+        '''
+        self.nodes += 1
+
+        # Goals collected on the way to an earlier goal are done
+        for i in range(len(self.goals)):
+            if remaining & (1 << i) and (self.goals[i] in visited or \
+                self.goals[i] in destroyed):
+                remaining &= ~(1 << i)
+                order = order + [i]
+
+        if not remaining:
+            if len(path_list) < self.best_length:
+                self.best_length = len(path_list)
+                self.best_path = path_list
+                self.best_rotations = rotations
+                self.best_perm = tuple(order)
+            return self.is_done()
+
+        # Order the children by their optimistic cost
+        index = self.get_index(current_step)
+        children = []
+        for i in range(len(self.goals)):
+            if remaining & (1 << i):
+                distance = self.distances[i][index]
+                if distance == INFINITY:
+                    return False
+                rest = remaining & ~(1 << i)
+                bound = distance
+                if rest:
+                    bound += self.get_lower_bound(self.goals[i], rest) - \
+                        self.rubies[i]
+                children.append((len(path_list) + bound, i))
+        children.sort()
+
+        for (bound, i) in children:
+            if bound >= self.best_length:
+                self.pruned += 1
+                continue
+            leg = self.solve_leg(current_step, direction, \
+                self.goal_list[i][0], destroyed)
+            if leg is None:
+                continue
+            steps, new_direction, rot, smashed = leg
+            new_path = path_list + steps
+            rest = remaining & ~(1 << i)
+            end = self.get_index(new_path[-1]) if new_path else index
+            if len(new_path) + self.get_lower_bound(end, rest) >= \
+                self.best_length:
+                self.pruned += 1
+                continue
+            new_visited = visited | set(self.get_index(t) for t in steps)
+            new_step = new_path[-1] if new_path else current_step
+            if self.search(new_step, new_direction, destroyed | smashed, \
+                new_visited, rest, order + [i], new_path, rotations + rot):
+                return True
+        return False
+
+    def is_done(self):
+        '''Checks if the search can stop, which is when the best path has
+        the length of the best solution of the level.
+        '''
+        return self.best_length == self.best_solution
+
+    def get_stats(self):
+        '''Returns the statistics of the solver, with the pruned nodes.'''
+        stats = brute_force.Brute_force.get_stats(self)
+        stats["pruned"] = self.pruned
+        return stats
+
+    def permutation_count(self):
+        '''Returns the number of permutations the brute force solver would
+        go through.
+        '''
+        return math.factorial(len(self.goal_list))
+
+    def solve(self):
+        '''Searches the goal orders with branch and bound and returns the
+        path, the rotations and the goal order, like Brute_force.solve.
+        Stops as soon as a path with the length of the best solution is
+        found.
+        '''
+        self.best_length = INFINITY
+        self.best_path = []
+        self.best_rotations = []
+        self.best_perm = ()
+        self.nodes = 0
+        self.pruned = 0
+        remaining = (1 << len(self.goals)) - 1
+        self.search(self.start, self.direction, self.destroyed, \
+            set([self.get_index(self.start)]), remaining, [], [], [])
+        return self.best_path, list(self.best_rotations), self.best_perm
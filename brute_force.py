@@ -14,48 +14,115 @@
 
 import astar
 import copy
+import leg_cache
+import parse_output
 from itertools import permutations
 
 class Brute_force:
-    def __init__(self, grid_height, grid_width, tiles, goal_list, best_solution, \
-        start, has_hammer, direction):
+    def __init__(self, grid, goal_list, best_solution, start, has_hammer, \
+        direction, cache=None, destroyed=frozenset()):
         self.goal_list = goal_list
         self.best_solution = best_solution
         self.start = start
-        self.grid_height = grid_height
-        self.grid_width = grid_width
-        self.tile_list = tiles
+        self.grid = grid
         self.has_hammer = has_hammer
         self.direction = direction
+
+        # Indices of the objects destroyed before the solver starts, for
+        # instance by the moves a user already made
+        self.destroyed = destroyed
+
+        # Legs are cached for this level unless a cache is given
+        if cache is None:
+            cache = leg_cache.LegCache()
+        self.cache = cache
+
+        # Search used for the legs, a class with the arguments and process
+        # method of astar.AStar
+        self.leg_search = astar.AStar
+
+        # Number of search nodes (legs of a permutation) the solver visited,
+        # tiles expanded by the A* searches of its legs and permutations
+        # tried by solve
+        self.nodes = 0
+        self.expanded = 0
+        self.permutations = 0
+
+        # Statistics of the A* searches, and the number of times a
+        # permutation or the whole search was stopped before its end
+        self.legs_solved = 0
+        self.pushes = 0
+        self.pops = 0
+        self.open_peak = 0
+        self.early_exits = 0
     
-    def check_list(self, path_list):
-        '''Checks whether all goals have been completed for a permutation.'''
+    def check_list(self, path_list, destroyed):
+        '''Checks whether all goals have been completed for a permutation.
+        Rubies are completed when they have been destroyed, other goals when
+        they are on the path.
+        '''
         count = 0
         reached =[]
         for goal in self.goal_list:
             if goal[0].get_object_name()=="Ruby":
-                if goal[0].obj.destroyed:
+                if self.get_index(goal[0]) in destroyed:
                     count+=1
             else:
                 for tile in path_list:
                     if tile == goal[0] and tile not in reached:
                         count+=1
-                        reached.append(tile)        
+                        reached.append(tile)
         if count == len(self.goal_list):
             return True
         return False
 
-    def reset_parents(self, tile_list):
-        '''Clearing the tile parents.''' 
-        for tile in tile_list:
-            tile.parent=None
-        
-    def reset_rubies(self, tile_list):
-        '''Resetting the rubies.'''
-        for tile in tile_list:
-            if tile.has_object():
-                if tile.get_object_name() == "Ruby":
-                    tile.obj.destroyed = False
+    def get_index(self, tile):
+        '''Returns the index of a tile in the grid.'''
+        return self.grid.get_index(tile.x_coord, tile.y_coord)
+
+    def solve_leg(self, current_step, direction, goal_tile, destroyed):
+        '''Calculates the shortest leg from the current tile and direction
+        to a goal with A*. Returns the steps of the leg without the current
+        tile, the end direction, the rotations in order and the tiles smashed
+        on the way, or None when the goal can't be reached.
+        '''
+        key = self.cache.get_key(self.get_index(current_step), \
+            self.get_index(goal_tile), direction, destroyed)
+        leg = self.cache.get(key)
+        if leg is None:
+            leg = self.calculate_leg(current_step, direction, goal_tile, \
+                destroyed)
+            self.cache.put(key, leg)
+        if leg == leg_cache.UNREACHABLE:
+            return None
+
+        # The cached lists are copied, so callers may change them
+        steps, direction, rot, smashed = leg
+        return list(steps), direction, list(rot), smashed
+
+    def calculate_leg(self, current_step, direction, goal_tile, destroyed):
+        '''Calls the A* algorithm for a leg. Returns the leg as tuples for
+        the cache.
+        '''
+        a = self.leg_search(self.grid, current_step, goal_tile, \
+            self.has_hammer, direction, destroyed)
+        solution = a.process()
+        self.legs_solved += 1
+        self.expanded += a.expanded
+        self.pushes += a.counter
+        self.pops += a.pops
+        self.open_peak = max(self.open_peak, a.peak)
+        if solution is None:
+            return leg_cache.UNREACHABLE
+        astar_solution, direction, rot = solution
+
+        # Delete the first step and reverse the path. A* gives the rotations
+        # of a leg from the end to the start as well.
+        del astar_solution[-1]
+        astar_solution.reverse()
+        rot.reverse()
+        return (tuple(astar_solution), direction, tuple(rot), \
+            frozenset(a.smashed))
 
     def solve(self):
         '''Main process in order to solve brute force. The brute force solver 
@@ -72,41 +139,43 @@ class Brute_force:
         rotations = []
         final_rotations = []
 
-        # Going through every permutation of the goal list 
+        # Going through every permutation of the goal list. The direction and
+        # the destroyed objects are local to a permutation, the tiles are
+        # never changed.
         for perm in permutations(range(len(self.goal_list))):
+            self.permutations += 1
             current_step = self.start
-            self.reset_rubies(self.tile_list)
+            direction = self.direction
+            destroyed = self.destroyed
             path_list = []
             rotations = []
-            
 
             # Going through every element of the permutation
             for i in perm:
-                self.reset_parents(self.tile_list)
                 new_step = self.goal_list[i][0]
-                
+                self.nodes += 1
+
                 # Calling the A* algorithm
-                a = astar.AStar(self.grid_height, self.grid_width, \
-                    self.tile_list, current_step, new_step, self.has_hammer, \
-                    self.direction)
-                astar_solution, self.direction, rot = a.process()
+                leg = self.solve_leg(current_step, direction, new_step, \
+                    destroyed)
+
+                # The goal can't be reached in this permutation
+                if leg is None:
+                    self.early_exits += 1
+                    break
+                steps, direction, rot, smashed = leg
                 rotations.extend(rot)
-                # Delete the first step 
-                if len(astar_solution) > 0:
-                    del astar_solution[-1]
-
-                # Reverse the path 
-                if astar_solution is not None:
-                    path_list.extend(reversed(astar_solution))
-                else:
-                    continue
-                
+                destroyed = destroyed | smashed
+                path_list.extend(steps)
+
                 # Calculate current path length
                 path_length = len(path_list)
-                current_step = path_list[-1]                
+                if path_list:
+                    current_step = path_list[-1]
 
                 # Replace the path length if the current path length is lower.
-                if (path_length == self.best_solution and self.check_list(path_list)):
+                if (path_length == self.best_solution and \
+                    self.check_list(path_list, destroyed)):
                     best_path_length = path_length
                     best_perm = perm
                     best_path = path_list.copy()    
@@ -114,11 +183,33 @@ class Brute_force:
 
             #Terminate if best path length is shorter or equal than given best solution
             if best_path_length == self.best_solution:
+                self.early_exits += 1
                 break
 
-        final_rotations = list(reversed(final_rotations))
         return best_path, final_rotations, best_perm
 
+    def get_commands(self, path_list, rotations):
+        '''Returns the game commands of a path and its rotations found by
+        solve.
+        '''
+        return parse_output.parse(path_list, self.start, self.best_solution, \
+            list(rotations))
+
+    def get_stats(self):
+        '''Returns the statistics of the solver as a dictionary.'''
+        return {
+            "nodes": self.nodes,
+            "permutations": self.permutations,
+            "early_exits": self.early_exits,
+            "legs_solved": self.legs_solved,
+            "expanded": self.expanded,
+            "pushes": self.pushes,
+            "pops": self.pops,
+            "open_peak": self.open_peak,
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+        }
+
     
 if __name__ == "__main__":
     main()
\ No newline at end of file
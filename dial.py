@@ -0,0 +1,123 @@
+'''
+    File: dial.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file contains Dial's algorithm for the legs between goals. A move
+    costs 10 (walking), 20 (smashing the object in front of the bot) or 30
+    (turning and smashing), so the cost of a path is always a multiple of
+    10 and the costs in the opened list are never more than 30 apart.
+    Instead of a heap the opened list is a ring of four buckets, one for
+    every cost from the lowest one in the list, so taking the cheapest
+    state and adding a state are done in constant time.
+
+    A state is a tile and the direction the bot faces on it, stored as
+    index * 4 + direction. A* keeps one direction per tile (the direction
+    of its parent), here every direction of a tile is searched, so the
+    cost of a smash is always counted with the right direction and the
+    path is the cheapest one.
+
+    DialSearch.process returns the path, end direction and rotations like
+    AStar.process.
+'''
+
+from collections import deque
+import astar
+import tile_grid
+
+# Number of buckets: the highest cost of a move (turn and smash) in steps
+# of the cost of walking, plus one
+BUCKETS = (tile_grid.SMASH_COST + tile_grid.TURN_COST) // \
+    tile_grid.WALK_COST + 1
+
+# Cost of a state that hasn't been reached
+UNREACHED = -1
+
+class DialSearch(astar.AStar):
+    def set_path(self, state):
+        '''Gives the tiles of the path to a state their parent, direction
+        and smash cost, so get_path can follow them. A tile is never on the
+        cheapest path twice, since coming back to it costs more than the
+        turn it could save.
+        '''
+        while self.state_parent[state] != -1:
+            parent = self.state_parent[state]
+            index = state >> 2
+            self.parent[index] = parent >> 2
+            self.parent_dir[index] = state & 3
+            self.smash_cost[index] = self.state_smash[state]
+            state = parent
+
+    def process(self):
+        '''Searches the cheapest path over the (tile, direction) states with
+        a bucket queue. Returns the path, the end direction and the
+        rotations like AStar.process, or None when the end can't be
+        reached.
+        '''
+        grid = self.grid
+        start = self.get_index(self.start)
+        end = self.get_index(self.end)
+        start_dir = tile_grid.DIRECTIONS.index(self.direction)
+
+        # Cost in steps of 10, parent state and smash cost of every state
+        self.cost = cost = [UNREACHED] * (4 * grid.size)
+        self.state_parent = state_parent = [-1] * (4 * grid.size)
+        self.state_smash = state_smash = bytearray(4 * grid.size)
+        buckets = [deque() for i in range(BUCKETS)]
+
+        state = start * 4 + start_dir
+        cost[state] = 0
+        buckets[0].append(state)
+        self.counter = 1
+        queued = 1
+        current = 0
+        while queued:
+            bucket = buckets[current % BUCKETS]
+            while not bucket:
+                current += 1
+                bucket = buckets[current % BUCKETS]
+            state = bucket.popleft()
+            queued -= 1
+            self.pops += 1
+
+            # States are added again when their cost goes down, the
+            # outdated entries are skipped
+            if cost[state] != current:
+                continue
+            self.expanded += 1
+            index = state >> 2
+            if index == end:
+                self.set_path(state)
+                return self.get_path(start, end)
+
+            bot_dir = state & 3
+            for edge in range(grid.offsets[index], grid.offsets[index+1]):
+                adj = grid.neighbors[edge]
+                next_dir = grid.edge_dirs[edge]
+                if grid.edge_costs[edge] == tile_grid.WALK_COST or \
+                    adj in self.destroyed:
+                    steps = 1
+                elif not self.has_hammer:
+                    continue
+                elif bot_dir == next_dir:
+                    steps = 2
+                else:
+                    steps = 3
+                next_state = adj * 4 + next_dir
+                next_cost = current + steps
+                if cost[next_state] != UNREACHED and \
+                    cost[next_state] <= next_cost:
+                    continue
+                cost[next_state] = next_cost
+                state_parent[next_state] = state
+                state_smash[next_state] = steps - 1
+                buckets[next_cost % BUCKETS].append(next_state)
+                self.counter += 1
+                queued += 1
+                if queued > self.peak:
+                    self.peak = queued
+        return None
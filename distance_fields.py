@@ -0,0 +1,83 @@
+'''
+    File: distance_fields.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file calculates the distance from every goal to every tile of a
+    level at once with NumPy, instead of with one search per goal. The
+    distances of all goals are one array of (goals, height, width), and
+    a wave goes out from every goal together: in each step a tile takes
+    the lowest distance of its four neighbours plus the moves needed to
+    enter it, till no distance changes anymore.
+
+    Entering a tile that can be walked on costs one move, smashing an
+    object and walking on its tile costs two when the bot has a hammer.
+    The turn before a smash isn't counted, so the distances are a lower
+    bound for the solvers. Walls, abysses and objects without a hammer
+    can't be entered.
+
+    The result is an array with a row of distances per goal, indexed by
+    tile index like the lists of A*, with infinity for tiles that can't be
+    reached. NumPy has to be installed to use this file.
+'''
+
+import numpy
+import tile_grid
+
+# Moves counted for entering a tile
+WALK_MOVES = 1
+SMASH_MOVES = 2
+
+def get_weights(grid, has_hammer, destroyed=frozenset(), \
+    smash_moves=SMASH_MOVES):
+    '''Returns the moves needed to enter every tile as a (height, width)
+    array, infinity for tiles that can't be entered.
+    '''
+    codes = numpy.frombuffer(grid.codes, dtype=numpy.uint8).reshape( \
+        grid.height, grid.width)
+    weights = numpy.full(codes.shape, numpy.inf, dtype=numpy.float32)
+    weights[numpy.isin(codes, tile_grid.WALKABLE)] = WALK_MOVES
+    if has_hammer:
+        weights[numpy.isin(codes, tile_grid.DESTROYABLE)] = smash_moves
+
+    # Objects that have been destroyed can be walked on
+    for index in destroyed:
+        if grid.is_destroyable(index):
+            weights.flat[index] = WALK_MOVES
+    return weights
+
+def get_distance_fields(grid, goals, has_hammer, destroyed=frozenset(), \
+    smash_moves=SMASH_MOVES):
+    '''Returns the distances in moves from every goal (a list of tile
+    indices) to every tile as a (goals, tiles) array. Row i holds the
+    distances from goal i, infinity for tiles that can't be reached.
+    '''
+    weights = get_weights(grid, has_hammer, destroyed, smash_moves)
+    fields = numpy.full((len(goals), grid.height, grid.width), numpy.inf, \
+        dtype=numpy.float32)
+    for i in range(len(goals)):
+        (x, y) = grid.get_coords(goals[i])
+        fields[i, y, x] = 0
+
+    # Every step the wave of every goal moves one tile further, a tile
+    # that is smashed is reached again in a later step with its real
+    # distance
+    nearest = numpy.empty_like(fields)
+    while True:
+        nearest[:, :, 0] = numpy.inf
+        nearest[:, :, 1:] = fields[:, :, :-1]
+        numpy.minimum(nearest[:, :, :-1], fields[:, :, 1:], \
+            out=nearest[:, :, :-1])
+        numpy.minimum(nearest[:, 1:, :], fields[:, :-1, :], \
+            out=nearest[:, 1:, :])
+        numpy.minimum(nearest[:, :-1, :], fields[:, 1:, :], \
+            out=nearest[:, :-1, :])
+        nearest += weights
+        if not (nearest < fields).any():
+            break
+        numpy.minimum(fields, nearest, out=fields)
+    return fields.reshape(len(goals), grid.size)
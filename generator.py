@@ -0,0 +1,232 @@
+'''
+    File: generator.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file generates levels in the json format of the level files, in
+    order to test how the solvers scale. A level is made from a seed, so
+    the same seed and parameters always give the same level.
+
+    The tiles are walls, abysses, bricks (with a hammer) and ice with the
+    given densities, after which rubies (with a hammer) and stars are put
+    on tiles the bot can reach. A level is only returned when the
+    simulator shows that every goal can be collected: the bot has to be
+    able to walk or slide over every star and stand next to every ruby,
+    without smashing any brick. Otherwise the tiles are made again.
+
+    The solvers don't know about ice and abysses (an abyss is a wall for
+    them), so ice is off by default.
+
+    Make a level by typing generator.py [file] in the console, or the
+    series of benchmark sizes with generator.py --scales [directory], see
+    generator.py -h for the options.
+'''
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import batch
+import parse_json
+import simulator
+import tile_grid
+
+# Sizes and goal counts of the benchmark series: (width, height, goals)
+SCALES = [(5, 5, 3), (10, 10, 5), (20, 20, 8), (50, 50, 12), \
+    (100, 100, 15)]
+
+# Tile values of the level files
+EMPTY = "0"
+STAR = "04"
+RUBY = "03"
+BRICK = "01"
+WALL = "ac"
+ABYSS = "."
+ICE = "b"
+
+def make_tiles(generator, width, height, start, walls, abysses, bricks, \
+    ice):
+    '''Returns the rows of tile values without goals.'''
+    tiles = []
+    for y in range(height):
+        row = []
+        for x in range(width):
+            value = generator.random()
+            if (x, y) == start:
+                row.append(EMPTY)
+            elif value < walls:
+                row.append(WALL)
+            elif value < walls + abysses:
+                row.append(ABYSS)
+            elif value < walls + abysses + bricks:
+                row.append(BRICK)
+            elif value < walls + abysses + bricks + ice:
+                row.append(ICE)
+            else:
+                row.append(EMPTY)
+        tiles.append(row)
+    return tiles
+
+def make_data(tiles, start, direction, hammer, best):
+    '''Returns the json data of a level.'''
+    return {
+        "tiles": ";".join(",".join(row) for row in tiles),
+        "dimension": {"cols": len(tiles[0]), "rows": len(tiles)},
+        "posPlayer": {"x": start[0], "y": start[1]},
+        "dirPlayer": direction,
+        "hammer": hammer,
+        "solutions": {"best": best},
+    }
+
+def get_level(data):
+    '''Returns the Level of json data.'''
+    content = json.dumps(data, sort_keys=True).encode("utf-8")
+    return parse_json.parse_level(content, hashlib.sha1(content).hexdigest())
+
+def get_reachable(level):
+    '''Returns the tiles the bot can stand on, the goals it can collect
+    (as a mask of the simulator) and the simulator of a level, without
+    smashing bricks.
+    '''
+    level_simulator = simulator.get_simulator(level)
+    grid = level_simulator.grid
+    start = level_simulator.start
+    reached = set([start])
+    queue = [start]
+    collected = 0
+    while queue:
+        index = queue.pop()
+        for direction in range(4):
+            entry = index * 4 + direction
+            end = level_simulator.ends[entry]
+            if end == simulator.FALLS:
+                continue
+            collected |= level_simulator.goal_masks[entry]
+            front = level_simulator.fronts[entry]
+            if level.hammer and front in level_simulator.goal_bits and \
+                grid.codes[front] == tile_grid.RUBY:
+                collected |= level_simulator.goal_bits[front]
+            if end != simulator.BLOCKED and end not in reached:
+                reached.add(end)
+                queue.append(end)
+    return reached, collected, level_simulator
+
+def is_solvable(level):
+    '''Checks if every goal of a level can be collected.'''
+    (reached, collected, level_simulator) = get_reachable(level)
+    return collected == level_simulator.all_goals
+
+def generate_level(seed, width, height, goals, walls=0.15, bricks=0.0, \
+    rubies=0, abysses=0.0, ice=0.0, hammer=False, max_tries=1000):
+    '''Returns the json data of a solvable level. Rubies and bricks are
+    only used with a hammer. Raises a ValueError when no solvable level
+    was made in max_tries tries.
+    '''
+    if not hammer:
+        (bricks, rubies) = (0.0, 0)
+    generator = random.Random(seed)
+    for i in range(max_tries):
+        start = (generator.randrange(width), generator.randrange(height))
+        direction = generator.choice(tile_grid.DIRECTIONS)
+        tiles = make_tiles(generator, width, height, start, walls, \
+            abysses, bricks, ice)
+
+        # Rubies go next to tiles that can be reached, stars on them
+        (reached, collected, level_simulator) = get_reachable( \
+            get_level(make_data(tiles, start, direction, hammer, 0)))
+        grid = level_simulator.grid
+        places = sorted(index for index in reached if \
+            index != level_simulator.start and not grid.slides[index])
+        if len(places) < goals:
+            continue
+        chosen = generator.sample(places, goals)
+        for number in range(goals):
+            (x, y) = grid.get_coords(chosen[number])
+            tiles[y][x] = RUBY if number < rubies else STAR
+
+        data = make_data(tiles, start, direction, hammer, 0)
+        if is_solvable(get_level(data)):
+            return data
+    raise ValueError("no solvable level made in %d tries" % max_tries)
+
+def solve_best(data, solver):
+    '''Fills in the best solution of generated json data with the length
+    a solver finds.
+    '''
+    record = batch.solve_record(get_level(data), solver)
+    data["solutions"]["best"] = record["length"]
+    return data
+
+def write_level(data, filename):
+    '''Writes the json data of a level to a file.'''
+    with open(filename, "w") as output:
+        json.dump(data, output, indent=1)
+
+def get_arguments(argv):
+    '''Parses the command line arguments.'''
+    parser = argparse.ArgumentParser(description="Generates solvable " + \
+        "levels.")
+    parser.add_argument("output", nargs="?", default=None, \
+        help="file to write the level to, or the directory of --scales " + \
+        "(default: standard output or Generated)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--size", default="10x10", \
+        help="width and height as WIDTHxHEIGHT")
+    parser.add_argument("--goals", type=int, default=5, \
+        help="number of goals (stars and rubies)")
+    parser.add_argument("--walls", type=float, default=0.15, \
+        help="part of the tiles that are walls")
+    parser.add_argument("--bricks", type=float, default=0.0, \
+        help="part of the tiles that are bricks (needs --hammer)")
+    parser.add_argument("--rubies", type=int, default=0, \
+        help="number of the goals that are rubies (needs --hammer)")
+    parser.add_argument("--abysses", type=float, default=0.0, \
+        help="part of the tiles that are abysses")
+    parser.add_argument("--ice", type=float, default=0.0, \
+        help="part of the tiles that are ice")
+    parser.add_argument("--hammer", action="store_true", \
+        help="give the bot a hammer")
+    parser.add_argument("--solve", default=None, \
+        help="solver that fills in the best solution (default: 0)")
+    parser.add_argument("--scales", action="store_true", \
+        help="write the benchmark series from 5x5 to 100x100 as " + \
+        "mission100-levelN.json files")
+    return parser.parse_args(argv)
+
+def main():
+    args = get_arguments(sys.argv[1:])
+    options = {"walls": args.walls, "bricks": args.bricks, \
+        "rubies": args.rubies, "abysses": args.abysses, "ice": args.ice, \
+        "hammer": args.hammer}
+    if args.scales:
+        directory = args.output or "Generated"
+        os.makedirs(directory, exist_ok=True)
+        for number in range(len(SCALES)):
+            (width, height, goals) = SCALES[number]
+            data = generate_level(args.seed + number, width, height, goals, \
+                **options)
+            if args.solve is not None:
+                solve_best(data, args.solve)
+            write_level(data, os.path.join(directory, \
+                "mission100-level%d.json" % (number + 1)))
+        return
+
+    (width, height) = [int(value) for value in args.size.split("x")]
+    data = generate_level(args.seed, width, height, args.goals, **options)
+    if args.solve is not None:
+        solve_best(data, args.solve)
+    if args.output is None:
+        json.dump(data, sys.stdout, indent=1)
+        sys.stdout.write("\n")
+    else:
+        write_level(data, args.output)
+
+
+if __name__ == "__main__":
+    main()
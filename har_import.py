@@ -0,0 +1,405 @@
+'''
+    File: har_import.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file imports the levels and the attempts of students from HAR
+    captures of the game (like Json/go.bomberbot.com.har). A capture is
+    read in chunks and its entries are decoded one at a time, so only the
+    entry that is being looked at has to fit in memory.
+
+    A response with the json of a level becomes a level file in the level
+    catalog, with only the fields the solvers use. The captures only know
+    the id of a level, so a level is filed as level <id> of mission 0
+    (mission0-level1109.json), which batch.py and the other tools can read.
+
+    A score submission (a form with the level id as seed and the program
+    as codeSolution) becomes an attempt in a JSON lines file, with its
+    program translated to a move list, in the format of simulator.py.
+    Hint requests ({"mission", "level", "moveList"}) are attempts as well.
+
+    Levels and attempts are recognized by their content hash, so a level
+    or attempt that is in more captures, or was imported before, is only
+    written once. The hashes of the attempts are kept in an SQLite file
+    next to the attempts file (attempts.jsonl.keys) instead of in memory,
+    so the memory doesn't grow with the number of attempts. The file
+    remembers how much of the attempts file it has read, and reads the
+    rest when it is opened, so lines written by an import that stopped
+    halfway are known as well.
+
+    Import captures by typing har_import.py [files] in the console, see
+    har_import.py -h for the options.
+'''
+
+import argparse
+import base64
+import codecs
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import urllib.parse
+import parse_json
+import solution_store
+
+# Mission the captured levels are filed under
+MISSION = 0
+
+# Bytes read from a capture at once
+CHUNK_SIZE = 1 << 20
+
+# Fields of a level payload that are kept in the catalog
+LEVEL_FIELDS = ("_id", "name", "tiles", "dimension", "posPlayer", \
+    "dirPlayer", "hammer", "solutions")
+
+# Moves of a codeSolution program, other commands are kept as they are so
+# the simulator reports them as invalid
+MOVE_CODES = {"U": "up", "D": "down", "L": "left", "R": "right"}
+
+# Longest move list a program is expanded to and most commands followed,
+# so a function that calls itself stops
+MAX_MOVES = 1000
+MAX_COMMANDS = 100000
+
+ENTRIES = re.compile(r'"entries"\s*:\s*\[')
+LEVEL_URL = re.compile(r"/levels/(\d+)/")
+FUNCTION = re.compile(r"^f(\w+)\{(.*)\}$", re.DOTALL)
+
+def read_entries(filename):
+    '''Yields the entries of a HAR file one at a time. The file is read in
+    chunks, and only the text of the entry that is being decoded is kept.
+    '''
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    with open(filename, "rb") as har_file:
+        buffer = ""
+        position = None
+        end_of_file = False
+        while True:
+            if position is None:
+                match = ENTRIES.search(buffer)
+                if match is not None:
+                    position = match.end()
+                    continue
+            else:
+                # Skip to the next entry
+                while position < len(buffer) and \
+                    buffer[position] in " \t\r\n,":
+                    position += 1
+                if position < len(buffer):
+                    if buffer[position] == "]":
+                        return
+                    try:
+                        (entry, position) = decoder.raw_decode(buffer, \
+                            position)
+                    except ValueError:
+                        if end_of_file:
+                            raise
+                    else:
+                        yield entry
+                        continue
+            if end_of_file:
+                return
+
+            # The decoded entries are dropped once per chunk, not after
+            # every entry
+            if position is not None:
+                buffer = buffer[position:]
+                position = 0
+
+            # An entry that isn't complete yet gets a chunk at least as
+            # large as what was read of it, so it is decoded few times
+            chunk = har_file.read(max(CHUNK_SIZE, len(buffer)))
+            end_of_file = not chunk
+            buffer += text.decode(chunk, end_of_file)
+
+            # Before the entries only the text from where their key may
+            # start is kept
+            if position is None:
+                start = buffer.rfind('"entries"')
+                if start == -1:
+                    start = max(0, len(buffer) - len('"entries"'))
+                buffer = buffer[start:]
+
+def get_content(entry):
+    '''Returns the text of the response of an entry.'''
+    content = entry.get("response", {}).get("content", {})
+    text = content.get("text")
+    if text is None:
+        return None
+    if content.get("encoding") == "base64":
+        text = base64.b64decode(text).decode("utf-8", "replace")
+    return text
+
+def get_form(request):
+    '''Returns the fields of the body of a request as a dictionary.'''
+    post_data = request.get("postData")
+    if not post_data:
+        return {}
+    if post_data.get("params"):
+        return dict((param["name"], param.get("value", "")) for param in \
+            post_data["params"])
+    text = post_data.get("text", "")
+    mime_type = post_data.get("mimeType", "")
+    if mime_type.startswith("multipart/form-data"):
+        match = re.search(r"boundary=(\S+)", mime_type)
+        if match is None:
+            return {}
+        fields = {}
+        for part in text.split("--" + match.group(1)):
+            (head, separator, value) = part.partition("\r\n\r\n")
+            name = re.search(r'name="([^"]*)"', head)
+            if separator and name is not None:
+                fields[name.group(1)] = value[:-2] if \
+                    value.endswith("\r\n") else value
+        return fields
+    if mime_type.startswith("application/x-www-form-urlencoded"):
+        return dict(urllib.parse.parse_qsl(text))
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def split_program(program):
+    '''Splits a codeSolution program on the commas outside of braces.'''
+    commands = []
+    depth = 0
+    start = 0
+    for i in range(len(program)):
+        if program[i] == "{":
+            depth += 1
+        elif program[i] == "}":
+            depth -= 1
+        elif program[i] == "," and depth == 0:
+            commands.append(program[start:i])
+            start = i + 1
+    commands.append(program[start:])
+    return [command.strip() for command in commands if command.strip()]
+
+def get_moves(program):
+    '''Translates a codeSolution program (for instance D,D,F1,fF1{R,R})
+    to a move list. Calls of functions are replaced by their commands.
+    '''
+    functions = {}
+    main_commands = []
+    for command in split_program(program):
+        match = FUNCTION.match(command)
+        if match is not None:
+            functions[match.group(1)] = split_program(match.group(2))
+        else:
+            main_commands.append(command)
+
+    moves = []
+    stack = [iter(main_commands)]
+    followed = 0
+    while stack and len(moves) < MAX_MOVES and followed < MAX_COMMANDS:
+        followed += 1
+        command = next(stack[-1], None)
+        if command is None:
+            stack.pop()
+        elif command in functions:
+            stack.append(iter(functions[command]))
+        else:
+            moves.append(MOVE_CODES.get(command, command))
+    return moves
+
+def get_level(entry):
+    '''Returns the id and the catalog json of a level in the response of an
+    entry, or None when the response isn't a level. Raises a ValueError
+    when the id of the level isn't a number.
+    '''
+    text = get_content(entry)
+    if text is None or '"tiles"' not in text:
+        return None
+    try:
+        data = json.loads(text)
+        content = json.dumps(data).encode("utf-8")
+        parse_json.parse_level(content, hashlib.sha1(content).hexdigest())
+    except (ValueError, KeyError, TypeError, AttributeError, IndexError):
+        return None
+    level_id = data.get("_id")
+    if level_id is None:
+        match = LEVEL_URL.search(entry.get("request", {}).get("url", ""))
+        if match is None:
+            return None
+        level_id = match.group(1)
+    return int(level_id), dict((field, data[field]) for field in \
+        LEVEL_FIELDS if field in data)
+
+def get_attempt(entry):
+    '''Returns the attempt in the request of an entry, or None when the
+    request isn't a score submission or a hint request. Raises a
+    ValueError when the seed of a score submission isn't a number.
+    '''
+    request = entry.get("request", {})
+    if request.get("method") != "POST":
+        return None
+    form = get_form(request)
+    if "codeSolution" in form and "seed" in form:
+        attempt = {"mission": MISSION, "level": int(form["seed"]), \
+            "moveList": get_moves(form["codeSolution"]), \
+            "goalsCollected": None, "codeSolution": form["codeSolution"]}
+        try:
+            result = json.loads(get_content(entry) or "")
+        except ValueError:
+            result = None
+        if isinstance(result, dict):
+            attempt["result"] = result
+    elif "moveList" in form and "mission" in form and "level" in form:
+        attempt = {"mission": form["mission"], "level": form["level"], \
+            "moveList": form["moveList"], \
+            "goalsCollected": form.get("goalsCollected")}
+    else:
+        return None
+    attempt["time"] = entry.get("startedDateTime")
+    return attempt
+
+def get_attempt_key(attempt):
+    '''Returns the hash of an attempt, without the time it was made.'''
+    content = json.dumps([attempt["mission"], attempt["level"], \
+        attempt["moveList"], attempt.get("codeSolution")])
+    return hashlib.sha1(content.encode("utf-8")).digest()
+
+class Importer(object):
+    def __init__(self, catalog, attempts):
+        self.catalog = catalog
+        self.attempts = attempts
+        self.counts = {"entries": 0, "levels": 0, "duplicate levels": 0, \
+            "attempts": 0, "duplicate attempts": 0, "skipped": 0}
+
+        # Hashes of the levels in the catalog by file name, and of the
+        # attempts in the attempts file in an SQLite file
+        self.level_keys = {}
+        os.makedirs(catalog, exist_ok=True)
+        for (mission, level, filename) in parse_json.find_levels(catalog):
+            self.level_keys[filename] = solution_store.get_level_key( \
+                parse_json.load_level(filename))
+        self.attempt_keys = sqlite3.connect(attempts + ".keys")
+        self.attempt_keys.execute("CREATE TABLE IF NOT EXISTS keys " + \
+            "(key BLOB PRIMARY KEY)")
+        self.attempt_keys.execute("CREATE TABLE IF NOT EXISTS indexed " + \
+            "(size INTEGER NOT NULL)")
+        self.read_attempt_keys()
+
+    def read_attempt_keys(self):
+        '''Adds the hashes of the attempts file that the SQLite file hasn't
+        read yet. When the attempts file is gone or shorter than what was
+        read, the hashes are read again from the start.
+        '''
+        row = self.attempt_keys.execute("SELECT size FROM indexed").fetchone()
+        size = 0 if row is None else row[0]
+        exists = os.path.exists(self.attempts)
+        if not exists or size > os.path.getsize(self.attempts):
+            self.attempt_keys.execute("DELETE FROM keys")
+            size = 0
+        if exists:
+            with open(self.attempts, "rb") as attempts_file:
+                attempts_file.seek(size)
+                for line in attempts_file:
+                    if not line.endswith(b"\n"):
+                        break
+                    size += len(line)
+                    if line.strip():
+                        self.attempt_keys.execute("INSERT OR IGNORE INTO " + \
+                            "keys VALUES (?)", (get_attempt_key( \
+                            json.loads(line.decode("utf-8"))),))
+        self.set_indexed(size)
+
+    def set_indexed(self, size):
+        '''Keeps how much of the attempts file the hashes cover.'''
+        self.attempt_keys.execute("DELETE FROM indexed")
+        self.attempt_keys.execute("INSERT INTO indexed VALUES (?)", (size,))
+        self.attempt_keys.commit()
+
+    def add_level(self, level_id, data):
+        '''Writes a level to the catalog, unless the catalog has the same
+        level already. A level that changed is written again.
+        '''
+        filename = os.path.join(self.catalog, "mission%d-level%d.json" % \
+            (MISSION, level_id))
+        content = json.dumps(data, indent=1, sort_keys=True).encode("utf-8")
+        key = solution_store.get_level_key(parse_json.parse_level(content, \
+            hashlib.sha1(content).hexdigest()))
+        if self.level_keys.get(filename) == key:
+            self.counts["duplicate levels"] += 1
+            return
+        temporary = "%s.%d.tmp" % (filename, os.getpid())
+        with open(temporary, "wb") as output:
+            output.write(content)
+        os.replace(temporary, filename)
+        self.level_keys[filename] = key
+        self.counts["levels"] += 1
+
+    def add_attempt(self, attempt, output):
+        '''Writes an attempt to the attempts file, unless it is in there.'''
+        cursor = self.attempt_keys.execute("INSERT OR IGNORE INTO keys " + \
+            "VALUES (?)", (get_attempt_key(attempt),))
+        if cursor.rowcount == 0:
+            self.counts["duplicate attempts"] += 1
+            return
+        output.write(json.dumps(attempt) + "\n")
+        self.counts["attempts"] += 1
+
+    def run(self, filenames):
+        '''Imports the levels and attempts of HAR files. Returns the counts
+        of entries, written and duplicate levels and attempts, and of
+        entries that were skipped because a level id isn't a number.
+        '''
+        with open(self.attempts, "a") as output:
+            for filename in filenames:
+                for entry in read_entries(filename):
+                    self.counts["entries"] += 1
+                    try:
+                        level = get_level(entry)
+                        attempt = get_attempt(entry)
+                    except (ValueError, TypeError):
+                        self.counts["skipped"] += 1
+                        continue
+                    if level is not None:
+                        self.add_level(*level)
+                    if attempt is not None:
+                        self.add_attempt(attempt, output)
+            output.flush()
+            self.set_indexed(os.path.getsize(self.attempts))
+        return self.counts
+
+    def close(self):
+        self.attempt_keys.close()
+
+def get_arguments(argv):
+    '''Parses the command line arguments.'''
+    parser = argparse.ArgumentParser(description="Imports the levels and " + \
+        "student attempts of HAR captures.")
+    parser.add_argument("files", nargs="*", \
+        default=["Json/go.bomberbot.com.har"], help="HAR files to import")
+    parser.add_argument("--catalog", default="Captured", \
+        help="directory to write the level files to")
+    parser.add_argument("--attempts", default=None, \
+        help="JSON lines file to add the attempts to (default: " + \
+        "attempts.jsonl in the catalog)")
+    return parser.parse_args(argv)
+
+def main():
+    args = get_arguments(sys.argv[1:])
+    attempts = args.attempts
+    if attempts is None:
+        attempts = os.path.join(args.catalog, "attempts.jsonl")
+    importer = Importer(args.catalog, attempts)
+    try:
+        counts = importer.run(args.files)
+    finally:
+        importer.close()
+    print(", ".join("%d %s" % (counts[name], name) for name in \
+        ("entries", "levels", "duplicate levels", "attempts", \
+        "duplicate attempts", "skipped")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+'''
+    File: held_karp.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file contains the Held-Karp solver. Instead of trying every
+    permutation of the goals, the leg costs between the start and the goals
+    are calculated once with A*, after which the best goal order is found
+    with dynamic programming over the sets of collected goals (O(2^n * n^2)).
+
+    The end of a leg is a tile and a direction (rubies are smashed from a
+    neighbouring tile), so a goal can be reached in up to four different
+    states. The legs are calculated as if no other object has been destroyed
+    since the start, the path of the chosen order is calculated again with
+    the destroyed objects taken into account.
+
+'''
+
+import brute_force
+
+class HeldKarp(brute_force.Brute_force):
+    def __init__(self, grid, goal_list, best_solution, start, has_hammer, \
+        direction, cache=None, destroyed=frozenset()):
+        brute_force.Brute_force.__init__(self, grid, goal_list, \
+            best_solution, start, has_hammer, direction, cache, destroyed)
+        self.legs = {}
+
+    def get_leg(self, state, goal):
+        '''Returns the cost and the end state of the leg from a state
+        (tile index, direction) to a goal, or None when the goal can't be
+        reached. Legs are only calculated once.
+        '''
+        key = (state, goal)
+        if key not in self.legs:
+            (index, direction) = state
+            leg = self.solve_leg(self.grid.tile(index), direction, \
+                self.goal_list[goal][0], self.destroyed)
+            if leg is None:
+                self.legs[key] = None
+            else:
+                steps, direction, rot, smashed = leg
+                if steps:
+                    index = self.get_index(steps[-1])
+                self.legs[key] = (len(steps), (index, direction))
+        return self.legs[key]
+
+    def order_goals(self):
+        '''Finds the goal order with the lowest total leg cost. Returns the
+        order as a list of goal numbers, or None when not every goal can be
+        reached.
+        '''
+        n = len(self.goal_list)
+        full = (1 << n) - 1
+        start_state = (self.get_index(self.start), self.direction)
+
+        # table[mask] maps (last goal, end state) to (cost, previous key),
+        # with the previous key being (mask, last goal, end state).
+        table = [{} for mask in range(full + 1)]
+        table[0][(None, start_state)] = (0, None)
+        for mask in range(full):
+            self.nodes += len(table[mask])
+            for (last, state), (cost, prev) in table[mask].items():
+                for goal in range(n):
+                    if mask & (1 << goal):
+                        continue
+                    leg = self.get_leg(state, goal)
+                    if leg is None:
+                        continue
+                    new_mask = mask | (1 << goal)
+                    new_key = (goal, leg[1])
+                    new_cost = cost + leg[0]
+                    old = table[new_mask].get(new_key)
+                    if old is None or new_cost < old[0]:
+                        table[new_mask][new_key] = (new_cost, \
+                            (mask, last, state))
+
+        if not table[full]:
+            return None
+
+        # Follow the previous keys back from the cheapest complete entry
+        best_key = None
+        for key, (cost, prev) in table[full].items():
+            if best_key is None or cost < table[full][best_key][0]:
+                best_key = key
+        order = []
+        mask = full
+        key = best_key
+        while mask:
+            order.append(key[0])
+            (cost, prev) = table[mask][key]
+            mask = prev[0]
+            key = (prev[1], prev[2])
+        order.reverse()
+        return order
+
+    def follow(self, order):
+        '''Calculates the path for a goal order. Goals that were already
+        collected on the way to an earlier goal are skipped.
+        '''
+        current_step = self.start
+        direction = self.direction
+        destroyed = self.destroyed
+        visited = set([self.get_index(self.start)])
+        path_list = []
+        rotations = []
+        for i in order:
+            goal = self.get_index(self.goal_list[i][0])
+            if goal in visited or goal in destroyed:
+                continue
+            leg = self.solve_leg(current_step, direction, \
+                self.goal_list[i][0], destroyed)
+            if leg is None:
+                return None
+            steps, direction, rot, smashed = leg
+            rotations.extend(rot)
+            destroyed = destroyed | smashed
+            path_list.extend(steps)
+            visited.update(self.get_index(tile) for tile in steps)
+            if path_list:
+                current_step = path_list[-1]
+        return path_list, rotations
+
+    def solve(self):
+        '''Orders the goals with Held-Karp and returns the path, the
+        rotations and the goal order, like Brute_force.solve.
+        '''
+        order = self.order_goals()
+        if order is None:
+            return [], [], ()
+        solution = self.follow(order)
+        if solution is None:
+            return [], [], ()
+        path_list, rotations = solution
+        return path_list, rotations, tuple(order)
@@ -7,32 +7,61 @@
     Created for the Bomberbot coorporation
 ---------------------------------------------
     File description:
-    This file contains functions in order to generate a personal hints for 
-    the users. 
+    This file contains functions in order to generate a personal hints for
+    the users.
 
-'''
+    The hint is returned as a dictionary by get_hint, process prints the
+    messages of the hint as well.
+
+    When the result of resume.resume is given, the hint is based on the
+    path from the point where the user is instead of on the best path from
+    the start of the level.
 
-import sys
+    When the advice of a hint policy (hint_policy.Policy.get_advice) is
+    given, the next move and the number of moves the user is from the best
+    path are looked up in the policy of the level, so nothing is solved.
+
+'''
 
 class Hint_generation(object):
     def __init__(self, user_moves, best_moves, goals_collected, goal_list, \
-    		permutations):
+            permutations, verbose=True, resumed=None, policy=None):
         self.user_moves = user_moves
         self.best_moves = best_moves
         self.goals_collected = goals_collected
         self.goal_list = goal_list
         self.permutations = permutations
+        self.verbose = verbose
+        self.resumed = resumed
+        self.policy = policy
+        if resumed is not None:
+            self.goals_collected = resumed["state"]["collected"]
+        self.hint = {"messages": []}
+
+    def say(self, message):
+        '''Adds a message to the hint and prints it when verbose.'''
+        self.hint["messages"].append(message)
+        if self.verbose:
+            print(message)
+
+    def get_coords(self, goal):
+        '''Returns the coordinates of a goal as a list.'''
+        return [self.goal_list[goal][0].x_coord, self.goal_list[goal][0].y_coord]
 
     def check_correctness(self):
         '''Compares the users input with the brute force solution.'''
-        if len(self.goals_collected) == len(self.goal_list) and \
-        	len(self.user_moves) <= len(self.best_moves):
-            print("User found the Best path")
+        complete = len(self.goals_collected) == len(self.goal_list)
+        self.hint["complete"] = complete
+        if complete and len(self.user_moves) <= len(self.best_moves):
+            self.hint["type"] = "best_path"
+            self.say("User found the Best path")
             return True
-        elif len(self.goals_collected) == len(self.goal_list):
-        	print("User path is complete, but it's not the shortest path")
-        	return False
-        print("User path is incomplete")
+        elif complete:
+            self.hint["type"] = "too_long"
+            self.say("User path is complete, but it's not the shortest path")
+            return False
+        self.hint["type"] = "incomplete"
+        self.say("User path is incomplete")
         return False
 
     def compare_commands(self):
@@ -40,51 +69,134 @@ class Hint_generation(object):
         for i in range(len(self.user_moves)):
             if i <= len(self.user_moves)-1 and i <= len(self.best_moves)-1 :
                 if self.user_moves[i] != self.best_moves[i]:
-                    print("Wrong move found at move", i+1)
-                    print("User move is '" + str(self.user_moves[i]) + \
-                    	"', but correct move is '" + str(self.best_moves[i])+"'.")
-                    return          
+                    self.hint["wrong_move"] = i+1
+                    self.hint["user_move"] = self.user_moves[i]
+                    self.hint["correct_move"] = self.best_moves[i]
+                    self.say("Wrong move found at move " + str(i+1))
+                    self.say("User move is '" + str(self.user_moves[i]) + \
+                        "', but correct move is '" + str(self.best_moves[i])+"'.")
+                    return
         if len(self.user_moves) < len(self.best_moves) and len(self.user_moves) > 0:
-            print("Current path is correct, but not yet done. Try looking at move '" + \
-            	self.best_moves[len(self.user_moves)] + "' next")
+            self.hint["next_move"] = self.best_moves[len(self.user_moves)]
+            self.say("Current path is correct, but not yet done. Try looking at move '" + \
+                self.best_moves[len(self.user_moves)] + "' next")
         elif len(self.user_moves) == 0:
-            print("No moves made, try looking at move '" + \
+            self.hint["next_move"] = self.best_moves[len(self.user_moves)]
+            self.say("No moves made, try looking at move '" + \
                 self.best_moves[len(self.user_moves)] + "' next")
         else:
-            print("Current path is correct, but you used too many moves at the end.")
+            self.hint["extra_moves"] = True
+            self.say("Current path is correct, but you used too many moves at the end.")
 
 
     def hint_next_star(self):
-        '''Analyses the fault of the user when there are multiple goals. 
+        '''Analyses the fault of the user when there are multiple goals.
         The hint is based on the next goal to collect.
         '''
         correct_goals = []
         for i in range(len(self.permutations)):
             if len(self.goals_collected) != 0:
                 if i+1 > len(self.goals_collected) or i != self.goals_collected[i]:
-                    sys.stdout.write("Goals ")
+                    message = "Goals "
                     for j in correct_goals:
-                        sys.stdout.write("(" + str(self.goal_list[j-1][0].x_coord) + \
-                        	", " + str(self.goal_list[j-1][0].y_coord) + "), ")
-                    print("are correctly collected.")
-                    print("Try looking at tile (" + str(self.goal_list[i][0].x_coord) + \
-                    	"," + str(self.goal_list[i][0].y_coord) + ") next")
+                        message += "(" + str(self.goal_list[j-1][0].x_coord) + \
+                            ", " + str(self.goal_list[j-1][0].y_coord) + "), "
+                    self.say(message + "are correctly collected.")
+                    self.say("Try looking at tile (" + str(self.goal_list[i][0].x_coord) + \
+                        "," + str(self.goal_list[i][0].y_coord) + ") next")
+                    self.hint["correct_goals"] = [self.get_coords(j-1) \
+                        for j in correct_goals]
+                    self.hint["next_goal"] = self.get_coords(i)
                     break
                 else:
                      correct_goals.append(self.permutations[i]+1)
             else:
-                print("No stars collected yet. Try looking at tile (" + \
-                	str(self.goal_list[self.permutations[0]][0].x_coord) + \
-                	"," + str(self.goal_list[self.permutations[0]][0].y_coord) + ")")
+                self.hint["correct_goals"] = []
+                self.hint["next_goal"] = self.get_coords(self.permutations[0])
+                self.say("No stars collected yet. Try looking at tile (" + \
+                    str(self.goal_list[self.permutations[0]][0].x_coord) + \
+                    "," + str(self.goal_list[self.permutations[0]][0].y_coord) + ")")
                 return
 
-    def process(self):
-        '''Checks whether the input of the user is correct. If not, 
+    def hint_resume(self):
+        '''Gives a hint based on the path from the tile and direction the
+        user ended with.
+        '''
+        state = self.resumed["state"]
+        solution = self.resumed["solution"]
+        self.hint["state"] = state
+        position = "(" + str(state["position"][0]) + "," + \
+            str(state["position"][1]) + ")"
+        if state["status"] == "fell":
+            self.hint["type"] = "fell"
+            self.say("The bot falls into the abyss at move " + \
+                str(state["moves"]) + ", try another way")
+            return
+        if solution is None:
+            self.hint["type"] = "stuck"
+            self.say("The goals that are left can't be reached from tile " + \
+                position + " anymore")
+            return
+        self.hint["remaining_moves"] = solution["length"]
+        self.hint["next_move"] = solution["commands"][0]
+        self.hint["next_goal"] = self.get_coords(solution["permutation"][0])
+        self.say("From tile " + position + " facing " + \
+            state["direction"] + ", " + str(len(solution["permutation"])) + \
+            " goal(s) are left in " + str(solution["length"]) + " moves.")
+        self.say("Try looking at move '" + solution["commands"][0] + \
+            "' and tile (" + str(self.hint["next_goal"][0]) + "," + \
+            str(self.hint["next_goal"][1]) + ") next")
+
+    def hint_policy(self):
+        '''Gives a hint with the advice of the policy of the level for the
+        state the user ended in.
+        '''
+        policy = self.policy
+        self.hint["state"] = {"position": policy["position"], \
+            "direction": policy["direction"], "status": policy["status"], \
+            "moves": policy["moves"]}
+        position = "(" + str(policy["position"][0]) + "," + \
+            str(policy["position"][1]) + ")"
+        if policy["status"] == "fell":
+            self.hint["type"] = "fell"
+            self.say("The bot falls into the abyss at move " + \
+                str(policy["moves"]) + ", try another way")
+            return
+        if policy["remaining_moves"] is None:
+            self.hint["type"] = "stuck"
+            self.say("The goals that are left can't be reached from tile " + \
+                position + " anymore")
+            return
+        self.hint["remaining_moves"] = policy["remaining_moves"]
+        self.hint["extra_moves"] = policy["extra_moves"]
+        self.hint["next_move"] = policy["next_move"]
+        self.say("From tile " + position + " facing " + \
+            policy["direction"] + ", the goals that are left can be " + \
+            "collected in " + str(policy["remaining_moves"]) + " moves.")
+        if policy["extra_moves"] > 0:
+            self.say("That is " + str(policy["extra_moves"]) + \
+                " move(s) more than the best path.")
+        self.say("Try looking at move '" + policy["next_move"] + "' next")
+
+    def get_hint(self):
+        '''Checks whether the input of the user is correct. If not,
         uses different functions based on how many goals there are.
-        ''' 
+        Returns the hint as a dictionary.
+        '''
+        self.hint = {"messages": []}
         correct = self.check_correctness()
+        self.hint["correct"] = correct
         if not correct:
-            if len(self.goal_list) > 1:
+            if self.resumed is not None and not self.hint["complete"]:
+                self.hint_resume()
+            elif self.policy is not None and not self.hint["complete"]:
+                self.hint_policy()
+            elif len(self.goal_list) > 1:
                 self.hint_next_star()
             else:
                 self.compare_commands()
+        return self.hint
+
+    def process(self):
+        '''Prints the hint for the user and returns it.'''
+        return self.get_hint()
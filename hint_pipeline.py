@@ -0,0 +1,285 @@
+'''
+    File: hint_pipeline.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file gives hints for large exports of attempts (a JSON lines file
+    with one {"mission", "level", "moveList", "goalsCollected"} object per
+    line, or a demo file) and writes one JSON record per attempt.
+
+    The attempts are read twice and never kept as a whole. The first time
+    only the levels are collected, and every level is solved once by the
+    worker pool (or taken from the solution store). The second time the
+    attempts are grouped by level into batches, and the workers play every
+    attempt with the simulator and generate its hint. At most a few
+    batches per worker are waiting at a time, so the memory stays the same
+    however many attempts there are. The records are written in the order
+    of the batches, the attempt number in a record is its line in the
+    input. A line that can't be read gets an error record with its file
+    and line number, and the run goes on.
+
+    Run it by typing hint_pipeline.py [files] in the console, see
+    hint_pipeline.py -h for the options.
+'''
+
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+import batch
+import hint_generation
+import main
+import parse_json
+import simulator
+import solution_store
+
+# Attempts of one level sent to a worker at once
+BATCH_SIZE = 500
+
+# Attempts that may wait for their batch to fill up, the oldest batch is
+# sent on when there are more
+MAX_WAITING = 20000
+
+# Batches per worker that may wait for a worker
+PENDING_PER_WORKER = 2
+
+# Goal lists of the levels the worker has given hints for, by file name
+goal_lists = {}
+
+def get_filename(directory, mission, level):
+    '''Returns the level file of a mission and level number.'''
+    return os.path.join(directory, "mission" + str(mission) + "-level" + \
+        str(level) + ".json")
+
+def read_attempts(filenames):
+    '''Yields the attempts of the files as (number, mission, level, moves,
+    goals collected), numbered from 0 over all files. An attempt that
+    can't be read is yielded as its error record.
+    '''
+    number = 0
+    for filename in filenames:
+        for (mission, level, moves, goals, error) in \
+            simulator.read_submissions(filename):
+            if error is not None:
+                error["attempt"] = number
+                yield error
+            else:
+                yield (number, mission, level, moves, goals)
+            number += 1
+
+def get_levels(filenames):
+    '''Returns the (mission, level) numbers of every level that has
+    attempts.
+    '''
+    levels = set()
+    for attempt in read_attempts(filenames):
+        if isinstance(attempt, tuple):
+            levels.add((str(attempt[1]), str(attempt[2])))
+    return sorted(levels)
+
+def get_batches(filenames):
+    '''Yields the attempts grouped by level, as (mission, level, attempts)
+    with at most BATCH_SIZE attempts. The attempts of a level are sent on
+    when its batch is full, when too many attempts are waiting or when the
+    input ends. The error record of an attempt that can't be read is
+    yielded right away, in a list.
+    '''
+    waiting = collections.OrderedDict()
+    count = 0
+    for attempt in read_attempts(filenames):
+        if isinstance(attempt, dict):
+            yield [attempt]
+            continue
+        key = (str(attempt[1]), str(attempt[2]))
+        attempts = waiting.setdefault(key, [])
+        attempts.append(attempt)
+        count += 1
+        if len(attempts) == BATCH_SIZE:
+            del waiting[key]
+            count -= len(attempts)
+            yield key + (attempts,)
+        elif count > MAX_WAITING:
+            (key, attempts) = waiting.popitem(last=False)
+            count -= len(attempts)
+            yield key + (attempts,)
+    for (key, attempts) in waiting.items():
+        yield key + (attempts,)
+
+def solve_levels(levels, directory, solver, pool, store):
+    '''Solves every level once and returns the solutions by (mission,
+    level). Levels that are in the store are taken from it, levels that
+    don't exist are left out. Only proven paths are stored.
+    '''
+    solutions = {}
+    tasks = []
+    for (mission, level) in levels:
+        filename = get_filename(directory, mission, level)
+        if not parse_json.has_level(filename):
+            continue
+        if store is not None:
+            record = store.get(solution_store.get_level_key( \
+                parse_json.load_level(filename)), solver)
+            if record is not None:
+                solutions[(mission, level)] = record
+                continue
+        tasks.append((mission, level, filename, solver))
+
+    if pool is None:
+        records = map(batch.solve_task, tasks)
+    else:
+        records = pool.imap_unordered(batch.solve_task, tasks)
+    for record in records:
+        key = (record["mission"], record["level"])
+        solutions[key] = record
+        if store is not None and "error" not in record and \
+            record.get("proven", True):
+            store.put(solution_store.get_level_key(parse_json.load_level( \
+                record["file"])), solver, record)
+    return solutions
+
+def hint_task(task):
+    '''Gives the hints for a batch of attempts of one level in a worker
+    process. Returns the records of the attempts.
+    '''
+    (mission, level, attempts, filename, solution) = task
+    records = []
+    try:
+        level_simulator = simulator.get_level_simulator(filename)
+        goal_list = goal_lists.get(filename)
+        if goal_list is None:
+            goal_list = main.create_goal_list(level_simulator.grid)
+            goal_lists[filename] = goal_list
+    except Exception:
+        error = traceback.format_exc().strip().split("\n")[-1]
+        return [{"attempt": attempt[0], "mission": mission, "level": level, \
+            "error": error} for attempt in attempts]
+
+    for (number, attempt_mission, attempt_level, moves, goals) in attempts:
+        record = {"attempt": number, "mission": mission, "level": level}
+        try:
+            validation = level_simulator.validate(moves, goals)
+            record["validation"] = validation
+            if validation["status"] == simulator.INVALID:
+                record["error"] = "unknown move %r" % \
+                    (moves[validation["moves"]],)
+                records.append(record)
+                continue
+            hint = hint_generation.Hint_generation(moves, \
+                solution["commands"], validation["goalsCollected"], \
+                goal_list, tuple(solution["permutation"]), verbose=False)
+            record["hint"] = hint.get_hint()
+            record["best"] = solution["length"]
+        except Exception:
+            record["error"] = traceback.format_exc().strip().split("\n")[-1]
+        records.append(record)
+    return records
+
+def get_tasks(filenames, directory, solutions):
+    '''Yields the hint tasks of the batches of attempts. Attempts of a
+    level without a solution, and attempts that can't be read, get an
+    error record right away, as a list instead of a task.
+    '''
+    for level_batch in get_batches(filenames):
+        if isinstance(level_batch, list):
+            yield level_batch
+            continue
+        (mission, level, attempts) = level_batch
+        solution = solutions.get((mission, level))
+        if solution is None or "error" in solution:
+            error = "unknown level" if solution is None else \
+                solution["error"]
+            yield [{"attempt": attempt[0], "mission": mission, \
+                "level": level, "error": error} for attempt in attempts]
+        else:
+            yield (mission, level, attempts, get_filename(directory, \
+                mission, level), solution)
+
+def write_records(records, output, counts):
+    '''Writes the records of a batch and counts them.'''
+    for record in records:
+        output.write(json.dumps(record) + "\n")
+        counts["error" if "error" in record else "hints"] += 1
+
+def run(filenames, directory, solver, workers, output, store=None):
+    '''Gives the hints for every attempt of the files and writes the
+    records to an opened file. Returns the number of hints and errors.
+    '''
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    pool = None if workers == 1 else multiprocessing.Pool(workers)
+    counts = {"hints": 0, "error": 0}
+    try:
+        solutions = solve_levels(get_levels(filenames), directory, solver, \
+            pool, store)
+
+        # Batches are handed to the workers as they are read, with at most
+        # a few waiting per worker
+        pending = collections.deque()
+        for task in get_tasks(filenames, directory, solutions):
+            if isinstance(task, list):
+                write_records(task, output, counts)
+            elif pool is None:
+                write_records(hint_task(task), output, counts)
+            else:
+                pending.append(pool.apply_async(hint_task, (task,)))
+                if len(pending) >= workers * PENDING_PER_WORKER:
+                    write_records(pending.popleft().get(), output, counts)
+        while pending:
+            write_records(pending.popleft().get(), output, counts)
+        output.flush()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return counts["hints"], counts["error"]
+
+def get_arguments(argv):
+    '''Parses the command line arguments.'''
+    parser = argparse.ArgumentParser(description="Gives the hints for " + \
+        "every attempt of exports and writes one JSON record per attempt.")
+    parser.add_argument("files", nargs="*", default=["Json/demo.json"], \
+        help="exports (.jsonl) or demo files (.json) with attempts")
+    parser.add_argument("--directory", default="Json", \
+        help="directory or bundle with the missionX-levelY.json files")
+    parser.add_argument("--solver", choices=sorted(main.SOLVERS), \
+        default="branch_bound", help="goal ordering solver to use")
+    parser.add_argument("--workers", type=int, default=None, \
+        help="number of worker processes (default: number of cpus)")
+    parser.add_argument("--store", default=None, \
+        help="SQLite file of the solution store to use")
+    parser.add_argument("--output", default=None, \
+        help="file to write the records to (default: standard output)")
+    return parser.parse_args(argv)
+
+def main_pipeline():
+    args = get_arguments(sys.argv[1:])
+    start_time = time.time()
+    store = None
+    if args.store is not None:
+        store = solution_store.SolutionStore(args.store)
+    output = sys.stdout
+    if args.output is not None:
+        output = open(args.output, "w")
+    try:
+        (hints, errors) = run(args.files, args.directory, args.solver, \
+            args.workers, output, store)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if store is not None:
+            store.close()
+    seconds = time.time() - start_time
+    sys.stderr.write("%d hints and %d errors in %.3f seconds\n" % (hints, \
+        errors, seconds))
+
+
+if __name__ == "__main__":
+    main_pipeline()
@@ -0,0 +1,313 @@
+'''
+    File: hint_policy.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file builds hint policies. A policy is a table with the best next
+    command and the number of moves that are left for every state of a
+    level, so the hint for a user is a lookup instead of a solve.
+
+    A state is the tile and direction of the bot, the collected goals and
+    the destroyed objects, packed into one integer like in
+    state_search.py. Every state that can be reached from the start is
+    found by playing the five commands with the simulator, so ice and
+    abysses count like they do in the game. Then a breadth first search
+    goes backwards from the states where every goal is collected (every
+    command is one move, so this is Dijkstra's algorithm with equal
+    costs), which gives the moves that are left from every state.
+
+    Levels with more than --max-states states get no policy. States from
+    which the goals can't be collected anymore aren't in the table.
+
+    Build the policies of a level directory into the solution store by
+    typing hint_policy.py [directory] in the console, see
+    hint_policy.py -h for the options.
+'''
+
+import argparse
+import json
+import multiprocessing
+import sys
+import traceback
+import zlib
+from collections import deque
+import parse_json
+import simulator as simulator_module
+import solution_store
+import tile_grid
+
+# States of a level a policy is built for at most
+MAX_STATES = 200000
+
+# Command names by command number
+COMMAND_NAMES = tile_grid.DIRECTIONS + ["smash"]
+
+VERSION = 1
+
+class Policy(object):
+    def __init__(self, simulator, table, optimal):
+        self.simulator = simulator
+        self.goal_count = len(simulator.goals)
+        self.size = simulator.grid.size
+
+        # Best command and moves that are left by packed state, and the
+        # moves of the best path from the start
+        self.table = table
+        self.optimal = optimal
+
+    def pack(self, index, direction, collected, destroyed):
+        '''Packs a state into one integer.'''
+        return ((((destroyed << self.goal_count) | collected) * \
+            self.size + index) << 2) | direction
+
+    def get_move(self, index, direction, collected, destroyed):
+        '''Returns the best command number and the moves that are left from
+        a state, or None when the goals can't be collected from it. The
+        states after the one where the last goal was collected aren't in
+        the table, no moves are left in them.
+        '''
+        if collected == self.simulator.all_goals:
+            return (0, 0)
+        return self.table.get(self.pack(index, direction, collected, \
+            destroyed))
+
+    def get_advice(self, moves):
+        '''Plays the moves of a user and looks the state after them up.
+        Returns the state, the best next command, the moves that are left
+        and how many moves the user is from the best path as a dictionary.
+        '''
+        result = self.simulator.run(moves)
+        advice = {
+            "position": list(self.simulator.grid.get_coords(result.index)),
+            "direction": result.direction,
+            "status": result.status,
+            "moves": result.moves,
+            "optimal_moves": self.optimal,
+            "next_move": None,
+            "remaining_moves": None,
+            "extra_moves": None,
+        }
+        if result.status != simulator_module.DONE:
+            return advice
+        move = self.get_move(result.index, \
+            tile_grid.DIRECTIONS.index(result.direction), result.collected, \
+            result.destroyed)
+        if move is not None:
+            (command, remaining) = move
+            if remaining:
+                advice["next_move"] = COMMAND_NAMES[command]
+            advice["remaining_moves"] = remaining
+            advice["extra_moves"] = result.moves + remaining - self.optimal
+        return advice
+
+    def get_commands(self):
+        '''Returns the commands of a best path from the start by following
+        the table.
+        '''
+        simulator = self.simulator
+        index = simulator.start
+        direction = simulator.direction
+        collected = simulator.goal_bits.get(index, 0)
+        destroyed = 0
+        commands = []
+        while True:
+            (command, remaining) = self.get_move(index, direction, \
+                collected, destroyed)
+            if not remaining:
+                return commands
+            commands.append(COMMAND_NAMES[command])
+            (index, direction, collected, destroyed) = simulator.step( \
+                index, direction, collected, destroyed, command)
+
+    def get_solution(self, best_solution):
+        '''Returns a best path from the start as a solution record with the
+        commands, the goals in the order they are collected and the length,
+        like the records of batch.solve_record. The path is proven to be
+        the shortest.
+        '''
+        commands = self.get_commands()
+        result = self.simulator.run(commands)
+        return {"commands": commands, "permutation": result.order, \
+            "length": self.optimal, "best": best_solution, "proven": True}
+
+    def to_bytes(self):
+        '''Returns the policy as compressed json for the store.'''
+        table = []
+        for state in sorted(self.table):
+            table.extend((state,) + self.table[state])
+        return zlib.compress(json.dumps({"version": VERSION, \
+            "optimal": self.optimal, "table": table}).encode("utf-8"))
+
+def load(simulator, data):
+    '''Returns the Policy of a level from the bytes of the store.'''
+    content = json.loads(zlib.decompress(data).decode("utf-8"))
+    if content["version"] != VERSION:
+        raise ValueError("policy is of version %d" % content["version"])
+    table = content["table"]
+    return Policy(simulator, dict((table[i], (table[i+1], table[i+2])) \
+        for i in range(0, len(table), 3)), content["optimal"])
+
+def build(simulator, max_states=MAX_STATES):
+    '''Builds the Policy of a level. Returns None when the level has more
+    than max_states states. Raises a ValueError when the goals can't be
+    collected.
+    '''
+    policy = Policy(simulator, {}, None)
+    commands = len(COMMAND_NAMES)
+    start = simulator.start
+    states = [policy.pack(start, simulator.direction, \
+        simulator.goal_bits.get(start, 0), 0)]
+    numbers = {states[0]: 0}
+
+    # Find every state that can be reached, with the state numbers the
+    # commands lead to (-1 when the bot falls). The command numbers of a
+    # state are at state number * commands.
+    successors = []
+    full = simulator.all_goals
+    for key in states:
+        direction = key & 3
+        (rest, index) = divmod(key >> 2, policy.size)
+        collected = rest & full
+        if collected == full:
+            successors.extend([-1] * commands)
+            continue
+        for command in range(commands):
+            (end, new_direction, new_collected, new_destroyed) = \
+                simulator.step(index, direction, collected, \
+                rest >> policy.goal_count, command)
+            if end == simulator_module.FALLS:
+                successors.append(-1)
+                continue
+            new_key = policy.pack(end, new_direction, new_collected, \
+                new_destroyed)
+            number = numbers.get(new_key)
+            if number is None:
+                if len(states) == max_states:
+                    return None
+                number = numbers[new_key] = len(states)
+                states.append(new_key)
+            successors.append(number)
+
+    # Breadth first search backwards from the states with every goal
+    predecessors = [[] for key in states]
+    for i in range(len(successors)):
+        if successors[i] != -1:
+            predecessors[successors[i]].append(i // commands)
+    remaining = [-1] * len(states)
+    queue = deque()
+    for number in range(len(states)):
+        if ((states[number] >> 2) // policy.size) & full == full:
+            remaining[number] = 0
+            queue.append(number)
+    while queue:
+        number = queue.popleft()
+        for before in predecessors[number]:
+            if remaining[before] == -1:
+                remaining[before] = remaining[number] + 1
+                queue.append(before)
+    if remaining[0] == -1:
+        raise ValueError("the goals can't be collected from the start")
+
+    # The best command of a state is the first one that leads to a state
+    # with one move less
+    for number in range(len(states)):
+        if remaining[number] == -1:
+            continue
+        best = 0
+        if remaining[number]:
+            for command in range(commands):
+                after = successors[number * commands + command]
+                if after != -1 and remaining[after] == \
+                    remaining[number] - 1:
+                    best = command
+                    break
+        policy.table[states[number]] = (best, remaining[number])
+    policy.optimal = remaining[0]
+    return policy
+
+def build_task(task):
+    '''Builds the policy of a level file in a worker process. Returns a
+    record with the policy as bytes, or with the error.
+    '''
+    (mission, level, filename, max_states) = task
+    record = {"file": filename}
+    try:
+        level_data = parse_json.load_level(filename)
+        record["key"] = solution_store.get_level_key(level_data)
+        policy = build(simulator_module.get_simulator(level_data), \
+            max_states)
+        if policy is not None:
+            record["states"] = len(policy.table)
+            record["data"] = policy.to_bytes()
+    except Exception:
+        record["error"] = traceback.format_exc().strip().split("\n")[-1]
+    return record
+
+def build_all(store, directory, max_states, workers):
+    '''Builds the policies of every level of a directory that doesn't have
+    one in the store yet. Returns the number of levels that were built,
+    that were too large and that failed.
+    '''
+    tasks = []
+    for (mission, level, filename) in parse_json.find_levels(directory):
+        key = solution_store.get_level_key(parse_json.load_level(filename))
+        if store.get_policy(key) is None:
+            tasks.append((mission, level, filename, max_states))
+
+    counts = {"built": 0, "too large": 0, "failed": 0}
+    if workers == 1:
+        records = map(build_task, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers)
+        records = pool.imap(build_task, tasks, chunksize=1)
+    try:
+        for record in records:
+            if "error" in record:
+                sys.stderr.write("%s: %s\n" % (record["file"], \
+                    record["error"]))
+                counts["failed"] += 1
+            elif "data" not in record:
+                counts["too large"] += 1
+            else:
+                store.put_policy(record["key"], record["states"], \
+                    record["data"])
+                counts["built"] += 1
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return counts
+
+def get_arguments(argv):
+    '''Parses the command line arguments.'''
+    parser = argparse.ArgumentParser(description="Builds the hint " + \
+        "policies of the levels of a directory into the solution store.")
+    parser.add_argument("directory", nargs="?", default="Json", \
+        help="directory or bundle with the missionX-levelY.json files")
+    parser.add_argument("--store", default=solution_store.DEFAULT_STORE, \
+        help="SQLite file of the solution store")
+    parser.add_argument("--max-states", type=int, default=MAX_STATES, \
+        help="most states of a level that gets a policy")
+    parser.add_argument("--workers", type=int, default=None, \
+        help="number of worker processes (default: number of cpus)")
+    return parser.parse_args(argv)
+
+def main():
+    args = get_arguments(sys.argv[1:])
+    store = solution_store.SolutionStore(args.store)
+    try:
+        counts = build_all(store, args.directory, args.max_states, \
+            args.workers)
+    finally:
+        store.close()
+    print("%d policies built, %d level(s) too large, %d failed" % \
+        (counts["built"], counts["too large"], counts["failed"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,483 @@
+'''
+    File: hint_server.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file contains a hint server. The server keeps the levels and their
+    solutions in memory, so a hint only has to be generated and not the
+    whole level solved again. Levels that aren't solved yet are solved by a
+    bounded pool of worker processes.
+
+    Ask for a hint with a POST to /hint with the json body
+    {"mission": 1, "level": 2, "moveList": [...], "goalsCollected": [...]}.
+    The answer contains the best solution and the hint. With "resume": true
+    in the body the hint is based on the path from where the moves end.
+
+    A solve that takes longer than the --timeout keeps running for the
+    next request, but no longer counts against --max-pending, and a worker
+    stops a solve after --solve-limit seconds.
+
+    With --solver anytime and a --budget below the --timeout, every level
+    is answered within the timeout. "proven" in the best solution tells
+    if the path is the shortest or if the budget ran out before.
+
+    When the store has the hint policy of a level (see hint_policy.py),
+    the next move is looked up in it instead of solved, and a level that
+    isn't solved yet takes its best path from the policy. Policies are
+    loaded in a thread, so a large one doesn't hold up other requests.
+
+    Run it by typing hint_server.py in the console, see hint_server.py -h
+    for the options.
+'''
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import signal
+import sys
+import anytime
+import batch
+import hint_generation
+import hint_policy
+import leg_cache
+import main
+import parse_json
+import resume
+import simulator
+import solution_store
+
+# Largest request body that is accepted
+MAX_BODY = 1 << 16
+
+# Number of level and resumed solutions that are kept in memory
+MAX_SOLUTIONS = 1000
+MAX_RESUMED = 10000
+
+# Seconds a worker may spend on one solve
+SOLVE_LIMIT = 60.0
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", \
+    405: "Method Not Allowed", 413: "Payload Too Large", \
+    500: "Internal Server Error", 503: "Service Unavailable", \
+    504: "Gateway Timeout"}
+
+class HintError(Exception):
+    '''An error that is answered with a HTTP status.'''
+    def __init__(self, status, message):
+        Exception.__init__(self, message)
+        self.status = status
+
+def stop_solve(signum, frame):
+    raise TimeoutError("the solve was stopped by the solve limit")
+
+def run_limited(limit, function, *args):
+    '''Runs a solve in a worker process and stops it with a TimeoutError
+    after limit seconds, where the platform has interval timers.
+    '''
+    if not limit or not hasattr(signal, "setitimer"):
+        return function(*args)
+    previous = signal.signal(signal.SIGALRM, stop_solve)
+    signal.setitimer(signal.ITIMER_REAL, limit)
+    try:
+        return function(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+class HintServer(object):
+    def __init__(self, directory="Json", solver="branch_bound", workers=None, \
+            timeout=10.0, max_pending=16, store=None, budget=None, \
+            max_resumed=MAX_RESUMED, max_solutions=MAX_SOLUTIONS, \
+            solve_limit=SOLVE_LIMIT):
+        self.directory = directory
+        self.solver = solver
+        self.timeout = timeout
+        self.budget = budget
+        self.max_pending = max_pending
+        self.solve_limit = solve_limit
+        self.store = store
+        self.executor = concurrent.futures.ProcessPoolExecutor(workers)
+
+        # Grids, goal lists and simulators by level hash, and the solves
+        # that are still running by level hash (and user state when
+        # resumed), of which the ones in late went past the timeout
+        self.grids = {}
+        self.policies = {}
+        self.pending = {}
+        self.late = set()
+        self.requests = 0
+
+        # Solutions by level hash and, as users can end in almost any
+        # state, resumed solutions by state are kept in bounded caches with
+        # the least recently used one removed
+        self.solutions = leg_cache.LegCache(max_solutions)
+        self.resumed = leg_cache.LegCache(max_resumed)
+
+    def get_filename(self, mission, level):
+        '''Returns the file of a level, the mission and level have to be
+        numbers so no other files can be asked for.
+        '''
+        if not str(mission).isdigit() or not str(level).isdigit():
+            raise HintError(400, "mission and level must be numbers")
+        filename = os.path.join(self.directory, "mission" + str(mission) + \
+            "-level" + str(level) + ".json")
+        if not parse_json.has_level(filename):
+            raise HintError(404, "unknown level %s-%s" % (mission, level))
+        return filename
+
+    def get_grid(self, level):
+        '''Returns the grid, goal list and simulator of a level.'''
+        known = self.grids.get(level.digest)
+        if known is None:
+            grid = parse_json.get_grid(level)
+            known = (grid, main.create_goal_list(grid), \
+                simulator.get_simulator(level, grid))
+            self.grids[level.digest] = known
+        return known
+
+    def load_policy(self, level, level_simulator):
+        '''Reads the hint policy of a level from the store, or returns None
+        when the store has none. Runs in a thread of the event loop.
+        '''
+        data = self.store.get_policy(solution_store.get_level_key(level))
+        if data is None:
+            return None
+        return hint_policy.load(level_simulator, data)
+
+    async def get_policy(self, level, level_simulator):
+        '''Returns the hint policy of a level from the store, or None when
+        the store has none. A policy is loaded once, requests that come in
+        while it is loading wait for the same load.
+        '''
+        if self.store is None:
+            return None
+        future = self.policies.get(level.digest)
+        if future is None:
+            loop = asyncio.get_event_loop()
+            future = loop.run_in_executor(None, self.load_policy, level, \
+                level_simulator)
+            self.policies[level.digest] = future
+            future.add_done_callback(lambda done: \
+                self.policy_loaded(level.digest, done))
+
+        # Like a solve, the load keeps running after a timeout
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), \
+                self.timeout)
+        except asyncio.TimeoutError:
+            raise HintError(504, "loading the hint policy took too long")
+
+    def policy_loaded(self, digest, future):
+        '''Forgets a load that failed, so the next request tries again.'''
+        if future.cancelled() or future.exception() is not None:
+            del self.policies[digest]
+
+    async def get_known_solution(self, level):
+        '''Returns the solution of a level from memory or the store, or
+        None when the level isn't solved yet. The store is read in a
+        thread of the event loop.
+        '''
+        record = self.solutions.get(level.digest)
+        if record is None and self.store is not None:
+            loop = asyncio.get_event_loop()
+            record = await loop.run_in_executor(None, self.store.get, \
+                solution_store.get_level_key(level), self.solver)
+            if record is not None:
+                self.solutions.put(level.digest, record)
+        return record
+
+    async def get_solution(self, filename, level):
+        '''Returns the solution of a level. A level that is solved already
+        is taken from memory or the store, otherwise it is solved by the
+        worker pool.
+        '''
+        record = await self.get_known_solution(level)
+        if record is not None:
+            return record
+        return await self.run_solve(level.digest, \
+            solution_store.get_level_key(level), batch.solve_level, \
+            filename, self.solver, self.budget)
+
+    async def get_policy_solution(self, level, policy):
+        '''Returns the solution of a level with a hint policy. A level
+        that isn't solved yet gets the best path of the policy, which is
+        kept in memory but not stored, as no solver found it.
+        '''
+        record = await self.get_known_solution(level)
+        if record is None:
+            record = policy.get_solution(level.best_solution)
+            self.solutions.put(level.digest, record)
+        return record
+
+    async def get_resumed(self, filename, level, moves):
+        '''Returns the state of the user after the moves and the solution
+        of the goals that are left. Solutions are kept by the state, so
+        users that end in the same state share the solve.
+        '''
+        (grid, goal_list, level_simulator) = self.get_grid(level)
+        state = resume.apply_moves(level_simulator, moves)
+        digest = (level.digest, state)
+        record = self.resumed.get(digest)
+        if record is None:
+            record = await self.run_solve(digest, None, resume.resume_level, \
+                filename, moves)
+        return record
+
+    async def run_solve(self, digest, key, function, *args):
+        '''Runs a solve in the worker pool. Requests for a solve that is
+        still running wait for the same solve. Solves that went past the
+        timeout don't count against max_pending, so a few slow levels
+        can't keep new levels out.
+        '''
+        future = self.pending.get(digest)
+        if future is None:
+            if len(self.pending) - len(self.late) >= self.max_pending:
+                raise HintError(503, "too many levels are being solved")
+            loop = asyncio.get_event_loop()
+            future = loop.run_in_executor(self.executor, run_limited, \
+                self.solve_limit, function, *args)
+            self.pending[digest] = future
+            future.add_done_callback(lambda done: \
+                self.solved(digest, key, done))
+
+        # The solve keeps running after a timeout (till the solve limit),
+        # so the next request for the level can use it
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), \
+                self.timeout)
+        except asyncio.TimeoutError:
+            if digest in self.pending:
+                self.late.add(digest)
+            raise HintError(504, "solving the level took too long")
+
+    def solved(self, digest, key, future):
+        '''Keeps the solution of a finished solve. Solutions of a level
+        (not of a resumed state) are stored in the store as well, in a
+        thread of the event loop, unless the anytime solver ran out of time
+        before it proved its path.
+        '''
+        del self.pending[digest]
+        self.late.discard(digest)
+        if future.cancelled() or future.exception() is not None:
+            return
+        record = future.result()
+        if key is None:
+            self.resumed.put(digest, record)
+            return
+        self.solutions.put(digest, record)
+        if self.store is not None and record.get("proven", True):
+            loop = asyncio.get_event_loop()
+            loop.run_in_executor(None, self.store.put, key, self.solver, \
+                record)
+
+    async def get_hint(self, request):
+        '''Returns the answer to a hint request.'''
+        if not isinstance(request, dict):
+            raise HintError(400, "request must be a json object")
+        try:
+            filename = self.get_filename(request["mission"], request["level"])
+        except KeyError as error:
+            raise HintError(400, "missing field %s" % error)
+        moves = request.get("moveList", [])
+        goals_collected = request.get("goalsCollected", [])
+        if not isinstance(moves, list) or \
+            not isinstance(goals_collected, list) or \
+            not all(isinstance(goal, int) for goal in goals_collected):
+            raise HintError(400, "moveList and goalsCollected must be lists")
+
+        # The goals are taken from playing the moves, not from what the
+        # client says was collected
+        level = parse_json.load_level(filename)
+        (grid, goal_list, level_simulator) = self.get_grid(level)
+        validation = level_simulator.validate(moves, goals_collected)
+        if validation["status"] == simulator.INVALID:
+            raise HintError(400, "unknown move %r" % \
+                (moves[validation["moves"]],))
+        # With a policy the next move is looked up, and nothing has to be
+        # solved
+        policy = await self.get_policy(level, level_simulator)
+        advice = None
+        resumed = None
+        try:
+            if policy is not None:
+                advice = policy.get_advice(moves)
+                record = await self.get_policy_solution(level, policy)
+            else:
+                record = await self.get_solution(filename, level)
+                if request.get("resume", False):
+                    resumed = await self.get_resumed(filename, level, moves)
+        except HintError:
+            raise
+        except Exception as error:
+            raise HintError(500, "solving the level failed: %r" % error)
+        hint = hint_generation.Hint_generation(moves, record["commands"], \
+            validation["goalsCollected"], goal_list, \
+            tuple(record["permutation"]), verbose=False, resumed=resumed, \
+            policy=advice)
+        answer = {
+            "mission": int(request["mission"]),
+            "level": int(request["level"]),
+            "solver": self.solver,
+            "best": {"commands": record["commands"], \
+                "permutation": record["permutation"], \
+                "length": record["length"], "best": record["best"], \
+                "proven": record.get("proven")},
+            "hint": hint.get_hint(),
+            "validation": validation,
+        }
+        if resumed is not None:
+            answer["resumed"] = resumed["solution"]
+        if advice is not None:
+            answer["policy"] = advice
+        return answer
+
+    def get_health(self):
+        '''Returns the state of the server.'''
+        return {"status": "ok", "levels": len(self.grids), \
+            "solutions": len(self.solutions.legs), \
+            "resumed": len(self.resumed.legs), "pending": len(self.pending), \
+            "late": len(self.late), "requests": self.requests}
+
+    async def respond(self, method, path, body):
+        '''Returns the status and json answer of a request.'''
+        self.requests += 1
+        if path == "/health":
+            if method != "GET":
+                raise HintError(405, "use GET for /health")
+            return 200, self.get_health()
+        if path != "/hint":
+            raise HintError(404, "unknown path %s" % path)
+        if method != "POST":
+            raise HintError(405, "use POST for /hint")
+        try:
+            request = json.loads(body.decode("utf-8"))
+        except ValueError:
+            raise HintError(400, "request is not valid json")
+        return 200, await self.get_hint(request)
+
+    async def handle(self, reader, writer):
+        '''Answers the requests of one connection. The connection is kept
+        open until the client closes it or asks to close it.
+        '''
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    (method, path, version) = line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    (name, _, value) = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = version == "HTTP/1.1" and \
+                    headers.get("connection", "").lower() != "close"
+                try:
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY:
+                        keep_alive = False
+                        raise HintError(413, "request body is too large")
+                    body = await reader.readexactly(length)
+                    (status, answer) = await self.respond(method, path, body)
+                except HintError as error:
+                    (status, answer) = (error.status, {"error": str(error)})
+                except ValueError:
+                    keep_alive = False
+                    (status, answer) = (400, {"error": "bad content length"})
+                except Exception as error:
+                    (status, answer) = (500, {"error": repr(error)})
+
+                self.write_answer(writer, status, answer, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def write_answer(self, writer, status, answer, keep_alive):
+        '''Writes a json answer to a connection.'''
+        content = json.dumps(answer).encode("utf-8")
+        head = "HTTP/1.1 %d %s\r\n" % (status, REASONS[status]) + \
+            "Content-Type: application/json\r\n" + \
+            "Content-Length: %d\r\n" % len(content) + \
+            "Connection: %s\r\n\r\n" % ("keep-alive" if keep_alive \
+            else "close")
+        writer.write(head.encode("latin-1") + content)
+
+    def close(self):
+        self.executor.shutdown()
+        if self.store is not None:
+            self.store.close()
+
+def get_arguments(argv):
+    '''Parses the command line arguments.'''
+    parser = argparse.ArgumentParser(description="Serves hints for " + \
+        "Bomberbot levels over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", \
+        help="address to listen on")
+    parser.add_argument("--port", type=int, default=8080, \
+        help="port to listen on")
+    parser.add_argument("--directory", default="Json", \
+        help="directory or bundle with the missionX-levelY.json files")
+    parser.add_argument("--solver", choices=sorted(main.SOLVERS), \
+        default="branch_bound", help="goal ordering solver to use")
+    parser.add_argument("--workers", type=int, default=None, \
+        help="number of solver processes (default: number of cpus)")
+    parser.add_argument("--timeout", type=float, default=10.0, \
+        help="seconds a request waits for a solve")
+    parser.add_argument("--max-pending", type=int, default=16, \
+        help="number of levels that can be solved at the same time")
+    parser.add_argument("--budget", type=float, default=None, \
+        help="seconds the anytime solver may search (default: %s)" % \
+        anytime.DEFAULT_BUDGET)
+    parser.add_argument("--store", default=None, \
+        help="SQLite file of the solution store to use")
+    parser.add_argument("--max-solutions", type=int, \
+        default=MAX_SOLUTIONS, help="number of level solutions kept in " + \
+        "memory")
+    parser.add_argument("--max-resumed", type=int, default=MAX_RESUMED, \
+        help="number of resumed solutions kept in memory")
+    parser.add_argument("--solve-limit", type=float, default=SOLVE_LIMIT, \
+        help="seconds a worker may spend on one solve (0: no limit)")
+    return parser.parse_args(argv)
+
+async def serve(server, host, port):
+    '''Runs the server until it is interrupted.'''
+    listener = await asyncio.start_server(server.handle, host, port)
+    print("Serving hints on http://%s:%d" % (host, port))
+    sys.stdout.flush()
+    async with listener:
+        await listener.serve_forever()
+
+def main_server():
+    args = get_arguments(sys.argv[1:])
+    store = None
+    if args.store is not None:
+        store = solution_store.SolutionStore(args.store)
+    server = HintServer(args.directory, args.solver, args.workers, \
+        args.timeout, args.max_pending, store, args.budget, \
+        args.max_resumed, args.max_solutions, args.solve_limit)
+    try:
+        asyncio.run(serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main_server()
@@ -0,0 +1,170 @@
+'''
+    File: jump_point.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file contains jump point search, a version of A* for open floors.
+    On a floor where every move costs the same, A* puts almost every tile
+    in the opened list. Jump point search scans in a straight line from a
+    tile instead, and only stops at tiles where a shorter path could turn
+    (a tile with a forced neighbour, the rules for grids without diagonal
+    moves). Only those jump points are put in the opened list, with the
+    cost of the whole straight line.
+
+    Next to bricks and rubies the cost of a move depends on the direction
+    of the bot, so when the bot has a hammer every tile up to two moves
+    from an object that hasn't been destroyed is a jump point, and these
+    tiles and the smashed objects are expanded like A* does. The heuristic
+    is the manhattan distance, since the scaled euclidean one of A* would
+    make jump points be searched more than once.
+
+    JumpPointSearch.process returns the same path, end direction and
+    rotations as AStar.process.
+'''
+
+import astar
+import tile_grid
+
+class JumpPointSearch(astar.AStar):
+    def get_heuristic(self, index):
+        '''Returns the manhattan distance to the end.'''
+        return self.get_distance(index, self.end_index)
+
+    def is_open(self, x, y):
+        '''Checks if the tile at the given coordinates is in the grid and
+        can be walked on without smashing it.
+        '''
+        if not (0 <= x < self.grid_width and 0 <= y < self.grid_height):
+            return False
+        index = y * self.grid_width + x
+        return self.grid.codes[index] in tile_grid.WALKABLE or \
+            index in self.destroyed
+
+    def mark_special(self):
+        '''Marks the tiles up to two moves from the objects that haven't
+        been destroyed, when the bot has a hammer. The scans stop at these
+        tiles. The second ring lets the search find the tile from which the
+        bot walks towards an object, so it faces the object without a turn.
+        '''
+        grid = self.grid
+        self.special = bytearray(grid.size)
+        if not self.has_hammer:
+            return
+        ring = [index for index in grid.destroyables if \
+            index not in self.destroyed]
+        for i in range(2):
+            next_ring = []
+            for index in ring:
+                for edge in range(grid.offsets[index], \
+                    grid.offsets[index+1]):
+                    adj = grid.neighbors[edge]
+                    if not self.special[adj]:
+                        self.special[adj] = 1
+                        next_ring.append(adj)
+            ring = next_ring
+
+    def jump(self, index, direction):
+        '''Scans from a tile in a direction. Returns the first jump point,
+        or -1 when the scan hits a wall or the edge of the grid.
+        '''
+        (dx, dy) = tile_grid.DELTAS[direction]
+        (x, y) = self.get_coords(index)
+        while True:
+            x += dx
+            y += dy
+            if not self.is_open(x, y):
+                return -1
+            index = y * self.grid_width + x
+            if index == self.end_index or self.special[index]:
+                return index
+
+            # A tile is a jump point when a tile beside it can only be
+            # reached through it
+            if dx != 0:
+                if (self.is_open(x, y - 1) and \
+                    not self.is_open(x - dx, y - 1)) or \
+                    (self.is_open(x, y + 1) and \
+                    not self.is_open(x - dx, y + 1)):
+                    return index
+            else:
+                if (self.is_open(x - 1, y) and \
+                    not self.is_open(x - 1, y - dy)) or \
+                    (self.is_open(x + 1, y) and \
+                    not self.is_open(x + 1, y - dy)):
+                    return index
+
+                # A vertical scan stops where a horizontal scan finds one
+                if self.jump(index, 0) != -1 or self.jump(index, 2) != -1:
+                    return index
+
+    def jump_from(self, index, direction):
+        '''Scans from a jump point in every direction but back, the bot
+        entered the jump point in the given direction.
+        '''
+        back = (direction + 2) % 4
+        for next_dir in range(4):
+            if next_dir == back:
+                continue
+            point = self.jump(index, next_dir)
+            if point != -1 and not self.closed[point]:
+                self.check_in_opened(index, point, \
+                    self.get_distance(index, point), 0, next_dir)
+
+    def fill_path(self, end):
+        '''Gives the tiles between the jump points on the path their parent,
+        so get_path returns every tile of the path.
+        '''
+        index = end
+        while self.parent[index] != -1:
+            parent = self.parent[index]
+            direction = self.parent_dir[index]
+            (dx, dy) = tile_grid.DELTAS[direction]
+            step = dy * self.grid_width + dx
+            previous = parent
+            tile = parent + step
+            while tile != index:
+                self.parent[tile] = previous
+                self.parent_dir[tile] = direction
+                self.smash_cost[tile] = 0
+                previous = tile
+                tile += step
+            self.parent[index] = previous
+            index = parent
+
+    def process(self):
+        '''Searches the path with jump points. Returns the path, the end
+        direction and the rotations like AStar.process, or None when the
+        end can't be reached.
+        '''
+        start = self.get_index(self.start)
+        self.end_index = end = self.get_index(self.end)
+        start_dir = tile_grid.DIRECTIONS.index(self.direction)
+        self.mark_special()
+        self.f[start] = self.get_heuristic(start)
+        self.push_opened(start)
+        while len(self.opened):
+            index = self.pop_opened()
+            self.pops += 1
+            if self.closed[index]:
+                continue
+
+            self.closed[index] = 1
+            self.expanded += 1
+            if index == end:
+                self.fill_path(end)
+                return self.get_path(start, end)
+
+            # The start, the tiles near objects and smashed objects are
+            # expanded like A* does, other tiles are scanned from
+            if self.parent[index] == -1:
+                self.expand(index, start_dir)
+            elif self.special[index] or \
+                self.grid.codes[index] in tile_grid.DESTROYABLE:
+                self.expand(index, self.parent_dir[index])
+            else:
+                self.jump_from(index, self.parent_dir[index])
+        return None
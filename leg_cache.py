@@ -0,0 +1,67 @@
+'''
+    File: leg_cache.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file contains a cache for the legs calculated by A*. The solvers
+    calculate the same legs (for instance from the start to the first goal)
+    over and over for different goal orders. The cost of a leg depends on
+    the direction the bot starts in and on the objects that have already
+    been destroyed, so both are part of the key. A cache belongs to one
+    level.
+
+'''
+
+from collections import OrderedDict
+import threading
+
+# Value stored for a leg whose end can't be reached
+UNREACHABLE = ()
+
+class LegCache(object):
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.legs = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_key(self, start, end, direction, destroyed):
+        '''Returns the key of a leg from the start tile index to the end tile
+        index, starting in a direction with a set of destroyed tile indices.
+        '''
+        return (start, end, direction, frozenset(destroyed))
+
+    def get(self, key):
+        '''Returns the cached leg of a key, or None if the leg hasn't been
+        cached. A found leg becomes the most recently used one.
+        '''
+        with self.lock:
+            leg = self.legs.get(key)
+            if leg is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.legs.move_to_end(key)
+            return leg
+
+    def put(self, key, leg):
+        '''Adds a leg to the cache. When the cache is full, the least
+        recently used leg is removed.
+        '''
+        with self.lock:
+            self.legs[key] = leg
+            self.legs.move_to_end(key)
+            while len(self.legs) > self.max_size:
+                self.legs.popitem(last=False)
+                self.evictions += 1
+
+    def get_stats(self):
+        '''Returns the hit and miss counters of the cache.'''
+        return {"hits": self.hits, "misses": self.misses, \
+            "evictions": self.evictions, "size": len(self.legs)}
@@ -0,0 +1,201 @@
+'''
+    File: level_bundle.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file packs the levels of a directory into one binary bundle, so
+    the level files (full of rules and messages the solvers never use)
+    don't have to be decoded every time a process starts.
+
+    A bundle starts with an index of (mission, level, offset, length), and
+    every level is stored as its dimensions, start, direction, hammer, best
+    solution and content hash, followed by the tile codes, the ice flags
+    and the tile string. A bundle is opened with mmap, and the codes and
+    ice flags of a level are views of the mapped file instead of copies,
+    so a level is decoded without reading the rest of the bundle and all
+    processes that open the bundle share its pages.
+
+    A bundle can be used wherever a level directory is asked for: the
+    level file Json.bundle/mission1-level3.json is level 3 of mission 1 in
+    the bundle Json.bundle (see parse_json.load_level). Levels taken from
+    a bundle can't be pickled, since they hold views of the bundle.
+
+    Pack a directory by typing level_bundle.py [directory] [bundle] in the
+    console, see level_bundle.py -h for the options.
+'''
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import threading
+import parse_json
+import tile_grid
+
+MAGIC = b"BBLB"
+VERSION = 1
+
+# Header (magic, version, number of levels), index entries (mission,
+# level, offset, length) and level records (width, height, x, y,
+# direction, hammer, best solution, sha1 hash, length of the tile string)
+HEADER = struct.Struct("<4sHI")
+ENTRY = struct.Struct("<IIII")
+RECORD = struct.Struct("<HHHHBBi20sI")
+
+# Bundles opened by this process, by file name: ((mtime, size), bundle)
+bundles = {}
+bundles_lock = threading.Lock()
+
+def pack_level(level):
+    '''Returns the record of a level in a bundle.'''
+    (width, height) = level.dimension
+    tiles = level.tiles.encode("utf-8")
+    return RECORD.pack(width, height, level.pos_player[0], \
+        level.pos_player[1], tile_grid.DIRECTIONS.index(level.dir_player), \
+        bool(level.hammer), level.best_solution, \
+        bytes.fromhex(level.digest), len(tiles)) + bytes(level.codes) + \
+        bytes(level.slides) + tiles
+
+def build(directory, output):
+    '''Packs every level file of a directory into a bundle. Returns the
+    number of levels. The bundle is written to a temporary file first, so
+    processes that have the old bundle open keep a complete file.
+    '''
+    levels = [(mission, number, parse_json.load_level(filename)) for \
+        (mission, number, filename) in parse_json.find_levels(directory)]
+    records = [pack_level(level) for (mission, number, level) in levels]
+    offset = HEADER.size + ENTRY.size * len(records)
+    index = []
+    for i in range(len(records)):
+        index.append(ENTRY.pack(levels[i][0], levels[i][1], offset, \
+            len(records[i])))
+        offset += len(records[i])
+
+    temporary = "%s.%d.tmp" % (output, os.getpid())
+    with open(temporary, "wb") as bundle_file:
+        bundle_file.write(HEADER.pack(MAGIC, VERSION, len(records)))
+        bundle_file.write(b"".join(index))
+        bundle_file.write(b"".join(records))
+    os.replace(temporary, output)
+    return len(records)
+
+class LevelBundle(object):
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, "rb") as bundle_file:
+            self.data = mmap.mmap(bundle_file.fileno(), 0, \
+                access=mmap.ACCESS_READ)
+        self.view = memoryview(self.data)
+        (magic, version, count) = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("%s is not a level bundle of version %d" % \
+                (filename, VERSION))
+
+        # Index of the levels: (mission, level) to (offset, length)
+        self.index = {}
+        for i in range(count):
+            (mission, level, offset, length) = ENTRY.unpack_from( \
+                self.data, HEADER.size + i * ENTRY.size)
+            self.index[(mission, level)] = (offset, length)
+
+    def get_levels(self):
+        '''Returns the (mission, level) numbers of the bundle in order.'''
+        return sorted(self.index)
+
+    def get_level(self, mission, level):
+        '''Returns the Level of a mission and level number. Raises a
+        KeyError when the bundle doesn't have the level.
+        '''
+        (offset, length) = self.index[(mission, level)]
+        (width, height, x, y, direction, hammer, best, digest, \
+            tiles_length) = RECORD.unpack_from(self.data, offset)
+        size = width * height
+        start = offset + RECORD.size
+        tiles = bytes(self.view[start + 2 * size:start + 2 * size + \
+            tiles_length]).decode("utf-8")
+        return parse_json.Level(tiles=tiles, dimension=(width, height), \
+            pos_player=(x, y), best_solution=best, \
+            dir_player=tile_grid.DIRECTIONS[direction], \
+            hammer=bool(hammer), codes=self.view[start:start + size], \
+            slides=self.view[start + size:start + 2 * size], \
+            digest=digest.hex())
+
+def is_bundle(filename):
+    '''Checks if a file is a level bundle, by the magic at its start.
+    Other files aren't taken for a bundle.
+    '''
+    if not os.path.isfile(filename):
+        return False
+    try:
+        with open(filename, "rb") as bundle_file:
+            return bundle_file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def open_bundle(filename):
+    '''Returns the opened bundle of a file. A bundle is opened once per
+    process, and again when the file changes.
+    '''
+    stamp = parse_json.get_stamp(filename)
+    with bundles_lock:
+        known = bundles.get(filename)
+        if known is None or known[0] != stamp:
+            known = (stamp, LevelBundle(filename))
+            bundles[filename] = known
+    return known[1]
+
+def get_numbers(filename):
+    '''Returns the mission and level number of a level file name.'''
+    match = parse_json.LEVEL_NAME.match(os.path.basename(filename))
+    if match is None:
+        raise KeyError(os.path.basename(filename))
+    return int(match.group(1)), int(match.group(2))
+
+def load_level(filename):
+    '''Returns the Level of a level file in a bundle, for instance
+    Json.bundle/mission1-level3.json.
+    '''
+    bundle = open_bundle(os.path.dirname(filename))
+    return bundle.get_level(*get_numbers(filename))
+
+def has_level(filename):
+    '''Checks if the bundle of a level file in a bundle has the level.'''
+    try:
+        bundle = open_bundle(os.path.dirname(filename))
+        return get_numbers(filename) in bundle.index
+    except (OSError, ValueError, KeyError, struct.error):
+        return False
+
+def find_levels(filename):
+    '''Returns the level files of a bundle like parse_json.find_levels.'''
+    return [(mission, level, os.path.join(filename, "mission%d-level%d" \
+        ".json" % (mission, level))) for (mission, level) in \
+        open_bundle(filename).get_levels()]
+
+def get_arguments(argv):
+    '''Parses the command line arguments.'''
+    parser = argparse.ArgumentParser(description="Packs the levels of a " + \
+        "directory into one bundle.")
+    parser.add_argument("directory", nargs="?", default="Json", \
+        help="directory with the missionX-levelY.json files")
+    parser.add_argument("bundle", nargs="?", default=None, \
+        help="bundle file to write (default: the directory name + .bundle)")
+    return parser.parse_args(argv)
+
+def main():
+    args = get_arguments(sys.argv[1:])
+    output = args.bundle
+    if output is None:
+        output = os.path.normpath(args.directory) + ".bundle"
+    count = build(args.directory, output)
+    print("%d levels packed into %s (%d bytes)" % (count, output, \
+        os.path.getsize(output)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+'''
+    File: load_test.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file puts load on a running hint server. A number of clients send
+    the demos of the demo file as hint requests over kept open connections,
+    afterwards the throughput and the latencies are printed.
+
+    Start the server with hint_server.py and run it by typing load_test.py
+    in the console, see load_test.py -h for the options.
+'''
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import parse_json
+
+def get_requests(filename):
+    '''Returns the hint requests for every demo of the demo file.'''
+    requests = []
+    demos = parse_json.load_demos(filename)
+    for mission in sorted(demos, key=int):
+        for level in sorted(demos[mission], key=int):
+            demo = demos[mission][level]
+            requests.append({"mission": mission, "level": level, \
+                "moveList": demo["moveList"], \
+                "goalsCollected": demo["goalsCollected"]})
+    return requests
+
+async def send(reader, writer, host, body):
+    '''Sends one hint request and returns the status of the answer.'''
+    writer.write(("POST /hint HTTP/1.1\r\nHost: %s\r\n" % host + \
+        "Content-Type: application/json\r\n" + \
+        "Content-Length: %d\r\n\r\n" % len(body)).encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        (name, _, value) = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+async def client(host, port, bodies, count, latencies, statuses):
+    '''Sends count requests over one connection.'''
+    (reader, writer) = await asyncio.open_connection(host, port)
+    try:
+        for i in range(count):
+            start_time = time.perf_counter()
+            status = await send(reader, writer, host, bodies[i % len(bodies)])
+            latencies.append(time.perf_counter() - start_time)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+def get_percentile(values, percentile):
+    '''Returns a percentile of sorted values.'''
+    if not values:
+        return 0.0
+    index = int(round(percentile / 100.0 * (len(values) - 1)))
+    return values[index]
+
+async def run(host, port, requests, clients, count):
+    '''Runs the clients and returns the latencies, the status counts and
+    the total time.
+    '''
+    bodies = [json.dumps(request).encode("utf-8") for request in requests]
+    latencies = []
+    statuses = {}
+    start_time = time.perf_counter()
+    # Every client starts at another demo
+    await asyncio.gather(*[client(host, port, bodies[i:] + bodies[:i], \
+        count, latencies, statuses) for i in range(clients)])
+    return latencies, statuses, time.perf_counter() - start_time
+
+def get_arguments(argv):
+    '''Parses the command line arguments.'''
+    parser = argparse.ArgumentParser(description="Puts load on a " + \
+        "running hint server.")
+    parser.add_argument("--host", default="127.0.0.1", \
+        help="address of the server")
+    parser.add_argument("--port", type=int, default=8080, \
+        help="port of the server")
+    parser.add_argument("--demos", default="Json/demo.json", \
+        help="demo file to take the requests from")
+    parser.add_argument("--clients", type=int, default=8, \
+        help="number of connections that send requests at the same time")
+    parser.add_argument("--requests", type=int, default=100, \
+        help="number of requests per client")
+    return parser.parse_args(argv)
+
+def main():
+    args = get_arguments(sys.argv[1:])
+    requests = get_requests(args.demos)
+    (latencies, statuses, total) = asyncio.run(run(args.host, args.port, \
+        requests, args.clients, args.requests))
+    latencies.sort()
+    print("Requests: %d in %.3f seconds (%.1f per second)" % \
+        (len(latencies), total, len(latencies) / total))
+    print("Latency p50: %.2f ms | p99: %.2f ms | max: %.2f ms" % \
+        (get_percentile(latencies, 50) * 1000, \
+        get_percentile(latencies, 99) * 1000, latencies[-1] * 1000))
+    print("Status:", ", ".join("%d: %d" % (status, statuses[status]) \
+        for status in sorted(statuses)))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,32 +9,86 @@
     File description:
     This file contains the main file in order to run the program. 
 '''
+import argparse
 import parse_json
-import parse_output
-import objects
 import hint_generation
 import copy
+import anytime
 import astar
+import bidirectional
+import dial
+import jump_point
 import time
 import sys
 import brute_force
+import branch_bound
+import held_karp
+import parallel
+import resume
+import simulator
+import solution_store
+import state_search
+import stats
+import tile_grid
+
+# Solvers that can be chosen with --solver
+SOLVERS = {
+    "anytime": anytime.Anytime,
+    "brute_force": brute_force.Brute_force,
+    "branch_bound": branch_bound.BranchBound,
+    "held_karp": held_karp.HeldKarp,
+    "parallel": parallel.ParallelBruteForce,
+    "state_search": state_search.StateSearch,
+}
+
+# Searches for the legs of a solver that can be chosen with --search
+SEARCHES = {
+    "astar": astar.AStar,
+    "bidirectional": bidirectional.BidirectionalAStar,
+    "dial": dial.DialSearch,
+    "jps": jump_point.JumpPointSearch,
+}
+
+def get_arguments(argv):
+    '''Parses the command line arguments.'''
+    parser = argparse.ArgumentParser(description="Solves a Bomberbot " + \
+        "level and generates a hint for the demo of the level.")
+    parser.add_argument("mission", help="mission number")
+    parser.add_argument("level", help="level number")
+    parser.add_argument("--solver", choices=sorted(SOLVERS), \
+        default="brute_force", help="goal ordering solver to use")
+    parser.add_argument("--search", choices=sorted(SEARCHES), \
+        default="astar", help="search used for the legs between goals")
+    parser.add_argument("--workers", type=int, default=None, \
+        help="number of worker processes of the parallel solver")
+    parser.add_argument("--budget", type=float, default=None, \
+        help="seconds the anytime solver may search (default: %s)" % \
+        anytime.DEFAULT_BUDGET)
+    parser.add_argument("--store", default=None, \
+        help="SQLite file of the solution store to look the level up in")
+    parser.add_argument("--resume", action="store_true", \
+        help="base the hint on the path from where the demo ends")
+    parser.add_argument("--profile", action="store_true", \
+        help="print the phase times and solver counters as json")
+    return parser.parse_args(argv)
 
 def main():
     # Selecting level
-    filename = "Json/mission" + sys.argv[1] + "-level" + sys.argv[2] + ".json"
+    args = get_arguments(sys.argv[1:])
+    filename = "Json/mission" + args.mission + "-level" + args.level + ".json"
 
     # Initializing variables
     start_time = time.time()
-    tile_list = []
-    tiles = parse_json.get_tiles(filename)
-    dimension = parse_json.get_dimensions(filename)
-    has_hammer = parse_json.has_hammer(filename)
-    start_location = parse_json.get_pos_player(filename)
-    direction = parse_json.get_dir_player(filename)
-    best_solution = parse_json.get_best_solutions(filename)
+    run_stats = stats.Stats()
+    run_stats.start("parse")
+    level = parse_json.load_level(filename)
+    has_hammer = level.hammer
+    start_location = level.pos_player
+    direction = level.dir_player
+    best_solution = level.best_solution
 
     # Searching for a demo for the level
-    demo = parse_json.get_demo(sys.argv[1],sys.argv[2])
+    demo = parse_json.get_demo(args.mission, args.level)
     if demo is not None:
         moves = demo[0]
         goals_collected =  demo[1]
@@ -44,27 +98,52 @@ def main():
         goals_collected = []
     
     # Creating the tile grid
-    rows = tiles.split(';')
-    for y in range(len(rows)):
-        row = rows[y].split(',')
-        for x in range(len(row)):
-            tile_list.append(create_tile(row[x], x, y))
+    run_stats.start("grid")
+    grid = parse_json.get_grid(level)
 
     # Ceating the goal list
-    goal_list = create_goal_list(tile_list)
-    
-    # Receiving the start location on the tiles 
-    start_tile = get_tile(tile_list, start_location[0], start_location[1], \
-        dimension[1], dimension[0])
+    goal_list = create_goal_list(grid)
 
-    # Calling the brute force algorithm
-    b = brute_force.Brute_force(dimension[1], dimension[0], tile_list, \
-        goal_list, best_solution, start_tile, has_hammer, direction)
-    best_path, rotations, permutations = b.solve()
+    # Playing the moves of the demo to check the goals it collected
+    run_stats.start("validate")
+    validation = simulator.get_simulator(level, grid).validate(moves, \
+        goals_collected)
+    if not validation["claimOk"]:
+        print("Goals collected by the demo don't match its moves, " + \
+            "using", validation["goalsCollected"])
+        goals_collected = validation["goalsCollected"]
+
+    # Receiving the start location on the tiles
+    run_stats.start("solve")
+    start_tile = get_tile(grid, start_location[0], start_location[1])
+
+    # Looking the solution up in the store, the level is solved and stored
+    # when it's not known yet
+    b = None
+    if args.store is not None:
+        store = solution_store.SolutionStore(args.store)
+        record = store.get_solution(level, args.solver)
+        store.close()
+        best_path = [get_tile(grid, x, y) for (x, y) in record["path"]]
+        permutations = tuple(record["permutation"])
+        output = record["commands"]
+
+    # Calling the solver, the brute force algorithm by default
+    else:
+        options = {}
+        if args.solver == "parallel":
+            options["workers"] = args.workers
+        elif args.solver == "anytime":
+            options["budget"] = args.budget
+        b = SOLVERS[args.solver](grid, goal_list, best_solution, \
+            start_tile, has_hammer, direction, **options)
+        b.leg_search = SEARCHES[args.search]
+        best_path, rotations, permutations = b.solve()
 
-    # Displaying the answer in commando's 
-    output = parse_output.parse(best_path, start_tile, best_solution, \
-        rotations)
+        # Displaying the answer in commando's
+        run_stats.start("parse_output")
+        output = b.get_commands(best_path, rotations)
+    run_stats.stop()
 
     print("--- Level information ---")
     print("Starting location: (" + str(start_location[0]) + ", " + \
@@ -72,107 +151,95 @@ def main():
     print("Starting direction:", direction)
 
     # Displaying the grid for the users
-    display_grid(start_location, dimension, tiles)
+    display_grid(start_location, grid)
 
     print("\n--- Path info ---")
     print ('Path found:', len(best_path), 'moves. |  ' 'Best solution:', \
         best_solution,' moves. | Permutation used', permutations)
     print("Best path: ", ', '.join(output))
     print("User path: ",', '.join(moves))
+    if b is None:
+        print("Solution looked up in the store")
+    else:
+        print("Leg cache:", b.cache.hits, "hits |", b.cache.misses, "misses")
+    if b is not None and args.solver == "branch_bound":
+        print("Search nodes:", b.nodes, "| Pruned:", b.pruned, \
+            "| Permutations:", b.permutation_count())
+    if b is not None and args.solver == "anytime":
+        if b.proven:
+            proven = "yes"
+        elif b.best_length == anytime.INFINITY:
+            proven = "no (no path collects every goal)"
+        else:
+            proven = "no (the budget ran out)"
+        print("Greedy path:", b.greedy_length, "moves | Proven shortest:", \
+            proven)
+
+    # Solving the goals that are left from where the user is
+    resumed = None
+    if args.resume:
+        run_stats.start("resume")
+        resumed = resume.resume(level, moves, grid, goal_list)
+        run_stats.stop()
+        print("\n--- Resumed path ---")
+        state = resumed["state"]
+        print("User position: (" + str(state["position"][0]) + ", " + \
+            str(state["position"][1]) + ") facing", state["direction"])
+        if resumed["solution"] is not None:
+            print("Remaining path:", \
+                ', '.join(resumed["solution"]["commands"]))
 
     # Creating hints for the user if necessary
     print("\n--- Hint generated ---")
+    run_stats.start("hint")
     hint = hint_generation.Hint_generation(moves, output, goals_collected, \
-        goal_list, permutations)
+        goal_list, permutations, resumed=resumed)
     hint.process()
+    run_stats.stop()
 
     print("\n--- Run time: ---")
     print("%s seconds" % (time.time() - start_time))
 
+    # Printing the phase times and the counters of the solver
+    if args.profile:
+        if b is not None:
+            run_stats.add_solver(b)
+        print("\n--- Profile ---")
+        print(run_stats.to_json())
 
-def create_goal_list(tile_list):
-    '''This function loops through every tile and adds every star, 
-    ruby or hammer it encounters to the goal list.  
+
+def create_goal_list(grid):
+    '''This function adds every star, ruby or hammer of the grid to the
+    goal list.
     '''
     goal_list = []
-    for tile in tile_list:
-        if tile.get_object_name() == "Star" or tile.get_object_name() == "Ruby" \
-            or tile.get_object_name() == "Hammer":
-            goal_list.append((tile, tile.obj))
+    for index in grid.get_goals():
+        tile = grid.tile(index)
+        goal_list.append((tile, tile.obj))
     return goal_list
 
 
-def get_tile(tile_list, x, y, height, width):
-    '''When given coordinates, this function calculates which tile
-    matches from the tile list.
+def get_tile(grid, x, y):
+    '''When given coordinates, this function returns the matching tile
+    of the grid.
     '''
-    return tile_list[y * width + x]
-
-def create_tile(value, x, y):
-    '''This function creates the tiles by the given values from the json 
-    file.
-    ''' 
-    slidable = False
-    abyss = False
-    tile = None
-    obj = None
-
-    if value[0] == "b":
-        slidable = True
-    if value[0] == ".":
-        obj = objects.Brick(False)
-    else:
-        if len(value) == 2:
-            if value[1] == "4":
-                obj = objects.Star()
-            elif value[1] == "3":
-                obj = objects.Ruby()
-            elif value[1] == "1":
-                obj = objects.Brick(True)
-            elif value[1] == "6":
-                obj = objects.Hammer()
-            else:
-                obj = objects.Brick(False)
-    tile = objects.Tile(slidable, obj, x, y)
-    return tile
-
-def display_grid(start_location, dimension, tiles):
-    grid = prep_grid(start_location, dimension, tiles)
-    printgrid(grid)
-
-def prep_grid(start_location, dimension, tiles):
-    '''This function displays the grid for the user.'''
-    grid = [([None]*dimension[0]) for i in range(dimension[1])]
+    return grid.tile(grid.get_index(x, y))
 
-    rows = tiles.split(';')
-    for y in range(len(rows)):
-        row = rows[y].split(',')
-        for x in range(len(row)):
-            grid[y][x] = create_tile(row[x], x, y)
+def display_grid(start_location, grid):
+    printgrid(prep_grid(start_location, grid))
 
+def prep_grid(start_location, grid):
+    '''This function displays the grid for the user.'''
+    symbols = {tile_grid.EMPTY: " ", tile_grid.STAR: "S", \
+        tile_grid.HAMMER: "H", tile_grid.RUBY: "R", tile_grid.BRICK: "D", \
+        tile_grid.WALL: "X", tile_grid.ABYSS: "X"}
+    display = [([None]*grid.width) for i in range(grid.height)]
+    for index in range(grid.size):
+        (x, y) = grid.get_coords(index)
+        display[y][x] = symbols[grid.codes[index]]
 
-    for i in range(len(grid)):
-        for j in range(len(grid[i])):
-            tile = grid[i][j]       
-            if tile.has_object():
-                if tile.get_object_name() == "Brick":
-                    if tile.obj.destroyable == True:
-                        grid[i][j] = "D"
-                    else:
-                        grid[i][j] = "X"
-                elif tile.get_object_name() == "Star":
-                    grid[i][j] = "S"
-                elif tile.get_object_name() == "Hammer":
-                    grid[i][j] = "H"
-                elif tile.get_object_name() == "Ruby":
-                    grid[i][j] = "R"
-                else:
-                    grid[i][j] = "?"
-            else:
-                grid[i][j] = " "
-
-    grid[start_location[1]][start_location[0]] = "B"
-    return grid
+    display[start_location[1]][start_location[0]] = "B"
+    return display
 
 def printgrid(grid):
     '''This function prints the grid to terminal'''
@@ -11,25 +11,18 @@
     a playable game world on which we can run our solver
 '''
 class Tile:
+    __slots__ = ("slideable", "obj", "x_coord", "y_coord")
+
     def __init__(self, slideable, obj, x, y):
         self.slideable = slideable
         self.obj = obj
         self.x_coord = x
         self.y_coord = y
 
-        # Values used by the A* algorithm to calculate the costs
-        self.parent = None
-        self.g = 0
-        self.h = 0
-        self.f = 0
-
     def is_walkable(self):
         '''Checks if the tiles is walkable.'''
         if self.obj is not None:
-            if self.obj.__class__.__name__ is 'Star' or \
-                self.obj.__class__.__name__ is 'Hammer':
-                return True
-            return False
+            return isinstance(self.obj, (Star, Hammer))
         return True
 
     def has_object(self):
@@ -42,43 +35,30 @@ class Tile:
         '''Returns the name of the object.'''
         return self.obj.__class__.__name__
 
-    def remove_object(self):
-        '''Removes the object from the tile.'''
-        self.has_object = False
-        self.obj = None
-
 class Star:
+    __slots__ = ("passed", "destroyable")
+
     def __init__(self):
         self.passed = False
         self.destroyable = False
 
 class Hammer:
+    __slots__ = ("passed", "destroyable")
+
     def __init__(self):
         self.passed = False
         self.destroyable = False
 
+# Rubies and bricks are never changed by the solvers. Which ones have been
+# destroyed is kept by the search itself (see astar.py).
 class Ruby:
-    def __init__(self, destroyable=True, destroyed=False):
-        self.destroyable = destroyable
-        self.destroyed = destroyed
-        self.destroy_cost = 0
+    __slots__ = ("destroyable",)
 
-    def destroy(self):
-        '''Destroy the object if the object is destroyable and not destroyed.'''
-        if self.destroyable and not self.destroyed:
-            self.destroyed = True
-            return True
-        return False
+    def __init__(self, destroyable=True):
+        self.destroyable = destroyable
 
 class Brick:
-    def __init__(self, destroyable, destroyed=False):
-        self.destroyable = destroyable
-        self.destroyed = destroyed
-        self.destroy_cost = 0
+    __slots__ = ("destroyable",)
 
-    def destroy(self):
-        '''Destroy the object if the object is destroyable and not destroyed.'''
-        if self.destroyable and not self.destroyed:
-            self.destroyed = True
-            return True
-        return False
\ No newline at end of file
+    def __init__(self, destroyable):
+        self.destroyable = destroyable
\ No newline at end of file
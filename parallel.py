@@ -0,0 +1,177 @@
+'''
+    File: parallel.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file contains a parallel version of the brute force solver. The
+    permutations are split by their first goals (the prefix) and every
+    prefix is searched depth first by a pool of worker processes.
+
+    The result is the one of the brute force solver, whatever the number
+    of workers: the first permutation whose path has the length of the
+    best solution wins, and without such a permutation no path is found.
+    The prefixes are numbered in the order of the permutations. Once a
+    prefix has found a path, the prefixes after it are stopped, and
+    searches that go past the best solution are cut off.
+
+'''
+
+import multiprocessing
+import os
+from itertools import permutations
+import brute_force
+
+# The solver and shared values of a worker process, set by init_worker
+worker = {}
+
+def init_worker(grid, goals, best_solution, start, has_hammer, direction, \
+    destroyed, leg_search, stop_task):
+    '''Prepares a worker process. The level is rebuilt from the goal and
+    start indices, so the tiles of the worker are its own.
+    '''
+    goal_list = [(grid.tile(i), grid.tile(i).obj) for i in goals]
+    solver = brute_force.Brute_force(grid, goal_list, best_solution, \
+        grid.tile(start), has_hammer, direction, destroyed=destroyed)
+    solver.leg_search = leg_search
+    worker["solver"] = solver
+    worker["stop_task"] = stop_task
+
+def search_task(task):
+    '''Searches the permutations that start with the prefix of a task.
+    Returns (permutation, path indices, rotations, nodes), or None when no
+    path was found.
+    '''
+    (number, prefix) = task
+    search = PrefixSearch(worker["solver"], number, prefix, \
+        worker["stop_task"])
+    return search.run()
+
+class PrefixSearch(object):
+    def __init__(self, solver, number, prefix, stop_task):
+        self.solver = solver
+        self.number = number
+        self.prefix = prefix
+        self.stop_task = stop_task
+        self.result = None
+        self.nodes = 0
+
+    def stopped(self):
+        '''Checks if this task found its path or an earlier task found
+        one.
+        '''
+        return self.result is not None or \
+            self.stop_task.value < self.number
+
+    def record(self, path_list, rotations, perm):
+        '''Keeps the path of the first permutation of the task that has the
+        length of the best solution, and stops the tasks after this one.
+        '''
+        solver = self.solver
+        rest = [i for i in range(len(solver.goal_list)) if i not in perm]
+        self.result = (tuple(perm) + tuple(rest), \
+            [solver.get_index(tile) for tile in path_list], list(rotations))
+        with self.stop_task.get_lock():
+            if self.number < self.stop_task.value:
+                self.stop_task.value = self.number
+
+    def search(self, perm, current_step, direction, destroyed, path_list, \
+        rotations):
+        '''Depth first search over the permutations, in the same order as
+        the brute force solver. Like the brute force solver, a path is
+        found after a goal when it has the length of the best solution and
+        every goal is collected.
+        '''
+        self.nodes += 1
+        solver = self.solver
+        if self.stopped():
+            return
+        if perm and len(path_list) == solver.best_solution and \
+            solver.check_list(path_list, destroyed):
+            self.record(path_list, rotations, perm)
+            return
+
+        # Paths only get longer, so a path past the best solution is done
+        if solver.best_solution is None or \
+            len(path_list) > solver.best_solution:
+            return
+
+        if len(perm) < len(self.prefix):
+            children = [self.prefix[len(perm)]]
+        else:
+            children = [i for i in range(len(solver.goal_list)) \
+                if i not in perm]
+        for i in children:
+            leg = solver.solve_leg(current_step, direction, \
+                solver.goal_list[i][0], destroyed)
+            if leg is None:
+                continue
+            steps, new_direction, rot, smashed = leg
+            new_path = path_list + steps
+            new_step = new_path[-1] if new_path else current_step
+            self.search(perm + [i], new_step, new_direction, \
+                destroyed | smashed, new_path, rotations + rot)
+
+    def run(self):
+        '''Runs the search of the task.'''
+        solver = self.solver
+        self.search([], solver.start, solver.direction, solver.destroyed, \
+            [], [])
+        if self.result is None:
+            return None
+        return self.result + (self.nodes,)
+
+class ParallelBruteForce(brute_force.Brute_force):
+    def __init__(self, grid, goal_list, best_solution, start, has_hammer, \
+        direction, cache=None, destroyed=frozenset(), workers=None, \
+        prefix_length=2):
+        brute_force.Brute_force.__init__(self, grid, goal_list, \
+            best_solution, start, has_hammer, direction, cache, destroyed)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.workers = workers
+        self.prefix_length = prefix_length
+        self.nodes = 0
+
+    def get_tasks(self):
+        '''Splits the permutations into tasks by their prefix, in the order
+        of the permutations.
+        '''
+        length = min(self.prefix_length, len(self.goal_list))
+        prefixes = permutations(range(len(self.goal_list)), length)
+        return list(enumerate(prefixes))
+
+    def solve(self):
+        '''Searches all prefixes with the worker pool and returns the path,
+        the rotations and the permutation, like Brute_force.solve.
+        '''
+        tasks = self.get_tasks()
+        stop_task = multiprocessing.Value('i', len(tasks))
+        initargs = (self.grid, [self.get_index(goal[0]) for goal in \
+            self.goal_list], self.best_solution, self.get_index(self.start), \
+            self.has_hammer, self.direction, self.destroyed, \
+            self.leg_search, stop_task)
+
+        # A single worker searches in this process
+        if self.workers == 1:
+            init_worker(*initargs)
+            results = [search_task(task) for task in tasks]
+        else:
+            pool = multiprocessing.Pool(self.workers, init_worker, initargs)
+            try:
+                results = pool.map(search_task, tasks, chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+
+        # The first task that found a path wins. The tasks before it were
+        # never stopped, so they searched every permutation.
+        self.nodes = sum(result[3] for result in results \
+            if result is not None)
+        if stop_task.value == len(tasks):
+            return [], [], ()
+        (perm, path, rotations, nodes) = results[stop_task.value]
+        return [self.grid.tile(i) for i in path], rotations, perm
@@ -7,52 +7,222 @@
     Created for the Bomberbot coorporation
 ---------------------------------------------
     File description:
-    This file contains functions in order to parse the json files from 
-    the puzzles. 
-'''
+    This file contains functions in order to parse the json files from
+    the puzzles.
 
+    load_level reads a level file once and returns a Level with everything
+    the solvers need, including the parsed tile codes. Parsed levels are
+    kept in memory and in a cache directory next to the level files, so a
+    level is only decoded again when its file changes. The cache is json,
+    not pickle, as level directories like the one of har_import.py are
+    written from outside data and loading a planted pickle runs code. A level file can
+    also be a level in a bundle (see level_bundle.py).
+'''
 
+import base64
+import collections
+import hashlib
 import json
+import os
+import re
+import threading
+import level_bundle
+import tile_grid
+
+# Version of the cached level format, cached levels of another version are
+# parsed again
+CACHE_VERSION = 2
+CACHE_DIRECTORY = ".level_cache"
+
+LEVEL_NAME = re.compile(r"^mission(\d+)-level(\d+)\.json$")
+
+Level = collections.namedtuple("Level", ["tiles", "dimension", \
+    "pos_player", "best_solution", "dir_player", "hammer", "codes", \
+    "slides", "digest"])
+
+# Levels parsed by this process, by file name: ((mtime, size), level)
+levels = {}
+levels_lock = threading.Lock()
+
+# Demo files loaded by this process, by file name: (mtime, demos)
+demos = {}
+
+def find_levels(directory):
+    '''Returns the level files of a directory or bundle, ordered by
+    mission and level number.
+    '''
+    if level_bundle.is_bundle(directory):
+        return level_bundle.find_levels(directory)
+    levels = []
+    for name in os.listdir(directory):
+        match = LEVEL_NAME.match(name)
+        if match:
+            levels.append((int(match.group(1)), int(match.group(2)), \
+                os.path.join(directory, name)))
+    levels.sort()
+    return levels
+
+def has_level(filename):
+    '''Checks if a level file exists, in a directory or a bundle.'''
+    if level_bundle.is_bundle(os.path.dirname(filename)):
+        return level_bundle.has_level(filename)
+    return os.path.isfile(filename)
+
+def get_stamp(filename):
+    '''Returns the modification time and size of a file.'''
+    stat = os.stat(filename)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def parse_level(content, digest):
+    '''Parses the contents of a level file.'''
+    data = json.loads(content.decode("utf-8"))
+    dimension = (data["dimension"]["cols"], data["dimension"]["rows"])
+    (codes, slides) = tile_grid.get_codes(data["tiles"], dimension[0], \
+        dimension[1])
+    return Level(tiles=data["tiles"], dimension=dimension, \
+        pos_player=(data["posPlayer"]["x"], data["posPlayer"]["y"]), \
+        best_solution=data["solutions"]["best"], \
+        dir_player=data.get("dirPlayer", "down"), \
+        hammer=data.get("hammer", False), codes=codes, slides=slides, \
+        digest=digest)
+
+def get_cache_file(filename):
+    '''Returns the file the parsed level of a level file is cached in.'''
+    directory = os.path.join(os.path.dirname(os.path.abspath(filename)), \
+        CACHE_DIRECTORY)
+    return os.path.join(directory, os.path.basename(filename) + ".cache")
+
+def level_to_json(level):
+    '''Returns the fields of a Level as json, with the codes and slides
+    as base64.
+    '''
+    fields = level._asdict()
+    fields["codes"] = base64.b64encode(level.codes).decode("ascii")
+    fields["slides"] = base64.b64encode(level.slides).decode("ascii")
+    return fields
+
+def level_from_json(fields):
+    '''Returns the Level of fields written by level_to_json. Raises a
+    ValueError, KeyError or TypeError when the fields aren't a level.
+    '''
+    dimension = (int(fields["dimension"][0]), int(fields["dimension"][1]))
+    codes = base64.b64decode(fields["codes"], validate=True)
+    slides = base64.b64decode(fields["slides"], validate=True)
+    if len(codes) != dimension[0] * dimension[1] or \
+        len(slides) != len(codes):
+        raise ValueError("cached codes don't match the dimension")
+    return Level(tiles=str(fields["tiles"]), dimension=dimension, \
+        pos_player=(int(fields["pos_player"][0]), \
+        int(fields["pos_player"][1])), \
+        best_solution=fields["best_solution"], \
+        dir_player=str(fields["dir_player"]), \
+        hammer=bool(fields["hammer"]), codes=codes, slides=slides, \
+        digest=str(fields["digest"]))
+
+def read_cache(filename):
+    '''Returns the cached (version, mtime, size, level) of a level file, or
+    None when there is no usable cache.
+    '''
+    try:
+        with open(get_cache_file(filename), "rb") as cache_file:
+            cached = json.loads(cache_file.read().decode("utf-8"))
+        if cached["version"] != CACHE_VERSION:
+            return None
+        return (cached["version"], cached["mtime"], cached["size"], \
+            level_from_json(cached["level"]))
+    except (OSError, ValueError, KeyError, TypeError, IndexError):
+        return None
+
+def write_cache(filename, stamp, level):
+    '''Writes a parsed level to the cache. The cache is only an
+    optimization, so failing to write it is not an error.
+    '''
+    cache_file = get_cache_file(filename)
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        temporary = "%s.%d.tmp" % (cache_file, os.getpid())
+        with open(temporary, "w") as output:
+            json.dump({"version": CACHE_VERSION, "mtime": stamp[0], \
+                "size": stamp[1], "level": level_to_json(level)}, output)
+        os.replace(temporary, cache_file)
+    except OSError:
+        pass
+
+def load_level(filename, use_cache=True):
+    '''Returns the Level of a level file. The level is taken from memory or
+    from the cache directory when the file didn't change: when the
+    modification time and size are the same, or else when the content hash
+    is the same. Levels in a bundle are taken from the bundle.
+    '''
+    if level_bundle.is_bundle(os.path.dirname(filename)):
+        return level_bundle.load_level(filename)
+    stamp = get_stamp(filename)
+    with levels_lock:
+        known = levels.get(filename)
+    if use_cache and known is not None and known[0] == stamp:
+        return known[1]
+
+    cached = read_cache(filename) if use_cache else None
+    if cached is not None and (cached[1], cached[2]) == stamp:
+        level = cached[3]
+    else:
+        with open(filename, "rb") as data_file:
+            content = data_file.read()
+        digest = hashlib.sha1(content).hexdigest()
+        if cached is not None and cached[3].digest == digest:
+            level = cached[3]
+        else:
+            level = parse_level(content, digest)
+        if use_cache:
+            write_cache(filename, stamp, level)
+
+    with levels_lock:
+        levels[filename] = (stamp, level)
+    return level
+
+def get_grid(level):
+    '''Returns the tile grid of a level.'''
+    return tile_grid.TileGrid(level.dimension[0], level.dimension[1], \
+        level.codes, level.slides)
 
 def get_tiles(filename):
     '''Returns the tiles of the json file.'''
-    with open(filename) as data_file:    
-        data = json.load(data_file)
-    return data["tiles"]
+    return load_level(filename).tiles
 
 def get_dimensions(filename):
     '''Returns the dimensions of the grid.'''
-    with open(filename) as data_file:    
-        data = json.load(data_file)
-    return [data["dimension"]["cols"], data["dimension"]["rows"]]
+    return list(load_level(filename).dimension)
 
 def get_pos_player(filename):
     '''Returns the start location of the user.'''
-    with open(filename) as data_file:    
-        data = json.load(data_file)
-    return [data["posPlayer"]["x"], data["posPlayer"]["y"]]
+    return list(load_level(filename).pos_player)
 
 def get_best_solutions(filename):
     '''Returns the best solution as an integer.'''
-    with open(filename) as data_file:    
-        data = json.load(data_file)
-    return data["solutions"]["best"]
+    return load_level(filename).best_solution
 
 def get_dir_player(filename):
-    '''Returns the start direction of the user, if there's no 
+    '''Returns the start direction of the user, if there's no
     start direction given, the direction is downwards.
     '''
+    return load_level(filename).dir_player
+
+def load_demos(filename="Json/demo.json"):
+    '''Returns the contents of a demo file. The file is only loaded again
+    when it changes.
+    '''
+    stamp = get_stamp(filename)
+    known = demos.get(filename)
+    if known is not None and known[0] == stamp:
+        return known[1]
     with open(filename) as data_file:
         data = json.load(data_file)
-    try:
-        return data["dirPlayer"]
-    except KeyError:
-        return "down"
+    demos[filename] = (stamp, data)
+    return data
 
 def get_demo(mission,level):
     '''Returns a string of moves from the demo'''
-    with open("Json/demo.json") as data_file:
-        data = json.load(data_file)
+    data = load_demos()
     try:
         return [data[str(mission)][str(level)]["moveList"], \
             data[str(mission)][str(level)]["goalsCollected"]]
@@ -61,12 +231,4 @@ def get_demo(mission,level):
 
 def has_hammer(filename):
     '''Returns if the user has the possibility of using a hammer.'''
-    with open(filename) as data_file:    
-        data = json.load(data_file)
-    try:
-        return data["hammer"]
-    except KeyError:
-        return False
-
-
-
+    return load_level(filename).hammer
@@ -0,0 +1,107 @@
+'''
+    File: resume.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file contains the functions in order to continue solving a level
+    from the point where the user is. The moves of the user are played on
+    the grid to find the tile and direction of the bot and the goals and
+    objects that are collected and destroyed, after which only the goals
+    that are left are solved.
+
+    The moves are played by the simulator of simulator.py. A bot that fell
+    into an abyss can't go on, so nothing is solved for it.
+'''
+
+import collections
+import branch_bound
+import main
+import parse_json
+import parse_output
+import simulator as simulator_module
+
+State = collections.namedtuple("State", ["index", "direction", \
+    "collected", "destroyed", "status", "moves"])
+
+def apply_moves(simulator, moves):
+    '''Plays the moves of the user with the simulator of the level.
+    Returns the State after the last move, with the collected goals and
+    destroyed objects as frozensets of tile indices. Raises a ValueError
+    for a move that isn't a command.
+    '''
+    result = simulator.run(moves)
+    if result.status == simulator_module.INVALID:
+        raise ValueError("unknown move %r" % (moves[result.moves],))
+    return State(result.index, result.direction, \
+        frozenset(simulator.goals[i] for i in result.order), \
+        frozenset(simulator.get_objects(result.destroyed)), result.status, \
+        result.moves)
+
+def solve_remaining(level, grid, goal_list, state):
+    '''Solves the goals that aren't collected in a state. The best solution
+    of what is left isn't known, so the branch and bound solver searches
+    for the shortest path. Returns the path, the commands and the order of
+    the remaining goals as numbers of the full goal list.
+    '''
+    if state.status == simulator_module.FELL:
+        return None
+    numbers = [i for i in range(len(goal_list)) if grid.get_index( \
+        goal_list[i][0].x_coord, goal_list[i][0].y_coord) not in \
+        state.collected]
+    start_tile = grid.tile(state.index)
+    b = branch_bound.BranchBound(grid, [goal_list[i] for i in numbers], \
+        None, start_tile, level.hammer, state.direction, \
+        destroyed=state.destroyed)
+    best_path, rotations, permutation = b.solve()
+    if numbers and not best_path:
+        return None
+    commands = parse_output.parse(best_path, start_tile, None, \
+        list(rotations))
+    return {
+        "path": [[tile.x_coord, tile.y_coord] for tile in best_path],
+        "commands": commands,
+        "rotations": list(rotations),
+        "permutation": [numbers[i] for i in permutation],
+        "length": len(best_path),
+        "nodes": b.nodes,
+    }
+
+def get_state_record(grid, goal_list, state):
+    '''Returns a state as a dictionary that can be written as json.'''
+    (x, y) = grid.get_coords(state.index)
+    return {
+        "position": [x, y],
+        "direction": state.direction,
+        "collected": [i for i in range(len(goal_list)) if grid.get_index( \
+            goal_list[i][0].x_coord, goal_list[i][0].y_coord) in \
+            state.collected],
+        "destroyed": [list(grid.get_coords(i)) for i in \
+            sorted(state.destroyed)],
+        "status": state.status,
+        "moves": state.moves,
+    }
+
+def resume(level, moves, grid=None, goal_list=None, simulator=None):
+    '''Plays the moves of the user on a level and solves the goals that are
+    left from there. Returns the state of the user and the solution of the
+    remaining goals (None when they can't be reached) in a dictionary.
+    '''
+    if grid is None:
+        grid = parse_json.get_grid(level)
+    if goal_list is None:
+        goal_list = main.create_goal_list(grid)
+    if simulator is None:
+        simulator = simulator_module.get_simulator(level, grid)
+    state = apply_moves(simulator, moves)
+    return {"state": get_state_record(grid, goal_list, state), \
+        "solution": solve_remaining(level, grid, goal_list, state)}
+
+def resume_level(filename, moves):
+    '''Loads a level file and resumes it, for the worker processes.'''
+    simulator = simulator_module.get_level_simulator(filename)
+    return resume(parse_json.load_level(filename), moves, simulator.grid, \
+        simulator=simulator)
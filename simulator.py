@@ -0,0 +1,360 @@
+'''
+    File: simulator.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file contains a simulator that plays a list of commands on a
+    level, in order to check the move lists of users.
+
+    A direction command turns the bot and moves it one tile when the tile
+    can be walked on. On an ice tile the bot keeps sliding in the same
+    direction until the next tile can't be walked on or the ice ends, and
+    a bot that walks or slides into an abyss falls and stops. A smash
+    destroys the brick or ruby the bot is facing when the bot has a
+    hammer. Stars and hammers are collected by walking over them, rubies
+    by smashing them.
+
+    What a command does on a tile in a direction is calculated once per
+    level into a transition table, so every command is a table lookup.
+    Only a move towards an object that has been destroyed during the run
+    is calculated while running.
+
+    Check the moves of a demo file or a JSON lines export (one
+    {"mission", "level", "moveList", "goalsCollected"} object per line)
+    by typing simulator.py [files] in the console, see simulator.py -h
+    for the options.
+'''
+
+import argparse
+import collections
+import json
+import os
+import sys
+import time
+import parse_json
+import tile_grid
+
+# Command numbers, the directions are numbered like tile_grid.DIRECTIONS
+SMASH = 4
+COMMANDS = dict((tile_grid.DIRECTIONS[i], i) for i in \
+    range(len(tile_grid.DIRECTIONS)))
+COMMANDS["smash"] = SMASH
+
+# Results of a move in the transition table
+BLOCKED = -1
+FALLS = -2
+
+# Status of a run
+DONE = "done"
+FELL = "fell"
+INVALID = "invalid"
+
+Result = collections.namedtuple("Result", ["index", "direction", \
+    "collected", "destroyed", "order", "status", "moves", "steps"])
+
+class Simulator(object):
+    def __init__(self, grid, start, direction, has_hammer):
+        self.grid = grid
+        self.start = start
+        self.direction = tile_grid.DIRECTIONS.index(direction)
+        self.has_hammer = has_hammer
+
+        # Goals and destroyable objects are numbered, so the collected goals
+        # and destroyed objects of a run are bit masks
+        self.goals = grid.get_goals()
+        self.goal_bits = dict((self.goals[i], 1 << i) for i in \
+            range(len(self.goals)))
+        self.goal_numbers = dict((self.goals[i], i) for i in \
+            range(len(self.goals)))
+        self.objects = [i for i in range(grid.size) if \
+            grid.is_destroyable(i)]
+        self.object_bits = dict((self.objects[i], 1 << i) for i in \
+            range(len(self.objects)))
+        self.all_goals = (1 << len(self.goals)) - 1
+        self.build_table()
+
+    def get_neighbour(self, index, direction):
+        '''Returns the tile next to a tile in a direction, or BLOCKED at the
+        edge of the grid.
+        '''
+        (dx, dy) = tile_grid.DELTAS[direction]
+        (x, y) = self.grid.get_coords(index)
+        if not (0 <= x + dx < self.grid.width and \
+            0 <= y + dy < self.grid.height):
+            return BLOCKED
+        return index + dy * self.grid.width + dx
+
+    def move(self, index, direction, destroyed):
+        '''Moves the bot from a tile in a direction, with the objects of a
+        destroyed mask walkable. Returns the tile the bot ends on (BLOCKED
+        or FALLS) and the goals it walked over as a mask.
+        '''
+        grid = self.grid
+        end = BLOCKED
+        goals = 0
+        while True:
+            adj = self.get_neighbour(index, direction)
+            if adj == BLOCKED:
+                return end, goals
+            code = grid.codes[adj]
+            if code == tile_grid.ABYSS:
+                return FALLS, goals
+            if not (code in tile_grid.WALKABLE or \
+                self.object_bits.get(adj, 0) & destroyed):
+                return end, goals
+            end = index = adj
+            goals |= self.goal_bits.get(adj, 0)
+            if not grid.slides[adj]:
+                return end, goals
+
+    def depends_on_objects(self, index, direction):
+        '''Checks if a move can end differently once an object has been
+        destroyed, which is when the move stops in front of an object.
+        '''
+        (end, goals) = self.move(index, direction, 0)
+        if end == FALLS:
+            return False
+        if end == BLOCKED:
+            end = index
+        return self.get_neighbour(end, direction) in self.object_bits
+
+    def build_table(self):
+        '''Calculates the transition table. For every tile and direction
+        (entry index * 4 + direction) the table holds the tile the move
+        ends on, the goals walked over, the tile in front of the bot and
+        whether the move has to be calculated again when objects have been
+        destroyed.
+        '''
+        size = self.grid.size * 4
+        self.ends = [BLOCKED] * size
+        self.goal_masks = [0] * size
+        self.fronts = [BLOCKED] * size
+        self.dynamic = bytearray(size)
+        for index in range(self.grid.size):
+            if self.grid.codes[index] in (tile_grid.WALL, tile_grid.ABYSS) \
+                and index != self.start:
+                continue
+            for direction in range(4):
+                entry = index * 4 + direction
+                (self.ends[entry], self.goal_masks[entry]) = \
+                    self.move(index, direction, 0)
+                self.fronts[entry] = self.get_neighbour(index, direction)
+                self.dynamic[entry] = self.depends_on_objects(index, \
+                    direction)
+
+    def step(self, index, direction, collected, destroyed, command):
+        '''Plays one command number from a state. Returns the tile, the
+        direction, the collected goals and the destroyed objects after the
+        command, the tile is FALLS when the bot fell into an abyss.
+        '''
+        if command == SMASH:
+            front = self.fronts[index * 4 + direction]
+            bit = self.object_bits.get(front, 0)
+            if self.has_hammer and bit and not destroyed & bit:
+                destroyed |= bit
+                collected |= self.goal_bits.get(front, 0)
+            return index, direction, collected, destroyed
+        direction = command
+        entry = index * 4 + direction
+        if destroyed and self.dynamic[entry]:
+            (end, goals) = self.move(index, direction, destroyed)
+        else:
+            end = self.ends[entry]
+            goals = self.goal_masks[entry]
+        if end == BLOCKED:
+            end = index
+        return end, direction, collected | goals, destroyed
+
+    def run(self, moves, trace=False):
+        '''Plays a list of commands from the start of the level. Returns a
+        Result with the end tile and direction, the collected goals and
+        destroyed objects as masks, the goal numbers in the order they were
+        collected, the status and the number of commands that were played.
+        With trace the state after every command is given in steps.
+        '''
+        index = self.start
+        direction = self.direction
+        collected = self.goal_bits.get(index, 0)
+        destroyed = 0
+        order = [self.goal_numbers[index]] if collected else []
+        steps = [] if trace else None
+        status = DONE
+        played = 0
+        for move in moves:
+            command = COMMANDS.get(move) if isinstance(move, str) else None
+            if command is None:
+                status = INVALID
+                break
+            played += 1
+            (end, direction, new_collected, destroyed) = self.step(index, \
+                direction, collected, destroyed, command)
+            new = new_collected & ~collected
+            if new:
+                collected = new_collected
+                order.extend(i for i in range(len(self.goals)) \
+                    if new & (1 << i))
+            if end == FALLS:
+                status = FELL
+                if trace:
+                    steps.append(self.get_step(move, index, direction, \
+                        collected, destroyed, status))
+                break
+            index = end
+            if trace:
+                steps.append(self.get_step(move, index, direction, \
+                    collected, destroyed, status))
+        return Result(index, tile_grid.DIRECTIONS[direction], collected, \
+            destroyed, order, status, played, steps)
+
+    def get_step(self, move, index, direction, collected, destroyed, status):
+        '''Returns the state after a command as a dictionary.'''
+        return {"move": move, "position": list(self.grid.get_coords(index)), \
+            "direction": tile_grid.DIRECTIONS[direction], \
+            "collected": self.get_goals(collected), \
+            "destroyed": [list(self.grid.get_coords(i)) for i in \
+            self.get_objects(destroyed)], "status": status}
+
+    def get_goals(self, mask):
+        '''Returns the goal numbers of a goal mask.'''
+        return [i for i in range(len(self.goals)) if mask & (1 << i)]
+
+    def get_objects(self, mask):
+        '''Returns the tile indices of a destroyed mask.'''
+        return [self.objects[i] for i in range(len(self.objects)) if \
+            mask & (1 << i)]
+
+    def validate(self, moves, goals_collected=None, trace=False):
+        '''Plays the moves of a user and returns the outcome as a dictionary.
+        When the goals the user claims to have collected are given, they
+        are compared with the goals that were really collected.
+        '''
+        result = self.run(moves, trace)
+        record = {
+            "position": list(self.grid.get_coords(result.index)),
+            "direction": result.direction,
+            "goalsCollected": result.order,
+            "complete": result.collected == self.all_goals,
+            "status": result.status,
+            "moves": result.moves,
+        }
+        if goals_collected is not None:
+            record["claimOk"] = sorted(goals_collected) == \
+                sorted(result.order)
+        if trace:
+            record["steps"] = result.steps
+        return record
+
+def get_simulator(level, grid=None):
+    '''Returns the simulator of a loaded level.'''
+    if grid is None:
+        grid = parse_json.get_grid(level)
+    return Simulator(grid, grid.get_index(level.pos_player[0], \
+        level.pos_player[1]), level.dir_player, level.hammer)
+
+# Simulators of the levels checked by this process, by level hash
+simulators = {}
+
+def get_level_simulator(filename):
+    '''Returns the simulator of a level file. The transition table of a
+    level is only calculated once.
+    '''
+    level = parse_json.load_level(filename)
+    simulator = simulators.get(level.digest)
+    if simulator is None:
+        simulator = get_simulator(level)
+        simulators[level.digest] = simulator
+    return simulator
+
+def get_error(filename, line, error):
+    '''Returns the error record of a submission that can't be read.'''
+    return {"file": filename, "line": line, "error": repr(error)}
+
+def read_submissions(filename):
+    '''Yields the submissions of a demo file or a JSON lines export as
+    (mission, level, moves, goals collected, error). A line that can't be
+    read is yielded with None for the submission and its error record, so
+    one bad line doesn't stop a large export.
+    '''
+    with open(filename) as data_file:
+        if filename.endswith(".jsonl"):
+            for (number, line) in enumerate(data_file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                    submission = (data["mission"], data["level"], \
+                        data["moveList"], data.get("goalsCollected"), None)
+                except (ValueError, KeyError, TypeError) as error:
+                    submission = (None, None, None, None, \
+                        get_error(filename, number, error))
+                yield submission
+            return
+        data = json.load(data_file)
+    for mission in sorted(data, key=int):
+        for level in sorted(data[mission], key=int):
+            demo = data[mission][level]
+            try:
+                submission = (mission, level, demo["moveList"], \
+                    demo.get("goalsCollected"), None)
+            except (KeyError, TypeError) as error:
+                submission = (None, None, None, None, get_error(filename, \
+                    None, error))
+            yield submission
+
+def check(filenames, directory, output, trace=False):
+    '''Checks every submission of the files and writes one record per
+    submission. Returns the number of submissions.
+    '''
+    count = 0
+    for filename in filenames:
+        for (mission, level, moves, goals, error) in \
+            read_submissions(filename):
+            if error is not None:
+                if output is not None:
+                    output.write(json.dumps(error) + "\n")
+                count += 1
+                continue
+            record = {"mission": mission, "level": level}
+            level_file = os.path.join(directory, "mission" + str(mission) + \
+                "-level" + str(level) + ".json")
+            try:
+                simulator = get_level_simulator(level_file)
+            except (OSError, ValueError, KeyError) as error:
+                record["error"] = repr(error)
+            else:
+                record.update(simulator.validate(moves, goals, trace))
+            if output is not None:
+                output.write(json.dumps(record) + "\n")
+            count += 1
+    return count
+
+def get_arguments(argv):
+    '''Parses the command line arguments.'''
+    parser = argparse.ArgumentParser(description="Plays the move lists " + \
+        "of users on their levels.")
+    parser.add_argument("files", nargs="*", default=["Json/demo.json"], \
+        help="demo files (.json) or exports (.jsonl) with move lists")
+    parser.add_argument("--directory", default="Json", \
+        help="directory with the missionX-levelY.json files")
+    parser.add_argument("--trace", action="store_true", \
+        help="give the state after every command")
+    parser.add_argument("--quiet", action="store_true", \
+        help="only print the number of checked move lists")
+    return parser.parse_args(argv)
+
+def main():
+    args = get_arguments(sys.argv[1:])
+    start_time = time.time()
+    output = None if args.quiet else sys.stdout
+    count = check(args.files, args.directory, output, args.trace)
+    seconds = time.time() - start_time
+    sys.stderr.write("%d move list(s) checked in %.3f seconds\n" % \
+        (count, seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+'''
+    File: solution_store.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file contains a store for solved levels in an SQLite database. A
+    solution (the path, the commands, the rotations and the permutation) is
+    stored under a hash of the level content and the solver that found it,
+    so a hint for a known level only needs a lookup. The hint policies of
+    hint_policy.py are kept in the same file.
+
+    Fill the store for a level directory by typing
+    solution_store.py warm [directory] in the console, see
+    solution_store.py -h for the options.
+'''
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import sqlite3
+import sys
+import threading
+import batch
+import parse_json
+
+DEFAULT_STORE = "solutions.sqlite"
+
+def get_level_key(level):
+    '''Returns the hash of the level content the solvers use. Changes to
+    for instance the messages of a level don't change the hash.
+    '''
+    content = json.dumps([level.tiles, list(level.dimension), \
+        list(level.pos_player), level.dir_player, level.hammer, \
+        level.best_solution])
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+class SolutionStore(object):
+    def __init__(self, filename=DEFAULT_STORE):
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(filename, check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS solutions (" + \
+            "level TEXT NOT NULL, solver TEXT NOT NULL, " + \
+            "path TEXT NOT NULL, commands TEXT NOT NULL, " + \
+            "rotations TEXT NOT NULL, permutation TEXT NOT NULL, " + \
+            "length INTEGER NOT NULL, best INTEGER NOT NULL, " + \
+            "PRIMARY KEY (level, solver))")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS policies (" + \
+            "level TEXT PRIMARY KEY, states INTEGER NOT NULL, " + \
+            "data BLOB NOT NULL)")
+        self.connection.commit()
+
+    def get(self, key, solver):
+        '''Returns the stored solution of a level hash and solver, or None
+        when the level hasn't been solved yet.
+        '''
+        with self.lock:
+            row = self.connection.execute("SELECT path, commands, " + \
+                "rotations, permutation, length, best FROM solutions " + \
+                "WHERE level = ? AND solver = ?", (key, solver)).fetchone()
+        if row is None:
+            return None
+        return {"path": json.loads(row[0]), "commands": json.loads(row[1]), \
+            "rotations": json.loads(row[2]), \
+            "permutation": json.loads(row[3]), "length": row[4], \
+            "best": row[5]}
+
+    def put(self, key, solver, record):
+        '''Stores the solution of a level hash and solver.'''
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO solutions " + \
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (key, solver, \
+                json.dumps(record["path"]), json.dumps(record["commands"]), \
+                json.dumps(record["rotations"]), \
+                json.dumps(record["permutation"]), record["length"], \
+                record["best"]))
+            self.connection.commit()
+
+    def get_policy(self, key):
+        '''Returns the stored hint policy of a level hash (see
+        hint_policy.py) as bytes, or None when it hasn't been built.
+        '''
+        with self.lock:
+            row = self.connection.execute("SELECT data FROM policies " + \
+                "WHERE level = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return bytes(row[0])
+
+    def put_policy(self, key, states, data):
+        '''Stores the hint policy of a level hash with its number of
+        states.
+        '''
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO policies " + \
+                "VALUES (?, ?, ?)", (key, states, data))
+            self.connection.commit()
+
+    def get_solution(self, level, solver):
+        '''Returns the solution of a level from the store. A level that
+        isn't stored yet is solved, and stored when the path is proven to
+        be the best one.
+        '''
+        key = get_level_key(level)
+        record = self.get(key, solver)
+        if record is None:
+            record = batch.solve_record(level, solver)
+            if record.get("proven", True):
+                self.put(key, solver, record)
+        return record
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+def warm_task(task):
+    '''Solves a level for the warm-up in a worker process.'''
+    (mission, level, filename, solver) = task
+    record = batch.solve_task(task)
+    if "error" not in record:
+        record["key"] = get_level_key(parse_json.load_level(filename))
+    return record
+
+def warm(store, directory, solver, workers):
+    '''Solves every level of a directory that isn't in the store yet.
+    Paths that aren't proven to be the best one are not stored. Returns
+    the number of levels that were solved and that failed.
+    '''
+    tasks = []
+    for (mission, level, filename) in parse_json.find_levels(directory):
+        key = get_level_key(parse_json.load_level(filename))
+        if store.get(key, solver) is None:
+            tasks.append((mission, level, filename, solver))
+
+    solved = 0
+    failed = 0
+    if workers == 1:
+        records = map(warm_task, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers)
+        records = pool.imap(warm_task, tasks, chunksize=1)
+    try:
+        for record in records:
+            if "error" in record:
+                sys.stderr.write("%s: %s\n" % (record["file"], \
+                    record["error"]))
+                failed += 1
+            else:
+                if record.get("proven", True):
+                    store.put(record["key"], solver, record)
+                solved += 1
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return solved, failed
+
+def get_arguments(argv):
+    '''Parses the command line arguments.'''
+    parser = argparse.ArgumentParser(description="Manages the store of " + \
+        "solved levels.")
+    parser.add_argument("command", choices=["warm"], \
+        help="warm: solve and store every level of a directory")
+    parser.add_argument("directory", nargs="?", default="Json", \
+        help="directory with the missionX-levelY.json files")
+    parser.add_argument("--store", default=DEFAULT_STORE, \
+        help="SQLite file of the store")
+    parser.add_argument("--solver", choices=sorted(batch.main.SOLVERS), \
+        default="branch_bound", help="goal ordering solver to use")
+    parser.add_argument("--workers", type=int, default=None, \
+        help="number of worker processes (default: number of cpus)")
+    return parser.parse_args(argv)
+
+def main():
+    args = get_arguments(sys.argv[1:])
+    store = SolutionStore(args.store)
+    try:
+        (solved, failed) = warm(store, args.directory, args.solver, \
+            args.workers)
+    finally:
+        store.close()
+    print("%d level(s) solved, %d failed" % (solved, failed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+'''
+    File: state_search.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file contains a solver that searches the states of the whole game
+    with A*, instead of putting together A* legs in a goal order. A state is
+    the tile and direction of the bot, the collected goals and the destroyed
+    objects, packed into one integer. The states that were reached are kept
+    in a transposition table with their cost, so a state reached again in
+    another way isn't searched twice.
+
+    The moves are the ones of the leg solvers: walking to a tile costs one
+    move, walking into a brick or ruby costs a smash and a move (and a turn
+    when the bot isn't facing it) and a ruby can be smashed from the tile
+    next to it. The heuristic is the lower bound of the branch and bound
+    solver: the distance to the nearest goal plus the minimum spanning tree
+    over the goals that are left. Turns are not counted in it, since a
+    direction command both turns and moves the bot.
+
+    Compare the search nodes with the brute force solver on every level by
+    typing state_search.py [directory] in the console, see
+    state_search.py -h for the options.
+'''
+
+import argparse
+import heapq
+import multiprocessing
+import sys
+import batch
+import branch_bound
+import parse_json
+import tile_grid
+
+# States that are expanded before the search gives up
+MAX_NODES = 2000000
+
+class StateSearch(branch_bound.BranchBound):
+    def __init__(self, grid, goal_list, best_solution, start, has_hammer, \
+        direction, cache=None, destroyed=frozenset(), \
+        max_nodes=MAX_NODES):
+        branch_bound.BranchBound.__init__(self, grid, goal_list, \
+            best_solution, start, has_hammer, direction, cache, destroyed)
+        self.max_nodes = max_nodes
+
+        # Goals and objects are numbered for the bit masks of a state
+        self.goal_bits = dict((self.goals[i], 1 << i) for i in \
+            range(len(self.goals)))
+        self.objects = [i for i in range(grid.size) if \
+            grid.is_destroyable(i)]
+        self.object_bits = dict((self.objects[i], 1 << i) for i in \
+            range(len(self.objects)))
+        self.full = (1 << len(self.goals)) - 1
+
+        # Commands of the last solve, taken from the moves of the search
+        self.commands = []
+
+    def pack(self, index, direction, collected, destroyed):
+        '''Packs a state into one integer.'''
+        return ((((destroyed << len(self.goals)) | collected) * \
+            self.grid.size + index) << 2) | direction
+
+    def unpack(self, state):
+        '''Returns the (index, direction, collected, destroyed) of a packed
+        state.
+        '''
+        direction = state & 3
+        (rest, index) = divmod(state >> 2, self.grid.size)
+        collected = rest & self.full
+        return index, direction, collected, rest >> len(self.goals)
+
+    def get_heuristic(self, index, collected):
+        '''Returns the lower bound on the moves that are left.'''
+        return self.get_lower_bound(index, self.full & ~collected)
+
+    def get_successors(self, index, direction, collected, destroyed):
+        '''Yields the moves from a state as (cost, new index, new direction,
+        new collected, new destroyed, smashed tile or -1).
+        '''
+        grid = self.grid
+        for edge in range(grid.offsets[index], grid.offsets[index+1]):
+            adj = grid.neighbors[edge]
+            next_dir = grid.edge_dirs[edge]
+            bit = self.object_bits.get(adj, 0)
+            if grid.edge_costs[edge] == tile_grid.WALK_COST or \
+                bit & destroyed:
+                yield (1, adj, next_dir, collected | \
+                    self.goal_bits.get(adj, 0), destroyed, -1)
+            elif self.has_hammer:
+                turn = 0 if next_dir == direction else 1
+                new_collected = collected | self.goal_bits.get(adj, 0)
+
+                # Smash the object and walk on the tile
+                yield (2 + turn, adj, next_dir, new_collected, \
+                    destroyed | bit, adj)
+
+                # A ruby is collected from the tile next to it
+                if adj in self.goal_bits and not collected & \
+                    self.goal_bits[adj]:
+                    yield (1 + turn, index, next_dir, new_collected, \
+                        destroyed | bit, adj)
+
+    def search(self):
+        '''A* over the game states. Returns the packed end state and the
+        table of parents, or None when no state collects every goal. Raises
+        a RuntimeError when more than max_nodes states are expanded, so a
+        search that gave up isn't taken for a level without a solution.
+        '''
+        start = self.get_index(self.start)
+        direction = tile_grid.DIRECTIONS.index(self.direction)
+        collected = self.goal_bits.get(start, 0)
+        destroyed = 0
+        for index in self.destroyed:
+            destroyed |= self.object_bits.get(index, 0)
+            collected |= self.goal_bits.get(index, 0)
+
+        state = self.pack(start, direction, collected, destroyed)
+        costs = {state: 0}
+        parents = {state: None}
+        counter = 0
+        opened = [(self.get_heuristic(start, collected), counter, state)]
+        while opened:
+            (f, count, state) = heapq.heappop(opened)
+            (index, direction, collected, destroyed) = self.unpack(state)
+            cost = costs[state]
+            if f > cost + self.get_heuristic(index, collected):
+                continue
+            if collected == self.full:
+                return state, parents
+            self.nodes += 1
+            if self.nodes > self.max_nodes:
+                raise RuntimeError("state search gave up after %d states" % \
+                    self.max_nodes)
+            for (step, adj, new_dir, new_collected, new_destroyed, \
+                smashed) in self.get_successors(index, direction, \
+                collected, destroyed):
+                new_state = self.pack(adj, new_dir, new_collected, \
+                    new_destroyed)
+                new_cost = cost + step
+                if new_state in costs and costs[new_state] <= new_cost:
+                    continue
+                bound = self.get_heuristic(adj, new_collected)
+                if bound == branch_bound.INFINITY:
+                    continue
+                costs[new_state] = new_cost
+                parents[new_state] = (state, step, smashed)
+                counter += 1
+                heapq.heappush(opened, (new_cost + bound, counter, \
+                    new_state))
+        return None
+
+    def get_path(self, state, parents):
+        '''Returns the path, the rotations and the order the goals were
+        collected in from the end state back to the start, in the format of
+        the other solvers: a smash repeats the tile the bot is on. The game
+        commands of the moves are kept in self.commands, since repeated
+        tiles can't tell a smash after a turn from two smashes in a row.
+        '''
+        moves = []
+        while parents[state] is not None:
+            (parent, step, smashed) = parents[state]
+            moves.append((parent, state, step, smashed))
+            state = parent
+        moves.reverse()
+
+        path_list = []
+        rotations = []
+        order = []
+        self.commands = []
+        for (parent, state, step, smashed) in moves:
+            (index, direction, collected, destroyed) = self.unpack(parent)
+            (adj, new_dir, new_collected, new_destroyed) = self.unpack(state)
+            tile = self.grid.tile(index)
+            name = tile_grid.DIRECTIONS[new_dir]
+            if smashed != -1:
+                rotations.append(name)
+                repeats = step - 1 if adj != index else step
+                path_list.extend([tile] * repeats)
+
+                # Facing the object is a direction command the object
+                # blocks
+                if new_dir != direction:
+                    self.commands.append(name)
+                self.commands.append("smash")
+            if adj != index:
+                path_list.append(self.grid.tile(adj))
+                self.commands.append(name)
+            new = new_collected & ~collected
+            order.extend(i for i in range(len(self.goals)) if new & (1 << i))
+        return path_list, rotations, tuple(order)
+
+    def solve(self):
+        '''Searches the game states and returns the path, the rotations and
+        the order the goals were collected in, like Brute_force.solve.
+        '''
+        self.nodes = 0
+        self.commands = []
+        found = self.search()
+        if found is None:
+            return [], [], ()
+        (state, parents) = found
+        return self.get_path(state, parents)
+
+    def get_commands(self, path_list, rotations):
+        '''Returns the game commands of the last solve.'''
+        return list(self.commands)
+
+def count_nodes(task):
+    '''Solves a level with a solver and returns its length and nodes.'''
+    (filename, solver) = task
+    record = batch.solve_level(filename, solver)
+    return record["length"], record["nodes"], record["best"]
+
+def compare(directory, timeout, output):
+    '''Solves every level of a directory with the state search and the
+    brute force solver and writes their search nodes. Brute force solves
+    that take longer than the timeout are stopped.
+    '''
+    output.write("%-22s %6s %10s %10s %12s %10s\n" % ("level", "best", \
+        "state len", "state nodes", "brute len", "brute nodes"))
+    for (mission, level, filename) in parse_json.find_levels(directory):
+        name = "mission%d-level%d" % (mission, level)
+        columns = [name]
+        for solver in ("state_search", "brute_force"):
+            pool = multiprocessing.Pool(1)
+            try:
+                (length, nodes, best) = pool.apply_async(count_nodes, \
+                    ((filename, solver),)).get(timeout)
+                if solver == "state_search":
+                    columns.append(str(best))
+                columns.extend([str(length), str(nodes)])
+            except multiprocessing.TimeoutError:
+                if solver == "state_search":
+                    columns.append("?")
+                columns.extend(["-", "timeout"])
+            except Exception as error:
+                if solver == "state_search":
+                    columns.append("?")
+                columns.extend(["-", type(error).__name__])
+            finally:
+                pool.terminate()
+                pool.join()
+        output.write("%-22s %6s %10s %10s %12s %10s\n" % tuple(columns))
+        output.flush()
+
+def get_arguments(argv):
+    '''Parses the command line arguments.'''
+    parser = argparse.ArgumentParser(description="Compares the search " + \
+        "nodes of the state search and the brute force solver.")
+    parser.add_argument("directory", nargs="?", default="Json", \
+        help="directory with the missionX-levelY.json files")
+    parser.add_argument("--timeout", type=float, default=60.0, \
+        help="seconds a solver may take for one level")
+    return parser.parse_args(argv)
+
+def main():
+    args = get_arguments(sys.argv[1:])
+    compare(args.directory, args.timeout, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
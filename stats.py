@@ -0,0 +1,58 @@
+'''
+    File: stats.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file contains the statistics of one run: the time spent in every
+    phase (parsing, building the grid, solving, making the commands and
+    generating the hint) and the counters of the solver and its A*
+    searches. The counters are plain integers kept by the solvers, so
+    collecting them costs nothing when they aren't asked for.
+'''
+
+import json
+import time
+from collections import OrderedDict
+
+class Stats(object):
+    def __init__(self):
+        self.phases = OrderedDict()
+        self.counters = OrderedDict()
+        self.started = None
+        self.current = None
+
+    def start(self, phase):
+        '''Starts timing a phase, the phase that was running is stopped.'''
+        now = time.perf_counter()
+        self.stop(now)
+        self.current = phase
+        self.started = now
+
+    def stop(self, now=None):
+        '''Stops timing the running phase.'''
+        if self.current is None:
+            return
+        if now is None:
+            now = time.perf_counter()
+        self.phases[self.current] = self.phases.get(self.current, 0.0) + \
+            now - self.started
+        self.current = None
+
+    def add_solver(self, solver):
+        '''Adds the counters of a solver.'''
+        self.counters.update(solver.get_stats())
+
+    def as_dict(self):
+        '''Returns the statistics as a dictionary.'''
+        phases = OrderedDict((name, round(seconds, 6)) for (name, seconds) \
+            in self.phases.items())
+        return {"phases": phases, "total": round(sum(self.phases.values()), \
+            6), "counters": self.counters}
+
+    def to_json(self):
+        '''Returns the statistics as a json string.'''
+        return json.dumps(self.as_dict())
@@ -0,0 +1,174 @@
+'''
+    File: test_solvers.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file checks the leg searches and the solvers against each other,
+    on the levels of the Json directory and on generated levels. The legs
+    of bidirectional A*, jump point search and Dial's algorithm and the
+    distance fields are compared with the legs of A*, the paths of the
+    other solvers with the path of the Held-Karp solver, and the commands
+    of every path are played by the simulator.
+
+    Run it by typing python -m pytest in the console.
+'''
+
+import os
+import pytest
+import main
+import batch
+import generator
+import parse_json
+import simulator
+import tile_grid
+
+DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Json")
+
+# Generated levels: (seed, width, height, goals, options of the generator)
+GENERATED = [
+    (1, 6, 6, 3, {}),
+    (2, 10, 10, 5, {"hammer": True, "bricks": 0.2}),
+    (3, 12, 8, 5, {"hammer": True, "bricks": 0.15, "rubies": 2}),
+]
+
+# Tiles skipped between the starts and ends of the legs that are compared
+START_STEP = 3
+END_STEP = 4
+
+# Solvers that search the shortest order of the goals, and solvers that
+# search an order with the length of the best solution of the level
+SHORTEST = ["branch_bound", "anytime"]
+BEST = ["brute_force", "parallel"]
+
+# Levels with more goals are not solved with brute force, it tries every
+# order of the goals
+MAX_BRUTE_GOALS = 7
+
+def get_levels():
+    '''Returns pytest parameters of (name, level) for every level of the
+    Json directory and the generated levels. The best solution of a
+    generated level is the length of the Held-Karp path.
+    '''
+    levels = []
+    for (mission, level, filename) in parse_json.find_levels(DIRECTORY):
+        name = "mission%d-level%d" % (mission, level)
+        levels.append(pytest.param(name, parse_json.load_level(filename), \
+            id=name))
+    for (seed, width, height, goals, options) in GENERATED:
+        name = "generated-%dx%d-%d-%d" % (width, height, goals, seed)
+        data = generator.generate_level(seed, width, height, goals, **options)
+        levels.append(pytest.param(name, generator.get_level( \
+            generator.solve_best(data, "held_karp")), id=name))
+    return levels
+
+LEVELS = get_levels()
+
+def get_tiles(grid):
+    '''Returns the indices of the tiles that aren't walls or abysses.'''
+    return [index for index in range(grid.size) if \
+        grid.codes[index] not in (tile_grid.WALL, tile_grid.ABYSS)]
+
+def get_leg_length(search, grid, start, end, level):
+    '''Returns the number of moves of the leg a search finds, or None when
+    the end can't be reached.
+    '''
+    solution = search(grid, grid.tile(start), grid.tile(end), level.hammer, \
+        level.dir_player).process()
+    if solution is None:
+        return None
+    return len(solution[0]) - 1
+
+def check_commands(level, record):
+    '''Plays the commands of a solver record and checks that every goal is
+    collected.
+    '''
+    outcome = simulator.get_simulator(level).validate(record["commands"])
+    assert outcome["status"] == simulator.DONE
+    assert outcome["complete"]
+
+@pytest.mark.parametrize("name, level", LEVELS)
+def test_legs(name, level):
+    '''Without a hammer every move costs the same, and every search finds
+    a leg of the same length as A*. With a hammer A* keeps one direction
+    per tile, so Dial's algorithm can find a shorter leg but never a longer
+    one.
+    '''
+    grid = parse_json.get_grid(level)
+    tiles = get_tiles(grid)
+    for start in tiles[::START_STEP]:
+        for end in tiles[::END_STEP]:
+            if start == end:
+                continue
+            lengths = dict((search, get_leg_length(main.SEARCHES[search], \
+                grid, start, end, level)) for search in main.SEARCHES)
+            reference = lengths["astar"]
+            assert lengths["bidirectional"] == reference
+            if not level.hammer:
+                assert lengths["jps"] == reference
+                assert lengths["dial"] == reference
+            elif reference is None:
+                assert lengths["jps"] is None
+                assert lengths["dial"] is None
+            else:
+                assert lengths["dial"] <= lengths["jps"] <= reference
+
+@pytest.mark.parametrize("name, level", LEVELS)
+def test_distance_fields(name, level):
+    '''The distance fields are the lengths of the A* legs from the tiles to
+    the stars without a hammer, and never more than those with a hammer.
+    '''
+    pytest.importorskip("numpy")
+    import distance_fields
+    grid = parse_json.get_grid(level)
+    stars = [index for index in range(grid.size) if \
+        grid.codes[index] == tile_grid.STAR]
+    fields = distance_fields.get_distance_fields(grid, stars, level.hammer)
+    for start in get_tiles(grid)[::START_STEP]:
+        if not grid.is_walkable(start):
+            continue
+        for i in range(len(stars)):
+            length = get_leg_length(main.SEARCHES["astar"], grid, start, \
+                stars[i], level)
+            distance = fields[i][start]
+            if length is None:
+                assert distance == float("inf")
+            elif level.hammer:
+                assert distance <= length
+            else:
+                assert distance == length
+
+@pytest.mark.parametrize("name, level", LEVELS)
+def test_solvers(name, level):
+    '''Every solver finds a path of the same length as the Held-Karp
+    solver, and the commands of every path collect all goals. The solvers
+    that search a path with the length of the best solution are only
+    checked when the best solution is that long. The state search doesn't
+    use the A* legs, so with a hammer its path can be shorter.
+    '''
+    reference = batch.solve_record(level, "held_karp")
+    check_commands(level, reference)
+    for solver in SHORTEST:
+        record = batch.solve_record(level, solver)
+        assert record["length"] == reference["length"], solver
+        check_commands(level, record)
+
+    record = batch.solve_record(level, "state_search")
+    if level.hammer:
+        assert record["length"] <= reference["length"]
+    else:
+        assert record["length"] == reference["length"]
+    check_commands(level, record)
+
+    if reference["length"] != level.best_solution:
+        return
+    goals = len(main.create_goal_list(parse_json.get_grid(level)))
+    for solver in BEST:
+        if solver == "brute_force" and goals > MAX_BRUTE_GOALS:
+            continue
+        record = batch.solve_record(level, solver)
+        assert record["length"] == reference["length"], solver
+        check_commands(level, record)
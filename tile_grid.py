@@ -0,0 +1,184 @@
+'''
+    File: tile_grid.py
+    Authors: Joeri Bes, Haischel Dabian, Jim Buissink, Sebastiaan Joustra and
+        Wietze Slagman
+    Date: 16/06/2016
+    Python version: 3.x
+    Created for the Bomberbot coorporation
+---------------------------------------------
+    File description:
+    This file contains a compact representation of a level. Every tile is
+    stored as one byte code, and the neighbours of every tile are computed
+    once into a flat table (compressed sparse rows): the neighbours of tile
+    i are neighbors[offsets[i]:offsets[i+1]]. Tile objects are only created
+    when they are asked for, for instance for the tiles on a path.
+'''
+
+from array import array
+import objects
+
+# Tile codes
+EMPTY = 0
+STAR = 1
+HAMMER = 2
+RUBY = 3
+BRICK = 4
+WALL = 5
+ABYSS = 6
+
+WALKABLE = (EMPTY, STAR, HAMMER)
+DESTROYABLE = (RUBY, BRICK)
+GOALS = (STAR, RUBY, HAMMER)
+
+# Directions in the order the neighbours are visited, with their offsets
+DIRECTIONS = ["right", "up", "left", "down"]
+DELTAS = [(1, 0), (0, -1), (-1, 0), (0, 1)]
+
+# Edge costs, a smash costs an extra 10 when the bot has to turn first
+WALK_COST = 10
+SMASH_COST = 20
+TURN_COST = 10
+
+def get_code(value):
+    '''Returns the tile code of a tile value from the json file.'''
+    if value[0] == ".":
+        return ABYSS
+    if len(value) == 2:
+        if value[1] == "4":
+            return STAR
+        elif value[1] == "3":
+            return RUBY
+        elif value[1] == "1":
+            return BRICK
+        elif value[1] == "6":
+            return HAMMER
+        return WALL
+    return EMPTY
+
+def create_object(code):
+    '''Returns the object that belongs to a tile code.'''
+    if code == STAR:
+        return objects.Star()
+    elif code == HAMMER:
+        return objects.Hammer()
+    elif code == RUBY:
+        return objects.Ruby()
+    elif code == BRICK:
+        return objects.Brick(True)
+    elif code in (WALL, ABYSS):
+        return objects.Brick(False)
+    return None
+
+def get_codes(tiles, width, height):
+    '''Translates the tile string of the json file to the tile codes and
+    the slideable flags of every tile.
+    '''
+    codes = bytearray(width * height)
+    slides = bytearray(width * height)
+    rows = tiles.split(';')
+    for y in range(len(rows)):
+        row = rows[y].split(',')
+        for x in range(len(row)):
+            codes[y * width + x] = get_code(row[x])
+            if row[x][0] == "b":
+                slides[y * width + x] = 1
+    return bytes(codes), bytes(slides)
+
+def parse_tiles(tiles, width, height):
+    '''Creates a grid from the tile string of the json file.'''
+    (codes, slides) = get_codes(tiles, width, height)
+    return TileGrid(width, height, codes, slides)
+
+class TileGrid(object):
+    __slots__ = ("width", "height", "size", "codes", "slides", "offsets", \
+        "neighbors", "edge_dirs", "edge_costs", "destroyables", "tile_cache")
+
+    def __init__(self, width, height, codes, slides):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.codes = codes
+        self.slides = slides
+        self.tile_cache = {}
+        self.build_edges()
+
+        # Indices of the bricks and rubies, the only tiles where the cost of
+        # a move depends on the direction of the bot
+        self.destroyables = [i for i in range(self.size) if \
+            codes[i] in DESTROYABLE]
+
+    def build_edges(self):
+        '''Computes the neighbour table. Only neighbours that can be walked
+        on or smashed get an edge, walls and abysses are left out.
+        '''
+        self.offsets = array('i', [0])
+        self.neighbors = array('i')
+        self.edge_dirs = array('b')
+        self.edge_costs = array('b')
+        for index in range(self.size):
+            x = index % self.width
+            y = index // self.width
+            for direction in range(len(DELTAS)):
+                (dx, dy) = DELTAS[direction]
+                if not (0 <= x + dx < self.width and \
+                    0 <= y + dy < self.height):
+                    continue
+                adj = index + dy * self.width + dx
+                code = self.codes[adj]
+                if code in WALKABLE:
+                    cost = WALK_COST
+                elif code in DESTROYABLE:
+                    cost = SMASH_COST
+                else:
+                    continue
+                self.neighbors.append(adj)
+                self.edge_dirs.append(direction)
+                self.edge_costs.append(cost)
+            self.offsets.append(len(self.neighbors))
+
+    def __getstate__(self):
+        '''Returns the attributes to pickle the grid with. The codes of a
+        level bundle are views of the bundle, which can't be pickled, so
+        they are copied.
+        '''
+        state = dict((name, getattr(self, name)) for name in self.__slots__)
+        state["codes"] = bytes(self.codes)
+        state["slides"] = bytes(self.slides)
+        return state
+
+    def __setstate__(self, state):
+        '''Sets the attributes of an unpickled grid.'''
+        for (name, value) in state.items():
+            setattr(self, name, value)
+
+    def get_index(self, x, y):
+        '''Returns the index of the tile at the given coordinates.'''
+        return y * self.width + x
+
+    def get_coords(self, index):
+        '''Returns the (x, y) coordinates of a tile index.'''
+        return (index % self.width, index // self.width)
+
+    def is_walkable(self, index):
+        '''Checks if the tile can be walked on.'''
+        return self.codes[index] in WALKABLE
+
+    def is_destroyable(self, index):
+        '''Checks if the tile holds an object that can be smashed.'''
+        return self.codes[index] in DESTROYABLE
+
+    def get_goals(self):
+        '''Returns the indices of every star, ruby and hammer.'''
+        return [i for i in range(self.size) if self.codes[i] in GOALS]
+
+    def tile(self, index):
+        '''Returns the Tile object of a tile index. The same object is
+        returned every time the tile is asked for.
+        '''
+        tile = self.tile_cache.get(index)
+        if tile is None:
+            (x, y) = self.get_coords(index)
+            tile = objects.Tile(bool(self.slides[index]), \
+                create_object(self.codes[index]), x, y)
+            tile = self.tile_cache.setdefault(index, tile)
+        return tile